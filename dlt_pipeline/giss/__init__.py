@@ -0,0 +1,52 @@
+## detta är filen dlt_pipeline/giss/__init__.py
+
+"""
+Export av Oracle GISS-schemat till Parquet, DuckDB eller dlt.
+
+Undermodulerna laddas först när de används (PEP 562), så att
+`import dlt_pipeline.giss` och `giss-export --help` inte drar in pandas,
+pyarrow eller Oracle-klienten:
+
+    from dlt_pipeline.giss import run_export, load_config
+    run_export(load_config(), mode="thread", destination="duckdb")
+"""
+
+import importlib
+
+# Publikt namn -> modul där det finns
+_EXPORTS = {
+    "load_config": "config",
+    "get_config": "config",
+    "set_config": "config",
+    "read_wanted_tables": "config",
+    "export_table": "export",
+    "plan_export": "export",
+    "run_export": "export",
+    "load_catalog": "catalog",
+    "run_quality_scan": "quality",
+    "advise_profiles": "writer",
+    "run_benchmark": "benchmark",
+    "compact_snapshots": "compaction",
+    "load_snapshot_catalog": "compaction",
+    "run_gis_conversion": "gis",
+    "run_snapshot_diff": "diff",
+    "acquire_connection": "connection",
+    "get_engine": "connection",
+    "init_worker": "connection",
+    "main": "cli",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module_name}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
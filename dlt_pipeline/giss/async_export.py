@@ -0,0 +1,325 @@
+## detta är filen dlt_pipeline/giss/async_export.py
+
+"""
+Async-läget: många samtidiga hämtningar i en enda process.
+
+Exporten väntar mest på Oracle och nätverket. I stället för en process per
+samtidig fråga (process/partitioned) körs här alla arbetsenheter som
+korutiner mot en asynkron oracledb-sessionspool (thin mode) i en
+händelseloop, och en asyncio.Semaphore begränsar hur många som hämtar
+samtidigt (ASYNC_CONCURRENCY, standard 16).
+
+Det CPU-tunga arbetet – rader -> Arrow, Parquet-skrivning och spatial
+klustring – körs i en liten trådpool (ASYNC_CPU_WORKERS). pyarrow släpper
+GIL:en vid skrivning och komprimering. Medan en batch konverteras och
+skrivs hämtas nästa batch från databasen.
+
+    run_async(config, work_items, sizes)   ger (item, result, timing) som
+                                           scheduler.run_largest_first
+
+Händelseloopen körs i en egen tråd, så att run_export kan spara manifest
+och state efter varje klar enhet precis som i de andra lägena.
+Arbetsenheterna startas störst först. Omförsök, fil- och loggformat samt
+mätningen per steg är desamma som i export.export_work_item. LOB:ar som
+inte hämtas direkt läses med await (AsyncLOB.read). Pandas-vägen
+(STREAMING=false) finns inte i async-läget, och run_export avvisar den
+kombinationen.
+"""
+
+import asyncio
+import math
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dlt_pipeline.giss import config as giss_config
+from dlt_pipeline.giss.catalog import fetch_columns
+from dlt_pipeline.giss.connection import create_async_session_pool, get_engine
+from dlt_pipeline.giss.export import (
+    fail_table_export,
+    finish_table_export,
+    lob_probe_columns,
+    make_table_handler,
+    prepare_table_export,
+    print_with_time,
+    retry_delay,
+    unit_details,
+)
+from dlt_pipeline.giss.fetch import lob_length_query
+from dlt_pipeline.giss.instrumentation import StageTimer
+from dlt_pipeline.giss.partition import work_item_label
+from dlt_pipeline.giss.scheduler import order_largest_first
+from dlt_pipeline.giss.streaming import (
+    ParquetBatchSink,
+    configure_cursor,
+    lob_column_indexes,
+    normalize_column_name,
+    rows_to_record_batch,
+)
+from dlt_pipeline.giss.writer import writer_options_for
+
+# -------------------------------------------------------------
+# STANDARDVÄRDEN
+# -------------------------------------------------------------
+DEFAULT_ASYNC_CONCURRENCY = 16  # samtidiga hämtningar (och sessioner i poolen)
+DEFAULT_ASYNC_CPU_WORKERS = 4   # trådar för Arrow-konvertering och Parquet-skrivning
+
+_DONE = object()
+
+
+# -------------------------------------------------------------
+# HÄMTNING
+# -------------------------------------------------------------
+async def probe_lob_lengths_async(conn, table, columns, owner="GISS"):
+    """Som fetch.probe_lob_lengths, mot en asynkron anslutning."""
+    lob_names, sql = lob_length_query(table, columns, owner=owner)
+    if sql is None:
+        return {}
+    cursor = conn.cursor()
+    try:
+        await cursor.execute(sql)
+        row = await cursor.fetchone()
+    finally:
+        cursor.close()
+    return {name: int(value or 0) for name, value in zip(lob_names, row)}
+
+
+async def _read_lobs_async(rows, lob_columns):
+    # Som spool._read_lob_rows: locatorer läses i händelseloopen innan batchen lämnas till trådpoolen
+    rows = [list(row) for row in rows]
+    for row in rows:
+        for i in lob_columns:
+            if hasattr(row[i], "read"):
+                row[i] = await row[i].read()
+    return rows
+
+
+def _convert_and_write(sink, names, rows, schema, column_types, timer):
+    # Körs i trådpoolen; ger schemat som nästa batch ska följa
+    batch = rows_to_record_batch(names, rows, schema, column_types, timer=timer)
+    sink.write(batch)
+    return batch.schema
+
+
+async def stream_query_to_parquet_async(
+    conn,
+    sql,
+    parquet_path,
+    executor,
+    batch_size,
+    arraysize,
+    prefetchrows=None,
+    column_types=None,
+    output_type_handler=None,
+    observers=None,
+    writer_options=None,
+    row_group_rows=None,
+    timer=None,
+):
+    """
+    Som streaming.stream_query_to_parquet, men med await på execute/fetchmany
+    och konvertering/skrivning i executor. Batch n skrivs medan batch n+1 hämtas.
+
+    Returnerar:
+        int: Antal skrivna rader.
+    """
+    timer = timer or StageTimer()
+    loop = asyncio.get_running_loop()
+    cursor = conn.cursor()
+    sink = ParquetBatchSink(
+        parquet_path, observers=observers, writer_options=writer_options, row_group_rows=row_group_rows, timer=timer
+    )
+    pending = None
+    try:
+        configure_cursor(cursor, arraysize=arraysize, prefetchrows=prefetchrows)
+        if output_type_handler is not None:
+            cursor.outputtypehandler = output_type_handler
+        with timer.stage("execute"):
+            await cursor.execute(sql)
+        timer.count("round_trips")
+
+        names = [normalize_column_name(d[0]) for d in cursor.description]
+        lob_columns = lob_column_indexes(cursor.description)
+        schema = None
+        while True:
+            start = time.perf_counter()
+            rows = await cursor.fetchmany(batch_size)
+            timer.add("fetch", time.perf_counter() - start, rows=len(rows))
+            timer.count("round_trips", max(math.ceil(len(rows) / arraysize), 1))
+            if rows and lob_columns:
+                with timer.stage("lob_read", rows=len(rows)):
+                    rows = await _read_lobs_async(rows, lob_columns)
+            if pending is not None:
+                schema = await pending
+                pending = None
+            if not rows:
+                break
+            pending = loop.run_in_executor(
+                executor, _convert_and_write, sink, names, rows, schema, column_types, timer
+            )
+
+        return await loop.run_in_executor(
+            executor, sink.finish, lambda: rows_to_record_batch(names, [], schema, column_types)
+        )
+    finally:
+        if pending is not None:
+            # Skrivningen måste bli klar innan filen stängs
+            await asyncio.gather(pending, return_exceptions=True)
+        sink.close()
+        cursor.close()
+
+
+# -------------------------------------------------------------
+# ARBETSENHETER
+# -------------------------------------------------------------
+async def export_table_async(pool, executor, item, timer):
+    """
+    Som export.export_table för en arbetsenhet, mot den asynkrona poolen.
+
+    Returnerar:
+        tuple: (label, status, info)
+    """
+    config = giss_config.get_config()
+    table, label = item["table"], work_item_label(item)
+    loop = asyncio.get_running_loop()
+    job = None
+    try:
+        print_with_time(f"🚀 Start export: {label}")
+        # Katalogfrågan (om kolumnerna saknas) går mot huvudprocessens vanliga pool
+        engine = get_engine()
+        columns = item.get("columns")
+        if columns is None:
+            with timer.stage("catalog"):
+                columns = await asyncio.to_thread(fetch_columns, engine, owner=config["owner"], tables=[table])
+                columns = columns.get(table, [])
+        job = prepare_table_export(
+            config, table, columns, engine, where=item["where"], output_path=item["output_path"]
+        )
+
+        with timer.stage("connect"):
+            conn = await pool.acquire()
+        try:
+            with timer.stage("lob_probe"):
+                lob_lengths = await probe_lob_lengths_async(
+                    conn, table, lob_probe_columns(columns, job["exclude_columns"]), owner=config["owner"]
+                )
+            handler = make_table_handler(
+                conn, table, columns, job["column_types"], config, exclude_columns=job["exclude_columns"],
+                typed_numbers=job["typed_numbers"], geometry_mode=job["geometry_mode"], lob_lengths=lob_lengths,
+            )
+            n_rows = await stream_query_to_parquet_async(
+                conn,
+                job["sql"],
+                job["tmp_path"],
+                executor,
+                batch_size=config["batch_size"],
+                arraysize=config["arraysize"],
+                prefetchrows=config["prefetchrows"],
+                column_types=job["column_types"],
+                output_type_handler=handler,
+                observers=job["observers"],
+                writer_options=writer_options_for(job["profile"]),
+                row_group_rows=job["profile"].get("row_group_rows"),
+                timer=timer,
+            )
+        finally:
+            await pool.release(conn)
+
+        await loop.run_in_executor(executor, finish_table_export, config, job, label, n_rows, timer)
+        return (label, "ok", n_rows)
+
+    except Exception as e:
+        return fail_table_export(job, label, e)
+
+
+async def export_work_item_async(pool, executor, item):
+    """
+    Som export.export_work_item: omförsök vid transienta fel (asyncio.sleep
+    i stället för time.sleep) och samma details.
+    """
+    config = giss_config.get_config()
+    attempt = 0
+    while True:
+        attempt += 1
+        timer = StageTimer()
+        label, status, info = await export_table_async(pool, executor, item, timer)
+        delay = retry_delay(config, label, status, info, attempt)
+        if delay is None:
+            break
+        await asyncio.sleep(delay)
+
+    return (label, status, info, unit_details(item, status, attempt, timer))
+
+
+# -------------------------------------------------------------
+# KÖRNING
+# -------------------------------------------------------------
+async def _run_unit(pool, executor, semaphore, slots, item):
+    async with semaphore:
+        # En plats per samtidig hämtning, så att summarize_schedule kan räkna per "worker"
+        slot = slots.pop()
+        try:
+            start = time.time()
+            result = await export_work_item_async(pool, executor, item)
+            end = time.time()
+        finally:
+            slots.append(slot)
+    worker = f"{os.getpid()}/async-{slot}"
+    return item, result, {"pid": os.getpid(), "worker": worker, "start": start, "end": end}
+
+
+async def _export_all(config, items, on_result):
+    concurrency = config["async_concurrency"]
+    pool = create_async_session_pool(config["connection"], max_sessions=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    slots = list(range(concurrency, 0, -1))
+    executor = ThreadPoolExecutor(max_workers=config["async_cpu_workers"], thread_name_prefix="giss-cpu")
+    try:
+        # Uppgifterna skapas störst först och semaforen släpper in dem i den ordningen
+        tasks = [asyncio.create_task(_run_unit(pool, executor, semaphore, slots, item)) for item in items]
+        for task in asyncio.as_completed(tasks):
+            on_result(await task)
+    finally:
+        executor.shutdown(wait=True)
+        await pool.close(force=True)
+
+
+def run_async(config, work_items, sizes):
+    """
+    Kör arbetsenheterna i async-läget och ger resultaten när de blir klara.
+
+    Parametrar:
+        config (dict): Inställningarna (async_concurrency, async_cpu_workers, connection, ...).
+        work_items (list[dict]): Arbetsenheter från export.plan_export.
+        sizes (dict): Tabellstorlekar för ordningen (störst först).
+
+    Yields:
+        tuple: (item, result, timing) där timing = {"pid", "worker", "start", "end"}.
+    """
+    results = queue.Queue()
+    ordered = order_largest_first(work_items, sizes)
+
+    def run_loop():
+        try:
+            asyncio.run(_export_all(config, ordered, results.put))
+        except BaseException as e:
+            results.put(e)
+        results.put(_DONE)
+
+    print_with_time(
+        f"⚡ Async: {len(ordered)} arbetsenheter, upp till {config['async_concurrency']} samtidiga hämtningar, "
+        f"{config['async_cpu_workers']} trådar för konvertering"
+    )
+    thread = threading.Thread(target=run_loop, name="giss-async", daemon=True)
+    thread.start()
+    while True:
+        result = results.get()
+        if result is _DONE:
+            break
+        if isinstance(result, BaseException):
+            thread.join()
+            raise result
+        yield result
+    thread.join()
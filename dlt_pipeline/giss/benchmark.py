@@ -0,0 +1,357 @@
+## detta är filen dlt_pipeline/giss/benchmark.py
+
+"""
+Benchmark av exporten mot den lokala ersättaren för Oracle (standin.py).
+
+Varje fall är ett körläge (serial, thread, process, partitioned) kombinerat
+med en variant av inställningarna (kombinationer som inte finns, t.ex.
+async-pandas, hoppas över):
+
+    typed     strömmande, typade tal (standard)
+    text      NUMERIC_MODE=text (TO_CHAR i SQL)
+    pandas    STREAMING=false (pd.read_sql + to_parquet)
+    wkb       GEOMETRY_MODE=wkb (GeoParquet)
+    hilbert   SPATIAL_SORT=hilbert (bbox-kolumn och spatial sortering)
+
+Fallen körs i var sin nystartad process (spawn), så att toppminnet (RSS)
+gäller just det fallet, med en tom exportkatalog så att inga cachar från
+tidigare fall påverkar planen. Exportens utskrifter hamnar i export.log
+i fallets katalog.
+
+Per körning mäts:
+
+    seconds, rows, bytes     total tid, exporterade rader och skrivna Parquet-bytes
+    rows_per_s, mb_per_s     genomströmning (bytes räknas på Parquet-filerna)
+    peak_rss_bytes           största RSS i fallets process respektive i någon worker
+    stages                   plan (tabellista, katalog, storlekar, arbetsenheter),
+                             export (första start till sista slut), finish
+                             (manifest, storleks- och snapshotkatalog) och work
+                             (summan av arbetsenheternas tider)
+    unit_stages              tid per steg i arbetsenheterna (fetch, convert, write, ...,
+                             se instrumentation.py), summerad över alla enheter
+    tables                   rader, bytes, sekunder och enheter per tabell
+
+Resultatet sparas som JSON ({BENCH_DIR}/bench_{tidsstämpel}.json) och kan
+jämföras med en tidigare körning (compare_results), t.ex.
+
+    giss-export bench --modes serial,thread --variants typed,pandas
+    giss-export bench --compare data/bench/bench_20250101_120000.json
+"""
+
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from dlt_pipeline.giss.config import MODES
+from dlt_pipeline.giss.export import print_with_time, run_export
+from dlt_pipeline.giss.instrumentation import peak_rss_bytes, summarize_metrics
+from dlt_pipeline.giss.manifest import load_manifest, save_manifest
+from dlt_pipeline.giss.standin import DEFAULT_STAND_IN_SCALE, STAND_IN_TABLES, create_stand_in, stand_in_settings
+
+# -------------------------------------------------------------
+# STANDARDVÄRDEN
+# -------------------------------------------------------------
+DEFAULT_BENCH_DIR = "./data/bench"
+DEFAULT_BENCH_REPEAT = 1
+DEFAULT_REGRESSION_THRESHOLD = 0.10  # 10 % lägre genomströmning räknas som regression
+
+BENCHMARK_VARIANTS = {
+    "typed": {},
+    "text": {"numeric_mode": "text"},
+    "pandas": {"streaming": False},
+    "wkb": {"geometry_mode": "wkb"},
+    "hilbert": {"spatial_sort": "hilbert"},
+    "pipeline": {"pipeline": True},
+}
+
+# Kombinationer som inte finns och därför hoppas över: async-läget strömmar
+# alltid (ingen pandas-väg) och överlappar redan hämtning och skrivning
+UNSUPPORTED_CASES = {("async", "pandas"), ("async", "pipeline")}
+
+
+# -------------------------------------------------------------
+# MÄTNING AV ETT FALL
+# -------------------------------------------------------------
+def summarize_run(finished, start, end):
+    """
+    Mått för en körning ur run_export:s resultat (item, result, timing).
+
+    Returnerar:
+        dict: seconds, rows, bytes, rows_per_s, mb_per_s, stages, unit_stages, tables, errors
+    """
+    seconds = end - start
+    rows, n_bytes, work = 0, 0, 0.0
+    tables, errors = {}, {}
+    for item, (label, status, info, _), timing in finished:
+        duration = timing["end"] - timing["start"]
+        work += duration
+        table = tables.setdefault(item["table"], {"rows": 0, "bytes": 0, "seconds": 0.0, "units": 0})
+        table["seconds"] = round(table["seconds"] + duration, 3)
+        table["units"] += 1
+        if status != "ok":
+            errors[label] = info
+            continue
+        size = os.path.getsize(item["output_path"]) if os.path.exists(item["output_path"]) else 0
+        rows += info
+        n_bytes += size
+        table["rows"] += info
+        table["bytes"] += size
+
+    first_start = min((t["start"] for _, _, t in finished), default=end)
+    last_end = max((t["end"] for _, _, t in finished), default=end)
+    return {
+        "seconds": round(seconds, 3),
+        "rows": rows,
+        "bytes": n_bytes,
+        "rows_per_s": round(rows / seconds, 1) if seconds > 0 else None,
+        "mb_per_s": round(n_bytes / 1e6 / seconds, 3) if seconds > 0 else None,
+        "stages": {
+            "plan": round(first_start - start, 3),
+            "export": round(last_end - first_start, 3),
+            "finish": round(end - last_end, 3),
+            "work": round(work, 3),
+        },
+        "unit_stages": {
+            name: round(entry["seconds"], 3) for name, entry in summarize_metrics(finished)["stages"].items()
+        },
+        "tables": tables,
+        "errors": errors,
+    }
+
+
+def _case_process(sender, config, mode, tables, log_path):
+    # Körs i en egen process (spawn): exporterar och skickar måtten tillbaka.
+    # stdout/stderr styrs om på fd-nivå så att även workerprocesserna skriver till loggen.
+    with open(log_path, "w", encoding="utf-8") as log:
+        os.dup2(log.fileno(), sys.stdout.fileno())
+        os.dup2(log.fileno(), sys.stderr.fileno())
+        start = time.time()
+        try:
+            finished = run_export(config, mode=mode, tables=tables)
+            error = None
+        except Exception as e:
+            finished, error = [], str(e)
+        end = time.time()
+        sys.stdout.flush()
+    summary = summarize_run(finished, start, end)
+    summary["peak_rss_bytes"] = peak_rss_bytes()
+    summary["peak_rss_workers_bytes"] = peak_rss_bytes(children=True)
+    summary["error"] = error
+    sender.send(summary)
+    sender.close()
+
+
+def case_config(config, case_dir, db_path, overrides=None):
+    """
+    Inställningar för ett fall: egen exportkatalog (med cachar, manifest och
+    state), anslutning mot ersättaren och variantens inställningar.
+    """
+    config = dict(config)
+    config.update(
+        parquet_dir=case_dir,
+        catalog_cache=os.path.join(case_dir, "_catalog.json"),
+        size_cache=os.path.join(case_dir, "_table_sizes.json"),
+        state_path=os.path.join(case_dir, os.path.basename(config["state_path"])),
+        manifest_path=os.path.join(case_dir, os.path.basename(config["manifest_path"])),
+        quality_report_path=os.path.join(case_dir, os.path.basename(config["quality_report_path"])),
+        events_path=os.path.join(case_dir, os.path.basename(config["events_path"])),
+        spool_dir=os.path.join(case_dir, os.path.basename(config["spool_dir"])),
+        metrics_path=None,
+        trace_path=None,
+        duckdb_path=os.path.join(case_dir, "bench.duckdb"),
+        connection=stand_in_settings(db_path, max_sessions=config["workers"]),
+        incremental=False,
+        spatial_sort="none",
+        parquet_table_profiles={},
+    )
+    config.update(overrides or {})
+    return config
+
+
+def run_case(config, mode, tables, case_dir):
+    """
+    Kör ett fall i en ny process och returnerar måtten (se summarize_run
+    plus peak_rss_bytes, peak_rss_workers_bytes och error).
+    """
+    shutil.rmtree(case_dir, ignore_errors=True)
+    os.makedirs(case_dir)
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_case_process, args=(sender, config, mode, tables, os.path.join(case_dir, "export.log"))
+    )
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = {"error": f"processen avslutades med kod {process.exitcode}"}
+    process.join()
+    return result
+
+
+# -------------------------------------------------------------
+# HELA BENCHMARKEN
+# -------------------------------------------------------------
+def _environment():
+    import duckdb
+    import pandas as pd
+    import pyarrow as pa
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pyarrow": pa.__version__,
+        "pandas": pd.__version__,
+        "duckdb": duckdb.__version__,
+        "commit": commit,
+    }
+
+
+def _best(runs):
+    # Snabbaste körningen utan fel (den minst störda), annars den första
+    ok = [r for r in runs if not r.get("error") and not r.get("errors")]
+    return min(ok, key=lambda r: r["seconds"]) if ok else runs[0]
+
+
+def run_benchmark(
+    config,
+    modes=None,
+    variants=None,
+    scale=DEFAULT_STAND_IN_SCALE,
+    tables=None,
+    bench_dir=DEFAULT_BENCH_DIR,
+    repeat=DEFAULT_BENCH_REPEAT,
+    output_path=None,
+    regenerate=False,
+):
+    """
+    Kör exporten mot ersättaren i varje läge och variant och sparar resultatet som JSON.
+
+    Parametrar:
+        config (dict): Från config.load_config (anslutning och sökvägar ersätts per fall).
+        modes (list[str] | None): Körlägen (standard: alla i MODES).
+        variants (list[str] | None): Varianter ur BENCHMARK_VARIANTS (standard: alla).
+        scale (float): Faktor för antalet rader i de syntetiska tabellerna.
+        tables (list[str] | None): Delmängd av STAND_IN_TABLES (standard: alla).
+        bench_dir (str): Katalog för ersättaren, fallens exporter och resultatet.
+        repeat (int): Körningar per fall; "best" är den snabbaste.
+        output_path (str | None): Resultatfil (standard: {bench_dir}/bench_{tidsstämpel}.json).
+        regenerate (bool): Skapa ersättaren på nytt även om filen finns.
+
+    Returnerar:
+        dict: Resultatet som det sparas.
+    """
+    modes = modes or list(MODES)
+    variants = variants or list(BENCHMARK_VARIANTS)
+    tables = [t.upper() for t in tables] if tables else list(STAND_IN_TABLES)
+    for mode in modes:
+        if mode not in MODES:
+            raise ValueError(f"Okänt läge: {mode} (välj bland {', '.join(MODES)})")
+    for variant in variants:
+        if variant not in BENCHMARK_VARIANTS:
+            raise ValueError(f"Okänd variant: {variant} (välj bland {', '.join(BENCHMARK_VARIANTS)})")
+    for table in tables:
+        if table not in STAND_IN_TABLES:
+            raise ValueError(f"Okänd tabell: {table} (välj bland {', '.join(STAND_IN_TABLES)})")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    os.makedirs(bench_dir, exist_ok=True)
+    db_path = os.path.join(bench_dir, f"standin_{scale:g}.duckdb")
+    generate_seconds = None
+    if regenerate or not os.path.exists(db_path):
+        print_with_time(f"🧪 Skapar syntetiska tabeller (scale {scale:g}) i {db_path}")
+        start = time.time()
+        row_counts = create_stand_in(db_path, scale=scale, owner=config["owner"])
+        generate_seconds = round(time.time() - start, 3)
+    else:
+        row_counts = {t: int(spec["rows"] * scale) for t, spec in STAND_IN_TABLES.items()}
+
+    result = {
+        "created_at": timestamp,
+        "environment": _environment(),
+        "scale": scale,
+        "workers": config["workers"],
+        "tables": {t: row_counts[t] for t in tables},
+        "generate_seconds": generate_seconds,
+        "cases": [],
+        "skipped": [],
+    }
+    for mode in modes:
+        for variant in variants:
+            name = f"{mode}-{variant}"
+            if (mode, variant) in UNSUPPORTED_CASES:
+                print_with_time(f"⏭️ {name}: hoppas över (varianten {variant} finns inte i läget {mode})")
+                result["skipped"].append(name)
+                continue
+            runs = []
+            for i in range(max(repeat, 1)):
+                case_dir = os.path.join(bench_dir, "runs", name)
+                settings = case_config(config, case_dir, db_path, BENCHMARK_VARIANTS[variant])
+                run = run_case(settings, mode, tables, case_dir)
+                runs.append(run)
+                if run.get("error") or run.get("errors"):
+                    print_with_time(f"⚠️ {name}: fel – {run.get('error') or run.get('errors')}")
+                else:
+                    print_with_time(
+                        f"⏱️ {name} ({i + 1}/{repeat}): {run['seconds']:.1f}s, {run['rows_per_s']:,.0f} rader/s, "
+                        f"{run['mb_per_s']:.1f} MB/s, RSS {run['peak_rss_bytes'] / 1e6:.0f} MB "
+                        f"(worker {run['peak_rss_workers_bytes'] / 1e6:.0f} MB)"
+                    )
+            result["cases"].append({"name": name, "mode": mode, "variant": variant, "best": _best(runs), "runs": runs})
+
+    output_path = output_path or os.path.join(bench_dir, f"bench_{timestamp}.json")
+    save_manifest(output_path, result)
+    print_with_time(f"📒 Benchmarkresultat: {output_path}")
+    return result
+
+
+# -------------------------------------------------------------
+# JÄMFÖRELSE
+# -------------------------------------------------------------
+def load_results(path):
+    """Läser en tidigare resultatfil (ValueError om den saknas)."""
+    result = load_manifest(path)
+    if result is None:
+        raise ValueError(f"Hittar inget benchmarkresultat: {path}")
+    return result
+
+
+def compare_results(baseline, current, threshold=DEFAULT_REGRESSION_THRESHOLD):
+    """
+    Jämför fallen (på namn) i två resultat.
+
+    Returnerar:
+        list[dict]: {"name", "baseline_rows_per_s", "rows_per_s", "change", "rss_change", "regression"}
+                    per fall som finns i båda. change och rss_change är relativa (0.1 = +10 %);
+                    regression är True när genomströmningen sjunkit mer än threshold.
+    """
+    previous = {case["name"]: case["best"] for case in baseline.get("cases", [])}
+    comparison = []
+    for case in current.get("cases", []):
+        before, after = previous.get(case["name"]), case["best"]
+        if not before or not before.get("rows_per_s") or not after.get("rows_per_s"):
+            continue
+        change = after["rows_per_s"] / before["rows_per_s"] - 1
+        rss_before = before.get("peak_rss_bytes") or 0
+        comparison.append({
+            "name": case["name"],
+            "baseline_rows_per_s": before["rows_per_s"],
+            "rows_per_s": after["rows_per_s"],
+            "change": round(change, 3),
+            "rss_change": round(after["peak_rss_bytes"] / rss_before - 1, 3) if rss_before else None,
+            "regression": change < -threshold,
+        })
+    return comparison
@@ -0,0 +1,120 @@
+## detta är filen dlt_pipeline/giss/cache.py
+
+"""
+LRU-cache med storleksgräns i bytes, för frågeresultat i servern.
+
+Posterna är listor med pyarrow RecordBatches och storleken räknas med
+batch.nbytes. När cachen är full tas de minst nyligen använda posterna
+bort. Nycklarna är tupler som börjar med tabellnamnet, så att alla poster
+för en tabell kan ogiltigförklaras när en ny snapshot dyker upp.
+
+Räknare för träffar, missar, borttagna poster (evictions) och
+ogiltigförklaringar finns i stats(), för att kunna dimensionera cachen.
+"""
+
+import threading
+from collections import OrderedDict
+
+# -------------------------------------------------------------
+# STANDARDVÄRDEN
+# -------------------------------------------------------------
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024       # hela cachen
+DEFAULT_MAX_ENTRY_BYTES = 32 * 1024 * 1024  # större resultat cachas inte
+
+
+def batches_nbytes(batches):
+    """Storlek i bytes för en lista med RecordBatches."""
+    return sum(batch.nbytes for batch in batches)
+
+
+class ResultCache:
+    """
+    Trådsäker LRU-cache för frågeresultat.
+
+    Parametrar:
+        max_bytes (int): Total storlek innan poster tas bort.
+        max_entry_bytes (int): Största resultat som sparas.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_entry_bytes=DEFAULT_MAX_ENTRY_BYTES):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self._entries = OrderedDict()  # nyckel -> (batches, nbytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.rejected = 0  # resultat som var för stora för att sparas
+
+    def get(self, key):
+        """Cachade batchar för nyckeln, eller None (räknas som miss)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, batches):
+        """Sparar ett färdigt resultat. För stora resultat sparas inte."""
+        nbytes = batches_nbytes(batches)
+        with self._lock:
+            if nbytes > self.max_entry_bytes:
+                self.rejected += 1
+                return False
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (batches, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+            return True
+
+    def reject(self):
+        """Räknar ett resultat som var för stort (och därför inte samlades in)."""
+        with self._lock:
+            self.rejected += 1
+
+    def invalidate(self, table, keep=None):
+        """
+        Tar bort alla poster för en tabell, utom de vars nyckel uppfyller keep
+        (t.ex. poster för den snapshot som fortfarande är aktuell).
+
+        Returnerar:
+            int: Antal borttagna poster.
+        """
+        with self._lock:
+            stale = [k for k in self._entries if k[0] == table and not (keep and keep(k))]
+            for key in stale:
+                self._bytes -= self._entries.pop(key)[1]
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Räknare och storlek, t.ex. för /cache/stats."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "max_entry_bytes": self.max_entry_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "rejected": self.rejected,
+            }
@@ -0,0 +1,231 @@
+## detta är filen dlt_pipeline/giss/catalog.py
+
+"""
+Cache för schemametadata (kolumner per tabell) från Oracles datakatalog.
+
+I stället för en ALL_TAB_COLUMNS-fråga per tabell hämtas kolumnerna för
+hela schemat med en enda fråga och sparas i en JSON-fil på disk. Cachen
+är nycklad på ALL_OBJECTS.LAST_DDL_TIME per tabell, så vid nästa körning
+hämtas bara kolumner för tabeller vars DDL har ändrats (eller som är nya).
+
+Format (en post per tabell):
+    {
+        "GAVD": {
+            "ddl_time": "2025-09-30T12:00:00",
+            "primary_key": ["ID"],
+            "columns": [
+                {"name": "ID", "data_type": "NUMBER", "precision": 10, "scale": 0,
+                 "nullable": False, "length": 22},
+                {"name": "GEOMETRI", "data_type": "SDO_GEOMETRY", ..., "srid": 3006},
+                ...
+            ]
+        }
+    }
+"""
+
+import json
+import os
+
+import pandas as pd
+
+# -------------------------------------------------------------
+# STANDARDVÄRDEN
+# -------------------------------------------------------------
+DEFAULT_CATALOG_CACHE = "./data/cache/giss_catalog.json"
+
+# Max antal tabellnamn i en IN-lista (Oracle tillåter 1000)
+_MAX_IN_LIST = 1000
+
+
+# -------------------------------------------------------------
+# KATALOGFRÅGOR
+# -------------------------------------------------------------
+def fetch_ddl_times(conn, owner="GISS"):
+    """
+    Hämtar LAST_DDL_TIME per tabell från ALL_OBJECTS.
+
+    Returnerar:
+        dict[str, str]: tabellnamn -> ISO-tidsstämpel
+    """
+    query = f"""
+        SELECT object_name, last_ddl_time FROM all_objects
+        WHERE owner = '{owner}' AND object_type = 'TABLE'
+    """
+    df = pd.read_sql(query, con=conn)
+    df.columns = [c.upper() for c in df.columns]
+    return {
+        row["OBJECT_NAME"]: pd.Timestamp(row["LAST_DDL_TIME"]).isoformat()
+        for _, row in df.iterrows()
+    }
+
+
+def _int_or_none(value):
+    return int(value) if pd.notna(value) else None
+
+
+def fetch_columns(conn, owner="GISS", tables=None):
+    """
+    Hämtar kolumnnamn, typ, precision, skala och nullbarhet för alla
+    (eller de angivna) tabellerna i schemat med en enda fråga.
+
+    Returnerar:
+        dict[str, list[dict]]: tabellnamn -> kolumner i COLUMN_ID-ordning
+    """
+    where = f"owner = '{owner}'"
+    if tables is not None and len(tables) <= _MAX_IN_LIST:
+        in_list = ", ".join(f"'{t}'" for t in tables)
+        where += f" AND table_name IN ({in_list})"
+
+    query = f"""
+        SELECT table_name, column_name, data_type, data_precision, data_scale,
+               nullable, data_length
+        FROM all_tab_columns
+        WHERE {where}
+        ORDER BY table_name, column_id
+    """
+    df = pd.read_sql(query, con=conn)
+    df.columns = [c.upper() for c in df.columns]
+
+    columns = {}
+    for _, row in df.iterrows():
+        columns.setdefault(row["TABLE_NAME"], []).append({
+            "name": row["COLUMN_NAME"],
+            "data_type": row["DATA_TYPE"],
+            "precision": _int_or_none(row["DATA_PRECISION"]),
+            "scale": _int_or_none(row["DATA_SCALE"]),
+            "nullable": row["NULLABLE"] == "Y",
+            "length": _int_or_none(row["DATA_LENGTH"]),
+        })
+    return columns
+
+
+def fetch_geometry_srids(conn, owner="GISS"):
+    """
+    Hämtar SRID per geometrikolumn från ALL_SDO_GEOM_METADATA.
+
+    Returnerar:
+        dict[tuple[str, str], int]: (tabell, kolumn) -> SRID. Tom om vyn inte är åtkomlig.
+    """
+    query = f"""
+        SELECT table_name, column_name, srid FROM all_sdo_geom_metadata
+        WHERE owner = '{owner}'
+    """
+    try:
+        df = pd.read_sql(query, con=conn)
+    except Exception:
+        return {}
+    df.columns = [c.upper() for c in df.columns]
+    return {
+        (row["TABLE_NAME"], row["COLUMN_NAME"]): int(row["SRID"])
+        for _, row in df.iterrows()
+        if pd.notna(row["SRID"])
+    }
+
+
+def fetch_primary_keys(conn, owner="GISS"):
+    """
+    Hämtar primärnyckelns kolumner per tabell från ALL_CONSTRAINTS/ALL_CONS_COLUMNS.
+
+    Returnerar:
+        dict[str, list[str]]: tabellnamn -> kolumner i nyckelordning (bara tabeller med primärnyckel)
+    """
+    query = f"""
+        SELECT cc.table_name, cc.column_name
+        FROM all_constraints c
+        JOIN all_cons_columns cc
+          ON cc.owner = c.owner AND cc.constraint_name = c.constraint_name
+        WHERE c.owner = '{owner}' AND c.constraint_type = 'P'
+        ORDER BY cc.table_name, cc.position
+    """
+    df = pd.read_sql(query, con=conn)
+    df.columns = [c.upper() for c in df.columns]
+    keys = {}
+    for _, row in df.iterrows():
+        keys.setdefault(row["TABLE_NAME"], []).append(row["COLUMN_NAME"])
+    return keys
+
+
+# -------------------------------------------------------------
+# CACHE
+# -------------------------------------------------------------
+def read_catalog_cache(cache_path):
+    """Läser katalogcachen (tom dict om den saknas eller är trasig)."""
+    if not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_catalog_cache(cache_path, catalog):
+    """Skriver katalogcachen atomiskt."""
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(catalog, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, cache_path)
+
+
+def load_catalog(conn, cache_path=DEFAULT_CATALOG_CACHE, owner="GISS"):
+    """
+    Returnerar kolumnmetadata för hela schemat. Bara tabeller vars
+    LAST_DDL_TIME skiljer sig från cachen hämtas på nytt (i en fråga),
+    övriga återanvänds från disk.
+
+    Parametrar:
+        conn: SQLAlchemy engine eller connection.
+        cache_path (str): Sökväg till JSON-cachen.
+        owner (str): Schemaägare.
+
+    Returnerar:
+        dict: tabellnamn -> {"ddl_time": str, "columns": list[dict]}
+    """
+    cached = read_catalog_cache(cache_path)
+    ddl_times = fetch_ddl_times(conn, owner=owner)
+
+    # Poster från en äldre cache utan primärnyckel hämtas också på nytt
+    stale = [
+        t for t, ddl in ddl_times.items()
+        if cached.get(t, {}).get("ddl_time") != ddl or "primary_key" not in cached[t]
+    ]
+    catalog = {t: cached[t] for t in ddl_times if t not in stale}
+
+    if stale:
+        # Hela schemat i en fråga om allt är inaktuellt, annars bara de ändrade tabellerna
+        fetched = fetch_columns(conn, owner=owner, tables=None if len(stale) == len(ddl_times) else stale)
+        srids = fetch_geometry_srids(conn, owner=owner)
+        primary_keys = fetch_primary_keys(conn, owner=owner)
+        for table, table_columns in fetched.items():
+            for column in table_columns:
+                if column["data_type"] == "SDO_GEOMETRY":
+                    column["srid"] = srids.get((table, column["name"]))
+        for table in stale:
+            catalog[table] = {
+                "ddl_time": ddl_times[table],
+                "primary_key": primary_keys.get(table, []),
+                "columns": fetched.get(table, []),
+            }
+
+    if stale or len(catalog) != len(cached):
+        write_catalog_cache(cache_path, catalog)
+    return catalog
+
+
+# -------------------------------------------------------------
+# UPPSLAG
+# -------------------------------------------------------------
+def get_columns(catalog, table):
+    """Kolumnerna för en tabell (tom lista om tabellen saknas i katalogen)."""
+    return catalog.get(table, {}).get("columns", [])
+
+
+def get_primary_key(catalog, table):
+    """Primärnyckelns kolumner för en tabell (tom lista om den saknas)."""
+    return catalog.get(table, {}).get("primary_key", [])
+
+
+def get_geometry_columns(catalog, table):
+    """Namnen på tabellens SDO_GEOMETRY-kolumner."""
+    return [c["name"] for c in get_columns(catalog, table) if c["data_type"] == "SDO_GEOMETRY"]
@@ -0,0 +1,312 @@
+## detta är filen dlt_pipeline/giss/cli.py
+
+"""
+Kommandorad för GISS-exporten (installeras som giss-export).
+
+    giss-export export --mode partitioned --destination parquet
+    giss-export export --tables GAVD,TDOK --mode thread --destination duckdb
+    giss-export export --all --mode async --concurrency 32
+    giss-export plan --all
+    giss-export diff --tables GAVD
+    giss-export compact --keep 3
+    giss-export convert --formats fgb,gpkg --target-srid 4326
+    giss-export advise --tables GAVD
+    giss-export scan --all
+    giss-export bench --modes serial,thread --variants typed,pandas
+
+Tunga beroenden (pandas, pyarrow, oracledb, dlt) importeras först i
+kommandofunktionerna, så att --help startar direkt utan att ladda
+Oracle-klienten eller koppla upp mot databasen.
+"""
+
+import argparse
+import logging
+
+from dlt_pipeline.giss.config import DEFAULT_ENV_PATH, DEFAULT_MODE, DESTINATIONS, MODES, SPATIAL_SORTS, load_config
+
+
+def _split_tables(value):
+    return [t.strip() for t in value.split(",") if t.strip()] if value else None
+
+
+def _load_config(args):
+    config = load_config(
+        args.env or DEFAULT_ENV_PATH,
+        workers=args.workers,
+        parquet_dir=args.parquet_dir,
+        duckdb_path=args.duckdb_path,
+        wanted_tables_csv=getattr(args, "csv", None),
+        retries=getattr(args, "retries", None),
+        keep_snapshots=getattr(args, "keep_snapshots", None),
+        keep_days=getattr(args, "keep_days", None),
+        spatial_sort=getattr(args, "spatial_sort", None),
+        metrics_path=getattr(args, "metrics_file", None),
+        trace_path=getattr(args, "trace_file", None),
+        async_concurrency=getattr(args, "concurrency", None),
+        pipeline=getattr(args, "pipeline", None),
+        diff=getattr(args, "diff", None),
+        gis_target_srid=getattr(args, "target_srid", None),
+    )
+    if getattr(args, "incremental", None) is not None:
+        config["incremental"] = args.incremental
+    logging.basicConfig(
+        filename=config["log_file"],
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+    )
+    return config
+
+
+# -------------------------------------------------------------
+# KOMMANDON
+# -------------------------------------------------------------
+def cmd_export(args):
+    from dlt_pipeline.giss.export import run_export
+
+    config = _load_config(args)
+    run_export(
+        config,
+        mode=args.mode,
+        destination=args.destination,
+        tables=_split_tables(args.tables),
+        all_tables=args.all,
+        dry_run=args.dry_run,
+        resume=args.resume,
+    )
+    return 0
+
+
+def cmd_plan(args):
+    args.dry_run = True
+    return cmd_export(args)
+
+
+def cmd_compact(args):
+    from dlt_pipeline.giss.compaction import compact_snapshots
+
+    config = _load_config(args)
+    compact_snapshots(config, tables=_split_tables(args.tables), dry_run=args.dry_run, views=not args.no_views)
+    return 0
+
+
+def cmd_diff(args):
+    from dlt_pipeline.giss.diff import run_snapshot_diff
+
+    config = _load_config(args)
+    run_snapshot_diff(config, tables=_split_tables(args.tables), force=args.force)
+    return 0
+
+
+def cmd_convert(args):
+    from dlt_pipeline.giss.gis import parse_formats, run_gis_conversion
+
+    config = _load_config(args)
+    results = run_gis_conversion(
+        config,
+        tables=_split_tables(args.tables),
+        formats=parse_formats(args.formats) if args.formats else None,
+        force=args.force,
+        dry_run=args.dry_run,
+    )
+    return 1 if any(r["status"] != "ok" for r in results.values()) else 0
+
+
+def cmd_scan(args):
+    from dlt_pipeline.giss.quality import run_quality_scan
+
+    config = _load_config(args)
+    run_quality_scan(config, tables=_split_tables(args.tables), all_tables=args.all)
+    return 0
+
+
+def cmd_advise(args):
+    from dlt_pipeline.giss.snapshots import latest_snapshot
+    from dlt_pipeline.giss.writer import advise_profiles, read_sample, recommend_profile
+
+    config = _load_config(args)
+    targets = [(f, [f]) for f in args.file or []]
+    for table in _split_tables(args.tables) or []:
+        snapshot = latest_snapshot(config["parquet_dir"], table)
+        if snapshot is None:
+            print(f"⚠️ Ingen export av {table.upper()} i {config['parquet_dir']}")
+            continue
+        targets.append((f"{table.upper()} ({snapshot['timestamp']})", snapshot["files"]))
+
+    for name, files in targets:
+        sample = read_sample(files, args.sample_rows)
+        results = advise_profiles(sample, profiles=_split_tables(args.profiles))
+        print(f"\n{name}: {sample.num_rows} rader i urvalet")
+        print(f"  {'profil':<10} {'storlek':>12} {'relativt':>9} {'skrivning':>10} {'läsning':>9} {'radgrupper':>10}")
+        for r in results:
+            ratio = f"{r['ratio']:.2f}" if r["ratio"] is not None else "-"
+            print(
+                f"  {r['profile']:<10} {r['bytes']:>12,} {ratio:>9} {r['write_seconds']:>9.3f}s "
+                f"{r['scan_seconds']:>8.3f}s {r['row_groups']:>10}"
+            )
+        print(f"  Förslag: {recommend_profile(results)}")
+    return 0
+
+
+def cmd_bench(args):
+    from dlt_pipeline.giss.benchmark import compare_results, load_results, run_benchmark
+
+    config = _load_config(args)
+    baseline = load_results(args.compare) if args.compare else None
+    result = run_benchmark(
+        config,
+        modes=_split_tables(args.modes),
+        variants=_split_tables(args.variants),
+        scale=args.scale,
+        tables=_split_tables(args.tables),
+        bench_dir=args.bench_dir,
+        repeat=args.repeat,
+        output_path=args.output,
+        regenerate=args.regenerate,
+    )
+
+    print(f"\n  {'fall':<22} {'sekunder':>9} {'rader/s':>11} {'MB/s':>7} {'RSS MB':>7} {'plan':>6} {'export':>7}")
+    for case in result["cases"]:
+        best = case["best"]
+        if best.get("error") or best.get("errors"):
+            print(f"  {case['name']:<22} fel: {best.get('error') or best.get('errors')}")
+            continue
+        rss = max(best["peak_rss_bytes"], best["peak_rss_workers_bytes"]) / 1e6
+        print(
+            f"  {case['name']:<22} {best['seconds']:>9.2f} {best['rows_per_s']:>11,.0f} {best['mb_per_s']:>7.1f} "
+            f"{rss:>7.0f} {best['stages']['plan']:>6.2f} {best['stages']['export']:>7.2f}"
+        )
+
+    if baseline is None:
+        return 0
+    comparison = compare_results(baseline, result, threshold=args.threshold)
+    print(f"\nJämfört med {args.compare}:")
+    for row in comparison:
+        flag = "⚠️ regression" if row["regression"] else ""
+        print(f"  {row['name']:<22} {row['baseline_rows_per_s']:>11,.0f} → {row['rows_per_s']:>11,.0f} rader/s "
+              f"({row['change']:+.0%}) {flag}")
+    return 1 if any(row["regression"] for row in comparison) else 0
+
+
+# -------------------------------------------------------------
+# PARSER
+# -------------------------------------------------------------
+def _add_selection_arguments(parser):
+    selection = parser.add_mutually_exclusive_group()
+    selection.add_argument("--tables", help="Kommaseparerade tabellnamn (annars WANTED_TABLES.csv)")
+    selection.add_argument("--all", action="store_true", help="Alla tabeller i schemat")
+    selection.add_argument("--csv", help="Annan tabellista än WANTED_TABLES.csv")
+
+
+def _add_common_arguments(parser):
+    parser.add_argument("--workers", type=int, help="Antal processer/trådar (standard: WORKERS eller min(cpu, 4))")
+    parser.add_argument("--parquet-dir", help="Exportkatalog (standard: PARQUET_DIR)")
+    parser.add_argument("--duckdb-path", help="DuckDB-fil för --destination duckdb")
+    parser.add_argument("--env", help="Sökväg till .env (standard: dlt_pipeline/giss/.env)")
+
+
+def _add_export_arguments(parser):
+    parser.add_argument("--mode", choices=MODES, default=DEFAULT_MODE,
+                        help=f"Körläge (standard: {DEFAULT_MODE})")
+    parser.add_argument("--destination", choices=DESTINATIONS, default="parquet",
+                        help="Var datat hamnar (standard: parquet)")
+    _add_selection_arguments(parser)
+    _add_common_arguments(parser)
+    incremental = parser.add_mutually_exclusive_group()
+    incremental.add_argument("--incremental", dest="incremental", action="store_true", default=None,
+                             help="Hoppa över oförändrade tabeller, exportera delta där det går")
+    incremental.add_argument("--full", dest="incremental", action="store_false",
+                             help="Exportera allt oavsett tidigare körningar")
+    parser.add_argument("--resume", action="store_true",
+                        help="Kör bara om misslyckade/saknade enheter från förra körningens manifest")
+    parser.add_argument("--retries", type=int, help="Nya försök vid transienta fel (standard: RETRIES eller 3)")
+    parser.add_argument("--spatial-sort", choices=SPATIAL_SORTS,
+                        help="Bbox-kolumn och spatial sortering av geometritabeller (standard: SPATIAL_SORT eller none)")
+    parser.add_argument("--pipeline", action="store_true", default=None,
+                        help="Hämta, konvertera och skriva i egna trådar med spool till disk (standard: PIPELINE)")
+    parser.add_argument("--diff", action="store_true", default=None,
+                        help="Jämför med föregående snapshot och skriv changesets efter exporten (standard: DIFF)")
+    parser.add_argument("--concurrency", type=int,
+                        help="Samtidiga hämtningar i --mode async (standard: ASYNC_CONCURRENCY eller 16)")
+    parser.add_argument("--metrics-file", help="Prometheus-textfil med mått per tabell och steg (standard: METRICS_PATH)")
+    parser.add_argument("--trace-file", help="Trace i OTLP/JSON-format (standard: TRACE_PATH)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="giss-export", description="Export av Oracle GISS-schemat")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export = subparsers.add_parser("export", help="Exportera tabeller")
+    _add_export_arguments(export)
+    export.add_argument("--dry-run", action="store_true", help="Visa bara planen")
+    export.set_defaults(func=cmd_export)
+
+    plan = subparsers.add_parser("plan", help="Visa exportplanen utan att exportera (dry-run)")
+    _add_export_arguments(plan)
+    plan.set_defaults(func=cmd_plan)
+
+    compact = subparsers.add_parser("compact", help="Kompaktera snapshots, städa gamla och uppdatera latest-vyerna")
+    compact.add_argument("--tables", help="Kommaseparerade tabellnamn (annars alla)")
+    _add_common_arguments(compact)
+    compact.add_argument("--keep", dest="keep_snapshots", type=int,
+                         help="Fulla snapshots att spara per tabell (standard: KEEP_SNAPSHOTS eller 3)")
+    compact.add_argument("--keep-days", type=int, help="Spara även alla snapshots yngre än så (standard: KEEP_DAYS)")
+    compact.add_argument("--no-views", action="store_true", help="Skapa inte latest.<tabell> i DuckDB-filen")
+    compact.add_argument("--dry-run", action="store_true", help="Visa bara vad som skulle göras")
+    compact.set_defaults(func=cmd_compact)
+
+    diff = subparsers.add_parser("diff", help="Radvisa ändringar mellan senaste och föregående snapshot")
+    diff.add_argument("--tables", help="Kommaseparerade tabellnamn (annars alla)")
+    _add_common_arguments(diff)
+    diff.add_argument("--force", action="store_true", help="Jämför även snapshots som redan har jämförts")
+    diff.set_defaults(func=cmd_diff)
+
+    convert = subparsers.add_parser("convert", help="Konvertera geometritabeller till FlatGeobuf/GeoPackage med GDAL")
+    convert.add_argument("--tables", help="Kommaseparerade tabellnamn (annars alla med geometri)")
+    _add_common_arguments(convert)
+    convert.add_argument("--formats", help="Kommaseparerade format: fgb, gpkg, pmtiles (standard: GIS_FORMATS)")
+    convert.add_argument("--target-srid", type=int, help="EPSG-kod att projicera om till (standard: GIS_TARGET_SRID)")
+    convert.add_argument("--force", action="store_true", help="Konvertera även tabeller vars källa inte har ändrats")
+    convert.add_argument("--dry-run", action="store_true", help="Visa bara vad som skulle konverteras")
+    convert.set_defaults(func=cmd_convert)
+
+    scan = subparsers.add_parser("scan", help="Kvalitetsskanna numeriska kolumner och spara regler för exporten")
+    _add_selection_arguments(scan)
+    _add_common_arguments(scan)
+    scan.set_defaults(func=cmd_scan)
+
+    advise = subparsers.add_parser("advise", help="Jämför Parquet-profilerna på ett urval av exporterade tabeller")
+    advise.add_argument("--tables", help="Kommaseparerade tabellnamn (senaste snapshot i PARQUET_DIR)")
+    advise.add_argument("--file", action="append", help="Parquet-fil att prova i stället (upprepningsbar)")
+    advise.add_argument("--profiles", help="Kommaseparerade profiler (standard: alla)")
+    advise.add_argument("--sample-rows", type=int, default=200_000, help="Rader i urvalet (standard: 200000)")
+    _add_common_arguments(advise)
+    advise.set_defaults(func=cmd_advise)
+
+    bench = subparsers.add_parser("bench", help="Mät exporten mot syntetiska tabeller i en lokal DuckDB (ingen Oracle)")
+    bench.add_argument("--modes", help=f"Kommaseparerade körlägen (standard: {','.join(MODES)})")
+    bench.add_argument("--variants", help="Kommaseparerade varianter: typed,text,pandas,wkb,hilbert (standard: alla)")
+    bench.add_argument("--tables", help="Delmängd av de syntetiska tabellerna (standard: alla)")
+    bench.add_argument("--scale", type=float, default=1.0, help="Faktor för antalet rader (standard: 1)")
+    bench.add_argument("--repeat", type=int, default=1, help="Körningar per fall, den snabbaste räknas (standard: 1)")
+    bench.add_argument("--bench-dir", default="./data/bench", help="Katalog för testdatabasen och exporterna")
+    bench.add_argument("--output", help="Resultatfil (standard: {bench-dir}/bench_{tidsstämpel}.json)")
+    bench.add_argument("--regenerate", action="store_true", help="Skapa testdatabasen på nytt")
+    bench.add_argument("--compare", help="Tidigare resultatfil att jämföra med (slutkod 1 vid regression)")
+    bench.add_argument("--threshold", type=float, default=0.10,
+                       help="Andel lägre rader/s som räknas som regression (standard: 0.10)")
+    bench.add_argument("--workers", type=int, help="Antal processer/trådar (standard: WORKERS eller min(cpu, 4))")
+    bench.add_argument("--concurrency", type=int, help="Samtidiga hämtningar i async-läget (standard: ASYNC_CONCURRENCY)")
+    bench.add_argument("--env", help="Sökväg till .env (standard: dlt_pipeline/giss/.env)")
+    bench.set_defaults(func=cmd_bench, parquet_dir=None, duckdb_path=None)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+# -------------------------------------------------------------
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,529 @@
+## detta är filen dlt_pipeline/giss/compaction.py
+
+"""
+Kompaktering, retention och en stabil "latest"-pekare för snapshots i PARQUET_DIR.
+
+Exporten skriver en ny snapshot per körning (se snapshots.py) och städar
+aldrig. Det här steget körs efter exporten (giss-export compact):
+
+    1. Kompaktering av senaste snapshot per tabell:
+         - deltan efter senaste fulla snapshot slås ihop med den till en ny
+           full snapshot med deltans tidsstämpel, om resultatet ryms i
+           target_file_bytes och tabellen har en primärnyckel i
+           katalogcachen; annars slås deltan ihop till en delta
+         - en uppdelad snapshot (katalog med part-filer) med små delar skrivs
+           om till en fil, eller till färre delar om tabellen är stor
+       Filerna skrivs om med row_group_rows rader per radgrupp (exporten ger
+       en radgrupp per hämtad batch). En delta innehåller ändrade rader i
+       sin helhet, så vid hopslagningen dedupliceras på primärnyckeln och
+       den nyaste raden behålls. Utan primärnyckel går det inte att veta
+       vilka rader som har ersatts, och då blir resultatet aldrig en full
+       snapshot.
+    2. Retention: de keep_snapshots senaste fulla snapshotsen (och alla
+       yngre än keep_days dagar) sparas, äldre snapshots och deltan som de
+       ersätter tas bort. Senaste fulla snapshot tas aldrig bort.
+    3. Katalog: {PARQUET_DIR}/_snapshots.json med alla snapshots per tabell
+       och "latest" = filerna som utgör tabellens aktuella innehåll. Deltan
+       som inte har slagits ihop räknas bara in för tabeller med primärnyckel.
+    4. Vyer: i DuckDB-filen (duckdb_path) skapas latest.<tabell> som läser
+       just de filerna, så att DuckDB/dbt aldrig behöver leta bland filerna.
+       Ingår deltan behåller vyn den nyaste raden per primärnyckel.
+
+Snapshots från en körning som inte är klar enligt körmanifestet rörs inte,
+eftersom --resume annars skulle leta efter filer som har skrivits om.
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime, timedelta
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from dlt_pipeline.giss.catalog import get_primary_key, read_catalog_cache
+from dlt_pipeline.giss.export import print_with_time
+from dlt_pipeline.giss.geometry import merge_geo_metadata
+from dlt_pipeline.giss.manifest import MANIFEST_FILE_NAME, load_manifest, save_manifest, temporary_path
+from dlt_pipeline.giss.snapshots import list_snapshots
+from dlt_pipeline.giss.streaming import normalize_column_name
+from dlt_pipeline.giss.writer import parquet_writer_options, table_profile
+
+# -------------------------------------------------------------
+# STANDARDVÄRDEN
+# -------------------------------------------------------------
+SNAPSHOT_CATALOG_FILE_NAME = "_snapshots.json"
+LATEST_SCHEMA = "latest"                            # DuckDB-schema för latest-vyerna
+DEFAULT_KEEP_SNAPSHOTS = 3                          # fulla snapshots per tabell
+DEFAULT_KEEP_DAYS = 0                               # 0 = bara antalet styr
+DEFAULT_ROW_GROUP_ROWS = 128 * 1024                 # rader per radgrupp i kompakterade filer
+DEFAULT_SMALL_FILE_BYTES = 64 * 1024 * 1024         # delar mindre än så slås ihop
+DEFAULT_TARGET_FILE_BYTES = 1024 * 1024 * 1024      # största fil som kompakteringen skriver
+
+_TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+_SNAPSHOT_COLUMN = "_snapshot_timestamp"            # hjälpkolumn i latest-vyer med deltan
+
+
+# -------------------------------------------------------------
+# HJÄLPFUNKTIONER
+# -------------------------------------------------------------
+def _snapshot_bytes(snapshot):
+    return sum(os.path.getsize(f) for f in snapshot["files"])
+
+
+def _protected_timestamps(parquet_dir):
+    # Körningar som inte är klara (kan återupptas med --resume) lämnas orörda
+    manifest = load_manifest(os.path.join(parquet_dir, MANIFEST_FILE_NAME))
+    if manifest and any(u.get("status") != "ok" for u in manifest.get("units", {}).values()):
+        return {manifest.get("run_id")}
+    return set()
+
+
+def _remove(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def _unified_schema(paths):
+    schemas = [pq.read_schema(p) for p in paths]
+    schema = pa.unify_schemas([s.remove_metadata() for s in schemas], promote_options="permissive")
+    geo = merge_geo_metadata([(s.metadata or {}).get(b"geo") for s in schemas])
+    return schema, geo
+
+
+def _conform(batch, schema):
+    # Delar kan sakna kolumner (helt tomma i Oracle) eller ha smalare typer
+    columns = []
+    for field in schema:
+        index = batch.schema.get_field_index(field.name)
+        if index < 0:
+            columns.append(pa.nulls(batch.num_rows, field.type))
+        else:
+            columns.append(batch.column(index).cast(field.type))
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def _newer_keys(paths, key, schema):
+    # För varje fil: nycklarna i filerna efter den (None för den sista)
+    newer, keys = [None] * len(paths), None
+    for i in range(len(paths) - 1, 0, -1):
+        table = pq.read_table(paths[i], columns=key)
+        table = pa.table([table.column(k).cast(schema.field(k).type) for k in key], names=key)
+        keys = table if keys is None else pa.concat_tables([keys, table])
+        newer[i - 1] = keys
+    return newer
+
+
+def _drop_superseded(batch, key, newer):
+    # Rader vars nyckel finns i en senare fil har ersatts av en nyare version
+    if newer is None or not newer.num_rows or not batch.num_rows:
+        return batch
+    row = pa.array(range(batch.num_rows), pa.int64())
+    rows = pa.table([*(batch.column(k) for k in key), row], names=[*key, "_row"])
+    kept = rows.join(newer, keys=key, join_type="left anti").column("_row")
+    return batch.filter(pc.is_in(row, value_set=kept.combine_chunks()))
+
+
+def merge_parquet_files(paths, output_path, row_group_rows=DEFAULT_ROW_GROUP_ROWS, profile=None, key=None):
+    """
+    Skriver ihop Parquet-filer till en fil med jämna radgrupper.
+
+    Schemana förenas (union by name) och GeoParquet-metadatan slås ihop.
+    Filen skrivs till en temporär fil och flyttas på plats när den är klar.
+    profile är en skrivprofil från writer.py (codec och kodningar).
+
+    Parametrar:
+        key (list[str] | None): Primärnyckel. Filerna ska då vara i tidsordning;
+                                en rad vars nyckel finns i en senare fil tas bort,
+                                så att den nyaste versionen av raden behålls.
+
+    Returnerar:
+        int: Antal rader.
+    """
+    schema, geo = _unified_schema(paths)
+    newer = _newer_keys(paths, key, schema) if key else [None] * len(paths)
+    tmp_path = temporary_path(output_path)
+    n_rows = 0
+    try:
+        options = parquet_writer_options(profile or {}, schema)
+        with pq.ParquetWriter(tmp_path, schema, **options) as writer:
+            # Hela radgrupper skrivs så fort de finns, resten väntar på nästa fil
+            pending, pending_rows = [], 0
+            for path, newer_keys in zip(paths, newer):
+                for batch in pq.ParquetFile(path).iter_batches(batch_size=row_group_rows):
+                    batch = _drop_superseded(_conform(batch, schema), key, newer_keys)
+                    pending.append(batch)
+                    pending_rows += batch.num_rows
+                    n_rows += batch.num_rows
+                    if pending_rows >= row_group_rows:
+                        table = pa.Table.from_batches(pending, schema)
+                        complete = pending_rows - pending_rows % row_group_rows
+                        writer.write_table(table.slice(0, complete), row_group_size=row_group_rows)
+                        pending = table.slice(complete).to_batches()
+                        pending_rows -= complete
+            if pending_rows or not n_rows:
+                writer.write_table(pa.Table.from_batches(pending, schema), row_group_size=row_group_rows)
+            if geo:
+                writer.add_key_value_metadata(geo)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return n_rows
+
+
+def _group_files(paths, target_bytes):
+    # Filerna i ordning, i grupper om högst target_bytes (minst en fil per grupp)
+    groups, current, current_bytes = [], [], 0
+    for path in paths:
+        size = os.path.getsize(path)
+        if current and current_bytes + size > target_bytes:
+            groups.append(current)
+            current, current_bytes = [], 0
+        current.append(path)
+        current_bytes += size
+    if current:
+        groups.append(current)
+    return groups
+
+
+# -------------------------------------------------------------
+# PLANERING
+# -------------------------------------------------------------
+def plan_compaction(
+    table_snapshots,
+    small_file_bytes=DEFAULT_SMALL_FILE_BYTES,
+    target_file_bytes=DEFAULT_TARGET_FILE_BYTES,
+    protected=(),
+    key=None,
+):
+    """
+    Kompakteringsåtgärd för en tabells senaste snapshot (None om inget behövs).
+
+    Parametrar:
+        table_snapshots (list[dict]): En tabells snapshots från list_snapshots.
+        protected (set[str]): Tidsstämplar (run_id) som inte får röras.
+        key (list[str] | None): Primärnyckel (utdatanamn). Utan nyckel slås
+                                deltan aldrig ihop med den fulla snapshoten.
+
+    Returnerar:
+        dict | None: {"table", "action", "sources", "files", "output_dir", "name", "groups", "key"}
+                     där action är "fold" (full + deltan), "deltas" eller "parts".
+    """
+    full = [s for s in table_snapshots if s["kind"] == "full"]
+    if not full or full[-1]["timestamp"] in protected:
+        return None
+    latest = full[-1]
+    deltas = [s for s in table_snapshots if s["kind"] == "delta" and s["timestamp"] > latest["timestamp"]]
+    if any(d["timestamp"] in protected for d in deltas):
+        return None
+
+    table, output_dir = latest["table"], os.path.dirname(latest["path"])
+    prefix = os.path.basename(latest["path"]).rsplit("_", 2)[0]  # tabellnamnet som exporten skrev det
+    if deltas:
+        sources = [latest, *deltas]
+        files = [f for s in sources for f in s["files"]]
+        if key and sum(_snapshot_bytes(s) for s in sources) <= target_file_bytes:
+            return {
+                "table": table, "action": "fold", "sources": sources, "files": files,
+                "output_dir": output_dir, "name": f"{prefix}_{deltas[-1]['timestamp']}", "groups": [files],
+                "key": list(key),
+            }
+        if len(deltas) > 1:
+            files = [f for d in deltas for f in d["files"]]
+            return {
+                "table": table, "action": "deltas", "sources": deltas, "files": files,
+                "output_dir": output_dir, "name": f"{prefix}_delta_{deltas[-1]['timestamp']}", "groups": [files],
+                "key": list(key or []),
+            }
+
+    files = latest["files"]
+    if len(files) > 1 and _snapshot_bytes(latest) / len(files) < small_file_bytes:
+        groups = _group_files(files, target_file_bytes)
+        if len(groups) < len(files):
+            return {
+                "table": table, "action": "parts", "sources": [latest], "files": files,
+                "output_dir": output_dir, "name": f"{prefix}_{latest['timestamp']}", "groups": groups,
+                "key": [],
+            }
+    return None
+
+
+def plan_retention(table_snapshots, keep_snapshots=DEFAULT_KEEP_SNAPSHOTS, keep_days=DEFAULT_KEEP_DAYS,
+                   protected=(), now=None):
+    """
+    Snapshots som kan tas bort för en tabell.
+
+    De keep_snapshots senaste fulla snapshotsen sparas, liksom alla som är
+    yngre än keep_days dagar. Deltan före den äldsta sparade fulla snapshoten
+    behövs inte längre.
+
+    Returnerar:
+        list[dict]: Snapshots att ta bort.
+    """
+    full = [s for s in table_snapshots if s["kind"] == "full"]
+    if not full:
+        return []
+    keep = {id(s) for s in full[-max(keep_snapshots, 1):]}
+    if keep_days:
+        cutoff = (now or datetime.now()) - timedelta(days=keep_days)
+        keep |= {id(s) for s in full if datetime.strptime(s["timestamp"], _TIMESTAMP_FORMAT) >= cutoff}
+    oldest_kept = min(s["timestamp"] for s in full if id(s) in keep)
+    return [
+        s for s in table_snapshots
+        if s["timestamp"] not in protected
+        and ((s["kind"] == "full" and id(s) not in keep) or (s["kind"] == "delta" and s["timestamp"] < oldest_kept))
+    ]
+
+
+# -------------------------------------------------------------
+# UTFÖRANDE
+# -------------------------------------------------------------
+def apply_compaction(action, row_group_rows=DEFAULT_ROW_GROUP_ROWS, profile=None):
+    """
+    Skriver om filerna enligt plan_compaction och tar bort det som ersatts.
+
+    Returnerar:
+        list[str]: De nya filerna.
+    """
+    path = os.path.join(action["output_dir"], action["name"])
+    if len(action["groups"]) == 1:
+        outputs = [path + ".parquet"]
+        merge_parquet_files(
+            action["groups"][0], outputs[0], row_group_rows=row_group_rows, profile=profile, key=action.get("key"),
+        )
+    else:
+        # Ny katalog bredvid den gamla (punktnamn syns inte i list_snapshots), sedan byts de
+        tmp_dir = os.path.join(action["output_dir"], f".{action['name']}.compact")
+        _remove(tmp_dir)
+        os.makedirs(tmp_dir)
+        for i, group in enumerate(action["groups"]):
+            part_path = os.path.join(tmp_dir, f"part-{i:05d}.parquet")
+            merge_parquet_files(group, part_path, row_group_rows=row_group_rows, profile=profile)
+        old_dir = os.path.join(action["output_dir"], f".{action['name']}.old")
+        os.replace(path, old_dir)
+        os.replace(tmp_dir, path)
+        _remove(old_dir)
+        outputs = [os.path.join(path, f"part-{i:05d}.parquet") for i in range(len(action["groups"]))]
+
+    # Den fulla snapshot som deltan lades på sparas för retention, det andra är nu inbakat
+    replaced = action["sources"][1:] if action["action"] == "fold" else action["sources"]
+    for snapshot in replaced:
+        if snapshot["path"] not in outputs and snapshot["path"] != path:
+            _remove(snapshot["path"])
+    return outputs
+
+
+# -------------------------------------------------------------
+# KATALOG OCH LATEST-VYER
+# -------------------------------------------------------------
+def primary_keys(catalog_cache):
+    """
+    Primärnycklarna ur katalogcachen med normaliserade kolumnnamn (som i
+    Parquet-filerna).
+
+    Returnerar:
+        dict: {tabell: [kolumn, ...]}, bara tabeller som har en primärnyckel.
+    """
+    catalog = read_catalog_cache(catalog_cache)
+    keys = {}
+    for table in catalog:
+        key = [normalize_column_name(c) for c in get_primary_key(catalog, table)]
+        if key:
+            keys[table.upper()] = key
+    return keys
+
+
+def build_snapshot_catalog(parquet_dir, snapshots=None, keys=None):
+    """
+    Katalog över alla snapshots per tabell, med "latest" = tabellens
+    aktuella innehåll.
+
+    För en tabell med primärnyckel i keys är latest senaste fulla snapshot
+    plus deltan efter den, och latest-vyn behåller den nyaste raden per
+    nyckel. Utan primärnyckel går det inte att veta vilka rader en delta
+    ersätter, så då är latest bara senaste fulla snapshot (deltan kommer
+    med först när compact har gjort en ny full snapshot av dem).
+
+    Parametrar:
+        keys (dict | None): {tabell: [kolumn, ...]} från primary_keys.
+
+    Returnerar:
+        dict: {"updated_at", "tables": {tabell: {"latest": {...}, "snapshots": [...]}}}
+              latest har timestamp, files, rows (rader i filerna, före
+              dedupliceringen på nyckeln), bytes, key och sources
+              ([{"timestamp", "files"}] per snapshot, äldst först).
+    """
+    snapshots = list_snapshots(parquet_dir) if snapshots is None else snapshots
+    keys = keys or {}
+    tables = {}
+    for table, table_snapshots in sorted(snapshots.items()):
+        entries = [
+            {
+                "timestamp": s["timestamp"],
+                "kind": s["kind"],
+                "files": [os.path.abspath(f) for f in s["files"]],
+                "rows": sum(pq.read_metadata(f).num_rows for f in s["files"]),
+                "bytes": _snapshot_bytes(s),
+            }
+            for s in table_snapshots
+        ]
+        full = [e for e in entries if e["kind"] == "full"]
+        if not full:
+            continue
+        key = keys.get(table, [])
+        current = [full[-1]]
+        if key:
+            current += [e for e in entries if e["kind"] == "delta" and e["timestamp"] > full[-1]["timestamp"]]
+        tables[table] = {
+            "latest": {
+                "timestamp": current[-1]["timestamp"],
+                "files": [f for e in current for f in e["files"]],
+                "rows": sum(e["rows"] for e in current),
+                "bytes": sum(e["bytes"] for e in current),
+                "key": key,
+                "sources": [{"timestamp": e["timestamp"], "files": e["files"]} for e in current],
+            },
+            "snapshots": entries,
+        }
+    return {"updated_at": datetime.now().strftime(_TIMESTAMP_FORMAT), "tables": tables}
+
+
+def save_snapshot_catalog(parquet_dir, catalog):
+    path = os.path.join(parquet_dir, SNAPSHOT_CATALOG_FILE_NAME)
+    save_manifest(path, catalog)
+    return path
+
+
+def load_snapshot_catalog(parquet_dir):
+    """Läser _snapshots.json (None om den saknas)."""
+    path = os.path.join(parquet_dir, SNAPSHOT_CATALOG_FILE_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _file_list(files):
+    return "[" + ", ".join("'" + f.replace("'", "''") + "'" for f in files) + "]"
+
+
+def latest_view_sql(latest):
+    """
+    SELECT-satsen för en latest-vy.
+
+    Består latest av en full snapshot plus deltan läses varje snapshot med
+    sin tidsstämpel, och bara den nyaste raden per primärnyckel behålls
+    (en delta innehåller ändrade rader i sin helhet).
+    """
+    sources = latest.get("sources") or [{"timestamp": latest["timestamp"], "files": latest["files"]}]
+    if len(sources) == 1 or not latest.get("key"):
+        return f"SELECT * FROM read_parquet({_file_list(latest['files'])}, union_by_name = true)"
+    union = " UNION ALL BY NAME ".join(
+        f"SELECT *, '{s['timestamp']}' AS {_SNAPSHOT_COLUMN} "
+        f"FROM read_parquet({_file_list(s['files'])}, union_by_name = true)"
+        for s in sources
+    )
+    key = ", ".join('"' + c.replace('"', '""') + '"' for c in latest["key"])
+    return (
+        f"SELECT * EXCLUDE ({_SNAPSHOT_COLUMN}) FROM ({union}) "
+        f"QUALIFY row_number() OVER (PARTITION BY {key} ORDER BY {_SNAPSHOT_COLUMN} DESC) = 1"
+    )
+
+
+def create_latest_views(duckdb_path, catalog):
+    """
+    Skapar (eller ersätter) vyn latest.<tabell> i DuckDB-filen för varje
+    tabell i katalogen. Vyer för tabeller som inte längre finns tas bort.
+    """
+    import duckdb
+
+    os.makedirs(os.path.dirname(duckdb_path) or ".", exist_ok=True)
+    con = duckdb.connect(duckdb_path)
+    try:
+        con.execute(f'CREATE SCHEMA IF NOT EXISTS "{LATEST_SCHEMA}"')
+        wanted = {table.lower() for table in catalog["tables"]}
+        existing = {
+            name for (name,) in con.execute(
+                "SELECT view_name FROM duckdb_views() WHERE schema_name = ? AND NOT internal", [LATEST_SCHEMA]
+            ).fetchall()
+        }
+        for name in sorted(existing - wanted):
+            con.execute(f'DROP VIEW "{LATEST_SCHEMA}"."{name}"')
+        for table, entry in sorted(catalog["tables"].items()):
+            con.execute(
+                f'CREATE OR REPLACE VIEW "{LATEST_SCHEMA}"."{table.lower()}" AS {latest_view_sql(entry["latest"])}'
+            )
+    finally:
+        con.close()
+
+
+# -------------------------------------------------------------
+# HUVUDFUNKTION
+# -------------------------------------------------------------
+def compact_snapshots(config, tables=None, dry_run=False, views=True):
+    """
+    Kompakterar, städar och uppdaterar katalogen och latest-vyerna.
+
+    Parametrar:
+        config (dict): Från config.load_config (parquet_dir, duckdb_path,
+                       catalog_cache, keep_snapshots, keep_days, row_group_rows,
+                       small_file_bytes, target_file_bytes).
+        tables (list[str] | None): Bara dessa tabeller (annars alla).
+        dry_run (bool): Skriv bara ut vad som skulle göras.
+        views (bool): Skapa latest-vyerna i config["duckdb_path"].
+
+    Returnerar:
+        dict: Katalogen (se build_snapshot_catalog).
+    """
+    parquet_dir = config["parquet_dir"]
+    protected = _protected_timestamps(parquet_dir)
+    wanted = {t.upper() for t in tables} if tables else None
+    # Primärnycklarna behövs för att slå ihop deltan med den fulla snapshoten
+    # och för att latest ska kunna ta med deltan som inte har slagits ihop
+    keys = primary_keys(config["catalog_cache"])
+
+    for table, table_snapshots in sorted(list_snapshots(parquet_dir).items()):
+        if wanted is not None and table not in wanted:
+            continue
+        action = plan_compaction(
+            table_snapshots,
+            small_file_bytes=config["small_file_bytes"],
+            target_file_bytes=config["target_file_bytes"],
+            protected=protected,
+            key=keys.get(table, []),
+        )
+        if action is not None:
+            print_with_time(
+                f"🗜️ {table}: {action['action']}, {len(action['files'])} filer → "
+                f"{len(action['groups'])} ({action['name']})"
+            )
+            if not dry_run:
+                apply_compaction(action, row_group_rows=config["row_group_rows"], profile=table_profile(config, table))
+
+    for table, table_snapshots in sorted(list_snapshots(parquet_dir).items()):
+        if wanted is not None and table not in wanted:
+            continue
+        for snapshot in plan_retention(
+            table_snapshots,
+            keep_snapshots=config["keep_snapshots"],
+            keep_days=config["keep_days"],
+            protected=protected,
+        ):
+            print_with_time(f"🧹 {table}: tar bort {snapshot['kind']} {snapshot['timestamp']}")
+            if not dry_run:
+                _remove(snapshot["path"])
+
+    catalog = build_snapshot_catalog(parquet_dir, keys=keys)
+    if dry_run:
+        return catalog
+    path = save_snapshot_catalog(parquet_dir, catalog)
+    print_with_time(f"📒 Snapshot-katalog: {path} ({len(catalog['tables'])} tabeller)")
+    if views:
+        create_latest_views(config["duckdb_path"], catalog)
+        print_with_time(f"🦆 Vyer {LATEST_SCHEMA}.<tabell> uppdaterade i {config['duckdb_path']}")
+    return catalog
@@ -0,0 +1,246 @@
+## detta är filen dlt_pipeline/giss/config.py
+
+"""
+Inställningar för GISS-exporten.
+
+Allt läses lat: ingenting händer vid import. load_config() läser .env
+(och WANTED_TABLES.csv först när tabellistan behövs) och returnerar en
+vanlig dict som kan skickas till worker-processer. get_config() ger
+processens aktuella inställningar (sätts av CLI:t eller worker-initialiseringen).
+
+.env-nycklar (alla valfria utom anslutningsuppgifterna):
+    HOST, PORT, SERVICE_NAME, USERNAME, PASSWORD, ORACLE_CLIENT_LIB_DIR
+    POOL_MIN, POOL_MAX, POOL_INCREMENT, STMT_CACHE_SIZE, PING_INTERVAL
+    PARQUET_DIR, STREAMING, BATCH_SIZE, ARRAYSIZE, PREFETCHROWS
+    NUMERIC_MODE (typed|text), GEOMETRY_MODE (wkt|wkb), LOB_INLINE_MAX_BYTES
+    PARTITION_MIN_ROWS, PARTITION_COUNT, WORKERS
+    INCREMENTAL, INCREMENTAL_STRATEGY, CATALOG_CACHE, DUCKDB_PATH
+    OWNER, WANTED_TABLES_CSV, LOG_FILE, RETRIES, RETRY_BACKOFF
+    EVENTS_PATH, METRICS_PATH, TRACE_PATH
+    ASYNC_CONCURRENCY, ASYNC_CPU_WORKERS
+    PIPELINE, PIPELINE_QUEUE_BATCHES, SPOOL_DIR, SPOOL_MEMORY_BYTES
+    GIS_DIR, GIS_FORMATS, GIS_TARGET_SRID, GIS_CHUNK_ROWS
+    DIFF, CHANGES_DIR
+"""
+
+import os
+
+# -------------------------------------------------------------
+# STANDARDVÄRDEN
+# -------------------------------------------------------------
+PACKAGE_DIR = os.path.dirname(__file__)
+DEFAULT_ENV_PATH = os.path.join(PACKAGE_DIR, ".env")
+DEFAULT_WANTED_TABLES_CSV = os.path.join(PACKAGE_DIR, "WANTED_TABLES.csv")
+DEFAULT_PARQUET_DIR = "./data/dlt_output/giss_all"
+DEFAULT_DUCKDB_PATH = "./data/giss.duckdb"
+DEFAULT_LOG_FILE = "oracle_export.log"
+DEFAULT_ORACLE_CLIENT_LIB_DIR = "/home/mate01/github/10gbrand/gdal_test/instantclient/instantclient_19_28"
+DEFAULT_MAX_WORKERS = 4
+
+# Körlägen och destinationer (se export.run_export)
+MODES = ("serial", "thread", "process", "partitioned", "async")
+DEFAULT_MODE = "partitioned"
+DESTINATIONS = ("parquet", "duckdb", "dlt")
+SPATIAL_SORTS = ("none", "hilbert", "zorder")  # se spatial.py
+
+# Kolumner som inte exporteras (ger ORA-22063 eller är ointressanta).
+# NR1, KEDJAAKTIV, HISTIMP och NVBID står kvar här tills kvalitetsrapporten
+# (giss-export scan, quality.py) har gett dem regeln "exclude" eller
+# "safe_text"; först då kan de tas bort ur listan.
+DEFAULT_EXCLUDE_COLUMNS = ["SE_ANNO_CAD_DATA", "FIGADVA", "FIGNETTO", "NR1", "KEDJAAKTIV", "HISTIMP", "NVBID"]
+
+_current = None
+
+
+# -------------------------------------------------------------
+# INLÄSNING
+# -------------------------------------------------------------
+def _flag(value, default=False):
+    if value is None or value == "":
+        return default
+    return str(value).lower() in ("1", "true", "yes")
+
+
+def _int(value, default=None):
+    return int(value) if value not in (None, "") else default
+
+
+def read_env(env_path=DEFAULT_ENV_PATH):
+    """
+    Läser .env-filen som en dict. Nycklar som saknas i filen tas från
+    miljövariablerna (os.environ).
+    """
+    from dotenv import dotenv_values
+
+    values = dotenv_values(env_path) if os.path.exists(env_path) else {}
+    return _EnvDict(values)
+
+
+class _EnvDict(dict):
+    # dict med fallback till os.environ för nycklar som saknas i .env
+    def get(self, key, default=None):
+        value = super().get(key)
+        if value is None:
+            value = os.environ.get(key, default)
+        return value
+
+
+def load_config(env_path=DEFAULT_ENV_PATH, **overrides):
+    """
+    Bygger exportinställningarna från .env. Värden i overrides (t.ex. från
+    CLI:t) går före .env; None i overrides ignoreras.
+
+    Returnerar:
+        dict: Inställningar som kan picklas till worker-processer.
+    """
+    # Standardvärdena ligger i respektive modul (som drar in pandas/pyarrow),
+    # därför importeras de först här och inte när CLI:t bara visar --help
+    from dlt_pipeline.giss.async_export import DEFAULT_ASYNC_CONCURRENCY, DEFAULT_ASYNC_CPU_WORKERS
+    from dlt_pipeline.giss.catalog import DEFAULT_CATALOG_CACHE
+    from dlt_pipeline.giss.compaction import (
+        DEFAULT_KEEP_DAYS,
+        DEFAULT_KEEP_SNAPSHOTS,
+        DEFAULT_ROW_GROUP_ROWS,
+        DEFAULT_SMALL_FILE_BYTES,
+        DEFAULT_TARGET_FILE_BYTES,
+    )
+    from dlt_pipeline.giss.connection import settings_from_config
+    from dlt_pipeline.giss.diff import CHANGES_DIR_NAME
+    from dlt_pipeline.giss.fetch import DEFAULT_LOB_INLINE_MAX_BYTES
+    from dlt_pipeline.giss.gis import DEFAULT_GIS_CHUNK_ROWS, GIS_DIR_NAME, parse_formats
+    from dlt_pipeline.giss.instrumentation import EVENTS_FILE_NAME
+    from dlt_pipeline.giss.manifest import DEFAULT_RETRIES, DEFAULT_RETRY_BACKOFF, MANIFEST_FILE_NAME
+    from dlt_pipeline.giss.partition import DEFAULT_PARTITION_MIN_ROWS
+    from dlt_pipeline.giss.quality import QUALITY_REPORT_FILE_NAME
+    from dlt_pipeline.giss.spatial import DEFAULT_SPATIAL_ROW_GROUP_ROWS, DEFAULT_SPATIAL_SORT
+    from dlt_pipeline.giss.spool import DEFAULT_PIPELINE_QUEUE_BATCHES, DEFAULT_SPOOL_MEMORY_BYTES, SPOOL_DIR_NAME
+    from dlt_pipeline.giss.state import DEFAULT_STRATEGY, STATE_FILE_NAME
+    from dlt_pipeline.giss.streaming import DEFAULT_ARRAYSIZE, DEFAULT_BATCH_SIZE
+    from dlt_pipeline.giss.writer import DEFAULT_WRITER_PROFILE, parse_table_profiles
+
+    env = read_env(env_path)
+    # Cache- och state-filerna följer med exportkatalogen
+    parquet_dir = overrides.pop("parquet_dir", None) or env.get("PARQUET_DIR") or DEFAULT_PARQUET_DIR
+    workers = _int(env.get("WORKERS"), min(os.cpu_count() or 1, DEFAULT_MAX_WORKERS))
+
+    config = {
+        "owner": env.get("OWNER") or "GISS",
+        "parquet_dir": parquet_dir,
+        "wanted_tables_csv": env.get("WANTED_TABLES_CSV") or DEFAULT_WANTED_TABLES_CSV,
+        "log_file": env.get("LOG_FILE") or DEFAULT_LOG_FILE,
+        "duckdb_path": env.get("DUCKDB_PATH") or DEFAULT_DUCKDB_PATH,
+        "workers": workers,
+        "exclude_columns": list(DEFAULT_EXCLUDE_COLUMNS),
+        # Hämtning
+        "streaming": _flag(env.get("STREAMING"), True),
+        "batch_size": _int(env.get("BATCH_SIZE"), DEFAULT_BATCH_SIZE),
+        "arraysize": _int(env.get("ARRAYSIZE"), DEFAULT_ARRAYSIZE),
+        "prefetchrows": _int(env.get("PREFETCHROWS")),
+        "numeric_mode": (env.get("NUMERIC_MODE") or "typed").lower(),
+        "geometry_mode": (env.get("GEOMETRY_MODE") or "wkt").lower(),
+        "lob_inline_max_bytes": _int(env.get("LOB_INLINE_MAX_BYTES"), DEFAULT_LOB_INLINE_MAX_BYTES),
+        # Hämtning, konvertering och skrivning i egna trådar med spool till disk (spool.py)
+        "pipeline": _flag(env.get("PIPELINE")),
+        "pipeline_queue_batches": _int(env.get("PIPELINE_QUEUE_BATCHES"), DEFAULT_PIPELINE_QUEUE_BATCHES),
+        "spool_dir": env.get("SPOOL_DIR") or os.path.join(parquet_dir, SPOOL_DIR_NAME),
+        "spool_memory_bytes": _int(env.get("SPOOL_MEMORY_BYTES"), DEFAULT_SPOOL_MEMORY_BYTES),
+        # Kvalitetsrapport med regler per kolumn (giss-export scan)
+        "quality_report_path": os.path.join(parquet_dir, QUALITY_REPORT_FILE_NAME),
+        # Parquet-skrivning (profiler i writer.py)
+        "parquet_profile": (env.get("PARQUET_PROFILE") or DEFAULT_WRITER_PROFILE).lower(),
+        "parquet_table_profiles": parse_table_profiles(env.get("PARQUET_TABLE_PROFILES")),
+        # Spatial klustring av geometritabeller (none | hilbert | zorder)
+        "spatial_sort": (env.get("SPATIAL_SORT") or DEFAULT_SPATIAL_SORT).lower(),
+        "spatial_row_group_rows": _int(env.get("SPATIAL_ROW_GROUP_ROWS"), DEFAULT_SPATIAL_ROW_GROUP_ROWS),
+        # Uppdelning och schemaläggning
+        "partition_min_rows": _int(env.get("PARTITION_MIN_ROWS"), DEFAULT_PARTITION_MIN_ROWS),
+        "partition_count": _int(env.get("PARTITION_COUNT"), 0),
+        # Async-läget: samtidiga hämtningar och trådar för konvertering/skrivning
+        "async_concurrency": _int(env.get("ASYNC_CONCURRENCY"), DEFAULT_ASYNC_CONCURRENCY),
+        "async_cpu_workers": _int(
+            env.get("ASYNC_CPU_WORKERS"), min(os.cpu_count() or 1, DEFAULT_ASYNC_CPU_WORKERS)
+        ),
+        "size_cache": os.path.join(parquet_dir, "_table_sizes.json"),
+        "catalog_cache": env.get("CATALOG_CACHE") or DEFAULT_CATALOG_CACHE,
+        # Inkrementell export
+        "incremental": _flag(env.get("INCREMENTAL")),
+        "incremental_strategy": (env.get("INCREMENTAL_STRATEGY") or DEFAULT_STRATEGY).lower(),
+        "state_path": os.path.join(parquet_dir, STATE_FILE_NAME),
+        # Manifest och omförsök
+        "manifest_path": os.path.join(parquet_dir, MANIFEST_FILE_NAME),
+        "retries": _int(env.get("RETRIES"), DEFAULT_RETRIES),
+        "retry_backoff": float(env.get("RETRY_BACKOFF") or DEFAULT_RETRY_BACKOFF),
+        # Kompaktering och retention
+        "keep_snapshots": _int(env.get("KEEP_SNAPSHOTS"), DEFAULT_KEEP_SNAPSHOTS),
+        "keep_days": _int(env.get("KEEP_DAYS"), DEFAULT_KEEP_DAYS),
+        "row_group_rows": _int(env.get("ROW_GROUP_ROWS"), DEFAULT_ROW_GROUP_ROWS),
+        "small_file_bytes": _int(env.get("SMALL_FILE_BYTES"), DEFAULT_SMALL_FILE_BYTES),
+        "target_file_bytes": _int(env.get("TARGET_FILE_BYTES"), DEFAULT_TARGET_FILE_BYTES),
+        # Radvisa ändringar mot föregående snapshot efter exporten (giss-export diff)
+        "diff": _flag(env.get("DIFF")),
+        "changes_dir": env.get("CHANGES_DIR") or os.path.join(parquet_dir, CHANGES_DIR_NAME),
+        # GIS-konvertering med GDAL (giss-export convert): format, mål-SRID och delar om N rader
+        "gis_dir": env.get("GIS_DIR") or os.path.join(parquet_dir, GIS_DIR_NAME),
+        "gis_formats": parse_formats(env.get("GIS_FORMATS")),
+        "gis_target_srid": _int(env.get("GIS_TARGET_SRID")),
+        "gis_chunk_rows": _int(env.get("GIS_CHUNK_ROWS"), DEFAULT_GIS_CHUNK_ROWS),
+        # Mätning per steg: händelselogg (JSON-rader), Prometheus-textfil och OTLP/JSON-trace
+        "events_path": env.get("EVENTS_PATH") or os.path.join(parquet_dir, EVENTS_FILE_NAME),
+        "metrics_path": env.get("METRICS_PATH"),
+        "trace_path": env.get("TRACE_PATH"),
+        # Anslutning
+        "connection": settings_from_config(
+            {"ORACLE_CLIENT_LIB_DIR": DEFAULT_ORACLE_CLIENT_LIB_DIR, **_env_subset(env)}
+        ),
+    }
+    config.update({k: v for k, v in overrides.items() if v is not None})
+    return config
+
+
+def _env_subset(env):
+    keys = (
+        "HOST", "PORT", "SERVICE_NAME", "USERNAME", "PASSWORD", "ORACLE_CLIENT_LIB_DIR",
+        "POOL_MIN", "POOL_MAX", "POOL_INCREMENT", "STMT_CACHE_SIZE", "PING_INTERVAL",
+    )
+    return {k: env.get(k) for k in keys if env.get(k) is not None}
+
+
+def get_config():
+    """Processens aktuella inställningar (läses från standard-.env första gången)."""
+    global _current
+    if _current is None:
+        _current = load_config()
+    return _current
+
+
+def set_config(config):
+    """Sätter processens inställningar (CLI:t och worker-initialiseringen)."""
+    global _current
+    _current = config
+
+
+# -------------------------------------------------------------
+# TABELLISTA
+# -------------------------------------------------------------
+def read_wanted_tables(csv_path=DEFAULT_WANTED_TABLES_CSV):
+    """
+    Läser WANTED_TABLES.csv (kolumnen TABLE och valfritt INCREMENTAL/INCREMENTAL_COLUMN).
+
+    Returnerar:
+        tuple: (tabeller i versaler, {tabell: (strategi, kolumn)} för inkrementell export)
+    """
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+    wanted_tables = [t.strip().upper() for t in df["TABLE"].tolist() if t.strip()]
+
+    incremental_config = {}
+    for _, row in df.iterrows():
+        strategy = row.get("INCREMENTAL")
+        column = row.get("INCREMENTAL_COLUMN")
+        if isinstance(strategy, str) and strategy.strip():
+            incremental_config[row["TABLE"].strip().upper()] = (
+                strategy.strip().lower(),
+                column.strip().upper() if isinstance(column, str) and column.strip() else None,
+            )
+    return wanted_tables, incremental_config
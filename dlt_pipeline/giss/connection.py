@@ -0,0 +1,255 @@
+## detta är filen dlt_pipeline/giss/connection.py
+
+"""
+En Oracle-sessionspool per process.
+
+Varje worker i multiprocessing-poolen skapar en oracledb-sessionspool en
+gång (via init_worker som Pool-initializer) och återanvänder den för alla
+tabeller den exporterar. Connect/autentisering sker alltså bara vid
+uppstart, inte per tabell.
+
+    - acquire_connection(): lånar en session och lämnar tillbaka den till
+      samma pool; en död session tas bort ur poolen (drop) i stället för
+      att lämnas tillbaka
+    - get_engine(): SQLAlchemy-engine ovanpå samma pool (för pd.read_sql),
+      med samma kontroll av döda sessioner (acquire_healthy)
+    - create_async_session_pool(): asynkron pool för async-läget (async_export.py),
+      som ägs av händelseloopen och inte av processen
+
+Inget kopplas upp vid import – poolen skapas först när init_worker anropas.
+
+Har inställningarna nyckeln "stand_in" (en DuckDB-fil, se standin.py) ger
+poolen och enginen i stället sessioner mot den lokala ersättaren, t.ex. för
+benchmarken.
+"""
+
+import os
+from contextlib import contextmanager
+
+# -------------------------------------------------------------
+# STANDARDVÄRDEN
+# -------------------------------------------------------------
+DEFAULT_POOL_MIN = 1
+DEFAULT_POOL_MAX = 2
+DEFAULT_POOL_INCREMENT = 1
+DEFAULT_STMT_CACHE_SIZE = 50
+DEFAULT_PING_INTERVAL = 60  # sekunder innan en ledig session pingas vid utlåning
+
+# Processglobalt tillstånd (ett per worker-process)
+_settings = None
+_pool = None
+_engine = None
+_client_initialized = False
+
+
+# -------------------------------------------------------------
+# INSTÄLLNINGAR
+# -------------------------------------------------------------
+def settings_from_config(config):
+    """
+    Bygger anslutningsinställningar från en .env-dict (dotenv_values).
+
+    Returnerar:
+        dict: user, password, dsn, min, max, increment, stmtcachesize, ping_interval, lib_dir
+    """
+    return {
+        "user": config.get("USERNAME"),
+        "password": config.get("PASSWORD"),
+        "dsn": f"{config.get('HOST')}:{config.get('PORT')}/{config.get('SERVICE_NAME')}",
+        "min": int(config.get("POOL_MIN") or DEFAULT_POOL_MIN),
+        "max": int(config.get("POOL_MAX") or DEFAULT_POOL_MAX),
+        "increment": int(config.get("POOL_INCREMENT") or DEFAULT_POOL_INCREMENT),
+        "stmtcachesize": int(config.get("STMT_CACHE_SIZE") or DEFAULT_STMT_CACHE_SIZE),
+        "ping_interval": int(config.get("PING_INTERVAL") or DEFAULT_PING_INTERVAL),
+        # Thick mode (Instant Client) om katalogen finns, annars thin mode
+        "lib_dir": config.get("ORACLE_CLIENT_LIB_DIR"),
+    }
+
+
+# -------------------------------------------------------------
+# POOL
+# -------------------------------------------------------------
+def _init_client(settings):
+    global _client_initialized
+    import oracledb
+
+    lib_dir = settings.get("lib_dir")
+    if not _client_initialized and lib_dir and os.path.isdir(lib_dir):
+        oracledb.init_oracle_client(lib_dir=lib_dir)
+    _client_initialized = True
+
+
+def create_session_pool(settings):
+    """Skapar en oracledb-sessionspool enligt inställningarna."""
+    if settings.get("stand_in"):
+        from dlt_pipeline.giss.standin import StandInPool
+
+        return StandInPool(settings["stand_in"])
+
+    import oracledb
+
+    _init_client(settings)
+    return oracledb.create_pool(
+        user=settings["user"],
+        password=settings["password"],
+        dsn=settings["dsn"],
+        min=settings["min"],
+        max=settings["max"],
+        increment=settings["increment"],
+        stmtcachesize=settings["stmtcachesize"],
+        ping_interval=settings["ping_interval"],
+    )
+
+
+def create_async_session_pool(settings, max_sessions=None):
+    """
+    Skapar en asynkron oracledb-sessionspool (oracledb.create_pool_async).
+
+    Asyncio stöds bara i thin mode, därför initieras aldrig Instant Client här.
+
+    Parametrar:
+        max_sessions (int | None): Största antal sessioner (standard: settings["max"]).
+    """
+    if settings.get("stand_in"):
+        from dlt_pipeline.giss.standin import AsyncStandInPool
+
+        return AsyncStandInPool(settings["stand_in"])
+
+    import oracledb
+
+    return oracledb.create_pool_async(
+        user=settings["user"],
+        password=settings["password"],
+        dsn=settings["dsn"],
+        min=settings["min"],
+        max=max_sessions or settings["max"],
+        increment=settings["increment"],
+        stmtcachesize=settings["stmtcachesize"],
+        ping_interval=settings["ping_interval"],
+    )
+
+
+def init_worker(settings):
+    """
+    Pool-initializer: skapar processens sessionspool.
+
+    En pool som ärvts från föräldraprocessen vid fork stängs inte (den delar
+    nätverksanslutningar med föräldern) utan ersätts bara.
+    """
+    global _settings, _pool, _engine
+    _settings = settings
+    _pool = create_session_pool(settings)
+    _engine = None
+
+
+def close_pool():
+    """Stänger processens pool (t.ex. i huvudprocessen innan workers forkas)."""
+    global _pool, _engine
+    if _engine is not None:
+        _engine.dispose()
+    if _pool is not None:
+        try:
+            _pool.close(force=True)
+        except Exception:
+            pass
+    _pool = None
+    _engine = None
+
+
+def _rebuild_pool():
+    global _pool, _engine
+    close_pool()
+    _pool = create_session_pool(_settings)
+    _engine = None
+
+
+def get_pool():
+    """Processens sessionspool (kräver att init_worker har anropats)."""
+    if _pool is None:
+        if _settings is None:
+            raise RuntimeError("Ingen Oracle-pool: init_worker(settings) måste anropas först")
+        _rebuild_pool()
+    return _pool
+
+
+# -------------------------------------------------------------
+# ANSLUTNINGAR
+# -------------------------------------------------------------
+def _is_healthy(conn):
+    # Lokal kontroll utan rundresa till databasen (oracledb Connection.is_healthy)
+    try:
+        return conn.is_healthy()
+    except Exception:
+        return False
+
+
+def _drop_connection(pool, conn):
+    try:
+        pool.drop(conn)
+    except Exception:
+        pass
+
+
+def acquire_healthy(pool):
+    """
+    Lånar en session ur poolen. En session som är död (t.ex. efter ett
+    nätverksavbrott) tas bort ur poolen med drop() och en ny lånas ur samma
+    pool. Används av acquire_connection och av get_engine.
+    """
+    conn = pool.acquire()
+    if not _is_healthy(conn):
+        _drop_connection(pool, conn)
+        conn = pool.acquire()
+    return conn
+
+
+@contextmanager
+def acquire_connection():
+    """
+    Lånar en session ur poolen och lämnar tillbaka den till samma pool efteråt.
+
+    Poolen pingar själv sessioner som har legat lediga längre än
+    ping_interval. En session som ändå är död byts ut (acquire_healthy),
+    och en session som dör under användningen tas bort i stället för att
+    lämnas tillbaka. Poolen byggs aldrig om här, eftersom andra trådar kan
+    ha sessioner utlånade från den.
+    """
+    pool = get_pool()
+    conn = acquire_healthy(pool)
+
+    healthy = True
+    try:
+        yield conn
+    except Exception:
+        healthy = _is_healthy(conn)
+        raise
+    finally:
+        if healthy:
+            try:
+                pool.release(conn)
+            except Exception:
+                pass
+        else:
+            _drop_connection(pool, conn)
+
+
+def get_engine():
+    """
+    SQLAlchemy-engine som lånar sessioner ur processens pool, för pd.read_sql.
+    Skapas en gång per process.
+    """
+    global _engine
+    if _engine is None and _settings is not None and _settings.get("stand_in"):
+        _engine = get_pool().engine()
+    if _engine is None:
+        from sqlalchemy import create_engine
+        from sqlalchemy.pool import NullPool
+
+        # NullPool: SQLAlchemy stänger = lämnar tillbaka sessionen till oracledb-poolen.
+        # Sessionerna kontrolleras som i acquire_connection.
+        _engine = create_engine(
+            "oracle+oracledb://",
+            creator=lambda: acquire_healthy(get_pool()),
+            poolclass=NullPool,
+        )
+    return _engine
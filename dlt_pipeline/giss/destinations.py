@@ -0,0 +1,242 @@
+## detta är filen dlt_pipeline/giss/destinations.py
+
+"""
+Destinationer efter Parquet-exporten.
+
+    - parquet: filerna i PARQUET_DIR är slutresultatet (inget görs här)
+    - duckdb:  de nyss skrivna filerna läses in i en DuckDB-databas, en tabell per GISS-tabell
+    - dlt:     tabellerna strömmas som Arrow-batchar till en dlt-pipeline (destination duckdb)
+
+duckdb och dlt importeras först när destinationen används.
+"""
+
+import logging
+import os
+
+import pyarrow as pa
+
+from dlt_pipeline.giss.catalog import get_columns, load_catalog
+from dlt_pipeline.giss.connection import acquire_connection, get_engine
+from dlt_pipeline.giss.export import init_shared_pool, make_table_handler, print_with_time
+from dlt_pipeline.giss.fetch import build_column_types
+from dlt_pipeline.giss.quality import quality_rules
+from dlt_pipeline.giss.queries import build_select_with_wkt_safe
+from dlt_pipeline.giss.streaming import iter_query_batches, normalize_column_name
+
+
+# -------------------------------------------------------------
+# DUCKDB
+# -------------------------------------------------------------
+def _sql_list(paths):
+    return "[" + ", ".join("'" + p.replace("'", "''") + "'" for p in paths) + "]"
+
+
+def load_parquet_into_duckdb(duckdb_path, units):
+    """
+    Läser in exporterade Parquet-filer i DuckDB.
+
+    Fulla exporter ersätter tabellen (alla delar läses i en CREATE OR REPLACE),
+    delta-exporter läggs till med INSERT. Tabeller där någon del misslyckades
+    lämnas orörda.
+
+    Parametrar:
+        duckdb_path (str): DuckDB-filen.
+        units (list[dict]): Enheter ur körmanifestet (manifest.py) med
+                            table, kind, output_path och status.
+    """
+    import duckdb
+
+    full, delta, failed = {}, {}, set()
+    for unit in units:
+        if unit["status"] != "ok":
+            failed.add(unit["table"])
+            continue
+        target = delta if unit["kind"] == "delta" else full
+        target.setdefault(unit["table"], []).append(unit["output_path"])
+
+    os.makedirs(os.path.dirname(duckdb_path) or ".", exist_ok=True)
+    con = duckdb.connect(duckdb_path)
+    try:
+        for table, paths in sorted(full.items()):
+            if table in failed:
+                continue
+            con.execute(
+                f'CREATE OR REPLACE TABLE "{table.lower()}" AS '
+                f"SELECT * FROM read_parquet({_sql_list(sorted(paths))}, union_by_name = true)"
+            )
+            print_with_time(f"🦆 {table}: inläst i {duckdb_path}")
+        for table, paths in sorted(delta.items()):
+            if table in failed:
+                continue
+            exists = con.execute(
+                "SELECT count(*) FROM information_schema.tables WHERE table_name = ?", [table.lower()]
+            ).fetchone()[0]
+            source = f"SELECT * FROM read_parquet({_sql_list(sorted(paths))}, union_by_name = true)"
+            if exists:
+                con.execute(f'INSERT INTO "{table.lower()}" BY NAME {source}')
+            else:
+                con.execute(f'CREATE TABLE "{table.lower()}" AS {source}')
+            print_with_time(f"🦆 {table}: delta tillagd i {duckdb_path}")
+    finally:
+        con.close()
+
+
+# -------------------------------------------------------------
+# DLT
+# -------------------------------------------------------------
+def dlt_column_hints(columns, exclude_columns=None, convert_numbers_to_text=False, geometry_mode="wkt",
+                     cast_rules=None):
+    """
+    dlt-kolumnhints från katalogcachen, så att dlt inte behöver härleda
+    schemat från datat.
+
+    Returnerar:
+        dict[str, dict]: kolumnnamn -> {"data_type", "nullable"[, "precision", "scale"]}
+    """
+    excluded = set(exclude_columns or []) | {"SE_ANNO_CAD_DATA"}
+    selected = [c for c in columns if c["name"] not in excluded]
+    # Tal som rensas på klienten (fetch.clean_number) kan bli NULL trots NOT NULL i Oracle
+    nullable = {
+        normalize_column_name(c["name"]): c.get("nullable", True)
+        for c in selected if c["data_type"] not in ("SDO_GEOMETRY", "NUMBER", "FLOAT", "DECIMAL")
+    }
+    column_types = build_column_types(
+        selected, convert_numbers_to_text=convert_numbers_to_text, geometry_mode=geometry_mode, cast_rules=cast_rules
+    )
+
+    hints = {}
+    for name, arrow_type in column_types.items():
+        hint = {"nullable": nullable.get(name, True)}
+        if pa.types.is_integer(arrow_type):
+            hint["data_type"] = "bigint"
+        elif pa.types.is_decimal(arrow_type):
+            hint.update(data_type="decimal", precision=arrow_type.precision, scale=arrow_type.scale)
+        elif pa.types.is_floating(arrow_type):
+            hint["data_type"] = "double"
+        elif pa.types.is_binary(arrow_type):
+            hint["data_type"] = "binary"
+        elif pa.types.is_timestamp(arrow_type):
+            hint["data_type"] = "timestamp"
+        else:
+            hint["data_type"] = "text"
+        hints[name] = hint
+    return hints
+
+
+def _table_resource(config, table, columns):
+    """dlt-resurs som strömmar en tabell som pyarrow RecordBatches."""
+    import dlt
+
+    convert_numbers_to_text = config["numeric_mode"] == "text"
+    geometry_mode = config["geometry_mode"]
+    cast_rules = quality_rules(config, table)
+    exclude_columns = config["exclude_columns"] + [c for c, rule in cast_rules.items() if rule == "exclude"]
+    column_types = build_column_types(
+        columns, convert_numbers_to_text=convert_numbers_to_text, geometry_mode=geometry_mode, cast_rules=cast_rules
+    )
+
+    @dlt.resource(
+        name=table.lower(),
+        write_disposition="replace",
+        columns=dlt_column_hints(columns, exclude_columns, convert_numbers_to_text, geometry_mode, cast_rules),
+        parallelized=True,
+    )
+    def table_batches():
+        logging.info(f"Startar export av tabell: {table}")
+        print_with_time(f"🚀 Start export: {table}")
+        n_rows = 0
+        with acquire_connection() as conn:
+            try:
+                sql = build_select_with_wkt_safe(
+                    table,
+                    conn,
+                    convert_numbers_to_text=convert_numbers_to_text,
+                    exclude_columns=exclude_columns,
+                    columns=columns,
+                    typed_numbers=not convert_numbers_to_text,
+                    geometry_mode=geometry_mode,
+                    owner=config["owner"],
+                    cast_rules=cast_rules,
+                )
+                handler = make_table_handler(
+                    conn, table, columns, column_types, config, exclude_columns=exclude_columns,
+                    typed_numbers=not convert_numbers_to_text, geometry_mode=geometry_mode,
+                )
+                batches = iter_query_batches(
+                    conn,
+                    sql,
+                    batch_size=config["batch_size"],
+                    arraysize=config["arraysize"],
+                    prefetchrows=config["prefetchrows"],
+                    column_types=column_types,
+                    output_type_handler=handler,
+                )
+                first = next(batches, None)
+            except Exception as e:
+                # Fel innan första batchen: tabellen hoppas över, övriga laddas ändå
+                logging.error(f"Fel vid export av tabell {table}: {e}")
+                print_with_time(f"⚠️  Fel vid export av tabell {table}: {e}")
+                return
+
+            # Fel mitt i en tabell avbryter körningen, annars skulle en halv tabell ersätta den gamla
+            if first is not None:
+                n_rows += first.num_rows
+                yield first
+            for batch in batches:
+                n_rows += batch.num_rows
+                yield batch
+
+        logging.info(f"Export av tabell {table} lyckades med {n_rows} rader.")
+        print_with_time(f"✅ {table}: {n_rows} rader exporterade")
+
+    return table_batches
+
+
+def oracle_giss_source(config, catalog, tables):
+    """En dlt-källa med en resurs per tabell."""
+    import dlt
+
+    @dlt.source(name="oracle_giss")
+    def source():
+        return [_table_resource(config, table, get_columns(catalog, table)) for table in tables]
+
+    return source()
+
+
+def run_dlt_pipeline(config, tables):
+    """
+    Laddar tabellerna med dlt (destination duckdb i DUCKDB_PATH, dataset
+    oracle_giss) i en enda pipeline.run. Tabellerna strömmas som pyarrow RecordBatches och
+    skrivs som Parquet-filer av dlt, så normalize behöver varken härleda
+    schemat eller gå igenom rader som Python-objekt.
+
+    Extract, normalize och load körs med WORKERS parallella workers
+    (kan skrivas över med dlt:s egna EXTRACT__WORKERS m.fl.).
+    """
+    import dlt
+
+    workers = str(config["workers"])
+    os.environ.setdefault("EXTRACT__WORKERS", workers)
+    os.environ.setdefault("NORMALIZE__WORKERS", workers)
+    os.environ.setdefault("LOAD__WORKERS", workers)
+    # Flera filer per tabell så att normalize/load kan arbeta parallellt även inom en stor tabell
+    os.environ.setdefault("DATA_WRITER__FILE_MAX_ITEMS", str(config["batch_size"] * 4))
+
+    # Extract-trådarna delar processens sessionspool
+    init_shared_pool(config, config["workers"])
+    engine = get_engine()
+    # Kolumnmetadata för hela schemat i en fråga, cachad på disk per LAST_DDL_TIME
+    catalog = load_catalog(engine, config["catalog_cache"], owner=config["owner"])
+
+    # dlt pipeline konfiguration (samma DuckDB-fil som parquet-läget och planen visar)
+    os.makedirs(os.path.dirname(config["duckdb_path"]) or ".", exist_ok=True)
+    pipeline = dlt.pipeline(
+        pipeline_name="oracle_giss_export",
+        destination=dlt.destinations.duckdb(credentials=config["duckdb_path"]),
+        dataset_name="oracle_giss",
+    )
+    load_info = pipeline.run(oracle_giss_source(config, catalog, tables), loader_file_format="parquet")
+    logging.info(f"dlt: {load_info}")
+
+    print_with_time("🎉 Export från Oracle GISS schema klar.")
+    return load_info
@@ -0,0 +1,266 @@
+## detta är filen dlt_pipeline/giss/diff.py
+
+"""
+Radvisa ändringar mellan två på varandra följande fulla snapshots (giss-export diff).
+
+Många tabeller ändras knappt mellan körningarna, men en full snapshot
+innehåller ändå alla rader. Här jämförs tabellens senaste fulla snapshot
+med den föregående i PARQUET_DIR, utan att fråga Oracle:
+
+    1. En hash per rad (DuckDB:s hash() över alla gemensamma kolumner
+       utom bbox-kolumnen från klustringen) beräknas för båda snapshotsen.
+    2. Hasharna paras ihop på tabellens primärnyckel ur katalogcachen
+       (ALL_CONSTRAINTS/ALL_CONS_COLUMNS): nyckel bara i den nya = insert,
+       bara i den gamla = delete, olika hash = update.
+    3. Ändringarna skrivs till {CHANGES_DIR}/{tabell}_{tidsstämpel}.parquet
+       med kolumnen _change ("insert" | "update" | "delete"). Insert och
+       update har hela den nya raden, delete bara nyckelkolumnerna.
+
+Saknar tabellen primärnyckel används radens hash som nyckel: det blir då
+bara insert och delete (med hela den gamla raden), och dubbletter räknas
+som en rad.
+
+Antalen per tabell sparas i {CHANGES_DIR}/_changes.json:
+
+    {"GAVD": {"previous": "20251001_120000", "current": "20251002_120000",
+              "key": ["id"], "inserted": 12, "updated": 3, "deleted": 1,
+              "unchanged": 104217, "schema_changed": False,
+              "changeset": ".../_changes/gavd_20251002_120000.parquet"}}
+
+En oförändrad tabell får changeset None, så nedströms laddningar kan
+hoppa över den. Par som redan har jämförts hoppas över. Deltafiler från
+inkrementell export är redan ändringar och ingår inte. Har kolumnerna
+ändrats mellan snapshotsen jämförs bara de gemensamma
+(schema_changed=True); nedströms bör då läsa om hela tabellen.
+
+Jämförelsen körs efter exporten med DIFF=true (eller --diff), och ska
+köras före giss-export compact om retention tar bort föregående snapshot.
+"""
+
+import os
+
+import pyarrow.parquet as pq
+
+from dlt_pipeline.giss.catalog import get_primary_key, read_catalog_cache
+from dlt_pipeline.giss.export import print_with_time
+from dlt_pipeline.giss.manifest import load_manifest, save_manifest, temporary_path
+from dlt_pipeline.giss.snapshots import list_snapshots
+from dlt_pipeline.giss.spatial import BBOX_TYPE
+from dlt_pipeline.giss.streaming import normalize_column_name
+
+# -------------------------------------------------------------
+# STANDARDVÄRDEN
+# -------------------------------------------------------------
+CHANGES_DIR_NAME = "_changes"
+CHANGES_SUMMARY_FILE_NAME = "_changes.json"
+CHANGE_COLUMN = "_change"
+
+
+# -------------------------------------------------------------
+# HJÄLPFUNKTIONER
+# -------------------------------------------------------------
+def _sql_string(value):
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _sql_list(paths):
+    return "[" + ", ".join(_sql_string(p) for p in paths) + "]"
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _hash_sql(columns, alias=None):
+    # DuckDB:s hash() tar flera argument; utan kolumner att jämföra blir alla rader lika
+    if not columns:
+        return "0"
+    prefix = f"{alias}." if alias else ""
+    return "hash(" + ", ".join(prefix + _quote(c) for c in columns) + ")"
+
+
+def _columns(files):
+    # Kolumnnamn -> typ för snapshotens filer (som union_by_name i DuckDB)
+    columns = {}
+    for path in files:
+        for field in pq.read_schema(path):
+            columns.setdefault(field.name, field.type)
+    return columns
+
+
+def consecutive_full_snapshots(table_snapshots):
+    """
+    De två senaste fulla snapshotsen för en tabell.
+
+    Returnerar:
+        tuple[dict, dict] | None: (föregående, senaste) ur snapshots.list_snapshots, eller None.
+    """
+    full = [s for s in table_snapshots if s["kind"] == "full"]
+    return (full[-2], full[-1]) if len(full) >= 2 else None
+
+
+# -------------------------------------------------------------
+# JÄMFÖRELSE
+# -------------------------------------------------------------
+def diff_snapshots(old_files, new_files, key, output_path, con=None):
+    """
+    Jämför två snapshots rad för rad och skriver ändringarna.
+
+    Parametrar:
+        old_files, new_files (list[str]): Parquet-filerna för föregående och senaste snapshot.
+        key (list[str]): Nyckelkolumner (utdatanamn); tom lista = radens hash som nyckel.
+        output_path (str): Changeset-filen. Skrivs bara om det finns ändringar.
+        con: DuckDB-anslutning (annars en ny i minnet).
+
+    Returnerar:
+        dict: {"inserted", "updated", "deleted", "unchanged", "schema_changed", "changeset"}
+    """
+    import duckdb
+
+    old_columns, new_columns = _columns(old_files), _columns(new_files)
+    missing = [k for k in key if k not in old_columns or k not in new_columns]
+    if missing:
+        raise ValueError(f"Nyckelkolumnerna {missing} finns inte i båda snapshotsen")
+    hashed = [
+        name for name, arrow_type in new_columns.items()
+        if name in old_columns and arrow_type != BBOX_TYPE
+    ]
+    row_hash = _hash_sql(hashed)
+    schema_changed = old_columns != new_columns
+
+    own = con is None
+    con = con or duckdb.connect()
+    try:
+        for name, files in (("old_rows", old_files), ("new_rows", new_files)):
+            con.execute(
+                f"CREATE OR REPLACE TEMP VIEW {name} AS "
+                f"SELECT * FROM read_parquet({_sql_list(files)}, union_by_name = true)"
+            )
+        if key:
+            hashes = f"SELECT {', '.join(_quote(k) for k in key)}, {row_hash} AS _row_hash FROM"
+            join = " AND ".join(f"o.{_quote(k)} = n.{_quote(k)}" for k in key)
+            changed_keys = "".join(f"COALESCE(n.{_quote(k)}, o.{_quote(k)}) AS {_quote(k)}, " for k in key)
+        else:
+            hashes = f"SELECT DISTINCT {row_hash} AS _row_hash FROM"
+            join = "o._row_hash = n._row_hash"
+            changed_keys = ""
+        for name, rows in (("old_hashes", "old_rows"), ("new_hashes", "new_rows")):
+            con.execute(f"CREATE OR REPLACE TEMP TABLE {name} AS {hashes} {rows}")
+
+        con.execute(
+            f"""
+            CREATE OR REPLACE TEMP TABLE changes AS
+            SELECT CASE WHEN o._row_hash IS NULL THEN 'insert'
+                        WHEN n._row_hash IS NULL THEN 'delete'
+                        ELSE 'update' END AS {CHANGE_COLUMN},
+                   {changed_keys}COALESCE(n._row_hash, o._row_hash) AS _row_hash
+            FROM old_hashes o FULL OUTER JOIN new_hashes n ON {join}
+            WHERE o._row_hash IS DISTINCT FROM n._row_hash
+            """
+        )
+        counts = dict(con.execute(f"SELECT {CHANGE_COLUMN}, count(*) FROM changes GROUP BY ALL").fetchall())
+        n_new = con.execute("SELECT count(*) FROM new_rows").fetchone()[0]
+        result = {
+            "inserted": counts.get("insert", 0),
+            "updated": counts.get("update", 0),
+            "deleted": counts.get("delete", 0),
+            "schema_changed": schema_changed,
+            "changeset": None,
+        }
+        result["unchanged"] = n_new - result["inserted"] - result["updated"]
+        if not counts:
+            return result
+
+        # Insert/update med hela den nya raden, delete med nyckeln (eller hela raden utan nyckel)
+        if key:
+            match = " AND ".join(f"c.{_quote(k)} = r.{_quote(k)}" for k in key)
+            deleted = f"SELECT c.{CHANGE_COLUMN}, {', '.join(f'c.{_quote(k)}' for k in key)} FROM changes c"
+        else:
+            match = f"c._row_hash = {_hash_sql(hashed, 'r')}"
+            deleted = f"SELECT c.{CHANGE_COLUMN}, r.* FROM changes c JOIN old_rows r ON {match}"
+        sql = f"""
+            SELECT c.{CHANGE_COLUMN}, r.* FROM changes c JOIN new_rows r ON {match}
+            WHERE c.{CHANGE_COLUMN} IN ('insert', 'update')
+            UNION ALL BY NAME
+            {deleted} WHERE c.{CHANGE_COLUMN} = 'delete'
+        """
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        tmp_path = temporary_path(output_path)
+        try:
+            con.execute(f"COPY ({sql}) TO {_sql_string(tmp_path)} (FORMAT parquet, COMPRESSION zstd)")
+            os.replace(tmp_path, output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        result["changeset"] = output_path
+        return result
+    finally:
+        if own:
+            con.close()
+
+
+# -------------------------------------------------------------
+# HUVUDFUNKTION
+# -------------------------------------------------------------
+def run_snapshot_diff(config, tables=None, force=False):
+    """
+    Jämför senaste och föregående fulla snapshot för varje tabell och skriver changesets.
+
+    Parametrar:
+        config (dict): Från config.load_config (parquet_dir, changes_dir, catalog_cache).
+        tables (list[str] | None): Bara dessa tabeller (annars alla med två fulla snapshots).
+        force (bool): Jämför även par som redan har jämförts.
+
+    Returnerar:
+        dict: {tabell: sammanfattning} för de tabeller som jämfördes nu.
+    """
+    import duckdb
+
+    changes_dir = config["changes_dir"]
+    summary_path = os.path.join(changes_dir, CHANGES_SUMMARY_FILE_NAME)
+    summary = load_manifest(summary_path) or {}
+    catalog = read_catalog_cache(config["catalog_cache"])
+    wanted = {t.upper() for t in tables} if tables else None
+
+    results = {}
+    con = duckdb.connect()
+    try:
+        for table, table_snapshots in sorted(list_snapshots(config["parquet_dir"]).items()):
+            if wanted is not None and table not in wanted:
+                continue
+            pair = consecutive_full_snapshots(table_snapshots)
+            if pair is None:
+                continue
+            previous, current = pair
+            done = summary.get(table, {})
+            if not force and (done.get("previous"), done.get("current")) == (previous["timestamp"], current["timestamp"]):
+                continue
+
+            key = [normalize_column_name(c) for c in get_primary_key(catalog, table)]
+            output_path = os.path.join(changes_dir, f"{table.lower()}_{current['timestamp']}.parquet")
+            try:
+                counts = diff_snapshots(previous["files"], current["files"], key, output_path, con=con)
+            except Exception as e:
+                print_with_time(f"⚠️ {table}: kunde inte jämföras ({e})")
+                continue
+            results[table] = summary[table] = {
+                "previous": previous["timestamp"],
+                "current": current["timestamp"],
+                "key": key,
+                **counts,
+            }
+            if counts["changeset"] is None:
+                print_with_time(f"🟰 {table}: oförändrad sedan {previous['timestamp']}")
+            else:
+                print_with_time(
+                    f"🔀 {table}: +{counts['inserted']} ~{counts['updated']} -{counts['deleted']} "
+                    f"({counts['unchanged']} oförändrade){' – schemat har ändrats' if counts['schema_changed'] else ''}"
+                )
+    finally:
+        con.close()
+
+    if results:
+        os.makedirs(changes_dir, exist_ok=True)
+        save_manifest(summary_path, summary)
+    print_with_time(f"📋 Radjämförelse klar för {len(results)} tabeller ({summary_path})")
+    return results
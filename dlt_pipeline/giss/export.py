@@ -0,0 +1,847 @@
+## detta är filen dlt_pipeline/giss/export.py
+
+"""
+Export av GISS-tabeller från Oracle till Parquet.
+
+    - export_table(): en tabell (eller en del av den) till en Parquet-fil
+    - plan_export(): katalog, storlekar, inkrementell sondering och arbetsenheter
+    - run_export(): kör planen i valt läge och laddar eventuellt vidare till DuckDB/dlt
+
+Lägen:
+    serial       en arbetsenhet i taget i den egna processen
+    thread       trådpool, workers delar processens sessionspool
+    process      processpool, en hel tabell per arbetsenhet
+    partitioned  processpool där stora tabeller delas upp i flera delar (standard)
+    async        asyncio i en process: upp till ASYNC_CONCURRENCY samtidiga hämtningar
+                 och en liten trådpool för konvertering/skrivning (async_export.py)
+
+Inställningarna kommer från config.get_config(); varje worker-process får
+dem via init_export_worker.
+"""
+
+import logging
+import os
+import random
+import time
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+
+from dlt_pipeline.giss import config as giss_config
+from dlt_pipeline.giss.config import DEFAULT_MODE, MODES
+from dlt_pipeline.giss.catalog import fetch_columns, get_columns, load_catalog
+from dlt_pipeline.giss.connection import acquire_connection, close_pool, get_engine, init_worker
+from dlt_pipeline.giss.fetch import (
+    build_column_types,
+    geometry_srids,
+    inline_lob_columns,
+    make_output_type_handler,
+    probe_lob_lengths,
+)
+from dlt_pipeline.giss.geometry import GeoParquetCollector
+from dlt_pipeline.giss.instrumentation import (
+    EventLog,
+    StageTimer,
+    emit_unit,
+    peak_rss_bytes,
+    print_summary,
+    summarize_metrics,
+    write_prometheus,
+    write_trace,
+)
+from dlt_pipeline.giss.manifest import (
+    file_checksum,
+    is_transient_error,
+    load_manifest,
+    new_manifest,
+    record_result,
+    save_manifest,
+    table_is_complete,
+    temporary_path,
+    units_to_resume,
+)
+from dlt_pipeline.giss.partition import build_work_items, work_item_label
+from dlt_pipeline.giss.quality import quality_rules
+from dlt_pipeline.giss.queries import build_select_with_wkt_safe, get_table_names
+from dlt_pipeline.giss.scheduler import (
+    estimate_cost,
+    estimate_rates,
+    get_table_sizes_cached,
+    order_largest_first,
+    run_largest_first,
+    run_serial,
+    save_size_cache,
+    summarize_schedule,
+    update_sizes_with_timings,
+)
+from dlt_pipeline.giss.spatial import cluster_parquet_file
+from dlt_pipeline.giss.spool import stream_query_to_parquet_staged
+from dlt_pipeline.giss.state import (
+    delta_refusal,
+    is_unchanged,
+    load_state,
+    make_delta_item,
+    probe_table,
+    save_state,
+)
+from dlt_pipeline.giss.streaming import stream_query_to_parquet
+from dlt_pipeline.giss.writer import parquet_writer_options, table_profile, writer_options_for
+
+# Kolumntyper som inte kan ingå i en checksumma (ORA_HASH)
+_NON_HASHABLE_TYPES = ("SDO_GEOMETRY", "CLOB", "NCLOB", "BLOB", "LONG", "LONG RAW")
+
+
+# -------------------------------------------------------------
+# LOGGNING & HJÄLPFUNKTIONER
+# -------------------------------------------------------------
+def print_with_time(message: str):
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{timestamp}] {message}")
+
+
+def convert_lob_columns(df, lob_columns=None):
+    """
+    Läser LOB-objekt till str/bytes. Används bara av den icke-strömmande vägen;
+    den strömmande vägen hämtar LOB:ar direkt via output type handlern.
+
+    Bara lob_columns (om angivna) eller object-kolumner vars första icke-NULL-värde
+    är en LOB läses – övriga kolumner typkontrolleras inte rad för rad.
+    """
+    if lob_columns is None:
+        lob_columns = []
+        for col in df.select_dtypes(include="object").columns:
+            first = df[col].first_valid_index()
+            if first is not None and hasattr(df[col].at[first], "read"):
+                lob_columns.append(col)
+    for col in lob_columns:
+        df[col] = df[col].map(lambda x: x.read() if x is not None else None)
+    return df
+
+
+def init_export_worker(config):
+    """Pool-initializer: sätter processens inställningar och skapar sessionspoolen."""
+    giss_config.set_config(config)
+    init_worker(config["connection"])
+
+
+def init_shared_pool(config, n_threads):
+    """
+    Skapar om processens sessionspool så att den rymmer en session per tråd
+    (trådläget och dlt:s parallella extract delar samma pool).
+
+    Anroparens config ändras inte; den större poolen gäller bara den här processen.
+
+    Returnerar:
+        dict: Kopian av config med den nya poolstorleken.
+    """
+    connection = {**config["connection"], "max": max(config["connection"]["max"], n_threads)}
+    config = {**config, "connection": connection}
+    close_pool()
+    init_export_worker(config)
+    return config
+
+
+def lob_probe_columns(columns, exclude_columns=None):
+    """Kolumnerna som ingår i SELECT-satsen (de vars LOB-längd sonderas)."""
+    excluded = set(exclude_columns or []) | {"SE_ANNO_CAD_DATA"}
+    return [c for c in columns if c["name"] not in excluded]
+
+
+def make_table_handler(conn, table, columns, column_types, config, exclude_columns=None,
+                       typed_numbers=True, geometry_mode="wkt", lob_lengths=None):
+    """
+    Output type handler för en tabell: typade tal och LOB:ar som hämtas direkt.
+
+    LOB:ar hämtas som str/bytes; bara kolumner vars största värde ligger över
+    LOB_INLINE_MAX_BYTES läses via locator (en MAX(DBMS_LOB.GETLENGTH)-fråga,
+    om inte lob_lengths redan har hämtats, t.ex. asynkront).
+
+    Returnerar:
+        callable | None: Sätts som cursor.outputtypehandler (None om inget behövs).
+    """
+    selected = lob_probe_columns(columns, exclude_columns)
+    if lob_lengths is None:
+        lob_lengths = probe_lob_lengths(conn, table, selected, owner=config["owner"])
+    inline_lobs = inline_lob_columns(
+        selected,
+        geometry_mode=geometry_mode,
+        lob_lengths=lob_lengths,
+        max_bytes=config["lob_inline_max_bytes"],
+    )
+    if not (typed_numbers or inline_lobs):
+        return None
+    return make_output_type_handler(column_types, typed_numbers=typed_numbers, inline_lob_columns=inline_lobs)
+
+
+# -------------------------------------------------------------
+# EXPORTFUNKTION FÖR EN TABELL (multiprocess-trådsäker)
+# -------------------------------------------------------------
+def export_table(
+    table,
+    convert_numbers_to_text=None,
+    exclude_columns=None,
+    streaming=None,
+    batch_size=None,
+    arraysize=None,
+    where=None,
+    output_path=None,
+    label=None,
+    columns=None,
+    geometry_mode=None,
+    timer=None,
+):
+    """
+    Exporterar en tabell från Oracle till Parquet, med robust hantering av problematiska kolumner.
+
+    Parametrar:
+        table (str): Namn på tabellen som ska exporteras.
+        convert_numbers_to_text (bool | None): Om True konverteras numeriska kolumner till text för att
+                                               undvika ORA-22063. Om False och streaming används hämtas
+                                               talen typade och korrupta värden rensas på klienten i stället.
+                                               None betyder NUMERIC_MODE från inställningarna.
+        exclude_columns (list[str] | None): Kolumner som ska ignoreras vid export.
+                                            None betyder standardlistan från inställningarna.
+        streaming (bool | None): Om True hämtas och skrivs raderna i batchar (begränsat minne).
+                                 None betyder värdet från .env (STREAMING, standard True).
+        batch_size (int | None): Rader per batch/row group vid strömmande export.
+        arraysize (int | None): Rader per nätverksrundresa vid strömmande export.
+        where (str | None): WHERE-villkor för att bara exportera en del av tabellen (partition).
+        output_path (str | None): Parquet-fil att skriva till. None ger {tabell}_{tidsstämpel}.parquet i PARQUET_DIR.
+        label (str | None): Namn i loggen, t.ex. 'TDOK[2/4]'. Standard är tabellnamnet.
+        columns (list[dict] | None): Kolumner från katalogcachen. Om None hämtas de från Oracle.
+        geometry_mode (str | None): "wkt" eller "wkb" (GeoParquet, kräver streaming).
+                                    None betyder värdet från .env (GEOMETRY_MODE).
+        timer (StageTimer | None): Tar emot tiden per steg (se instrumentation.py).
+
+    Returnerar:
+        tuple: (label, status, info)
+               status = "ok" eller "error"
+               info = antal rader eller felmeddelande
+    """
+    config = giss_config.get_config()
+    streaming = config["streaming"] if streaming is None else streaming
+    batch_size = batch_size or config["batch_size"]
+    arraysize = arraysize or config["arraysize"]
+    label = label or table
+    timer = timer or StageTimer()
+
+    job = None
+    try:
+        # Processens engine/pool återanvänds för alla tabeller (se connection.init_worker)
+        engine = get_engine()
+
+        print_with_time(f"🚀 Start export: {label}")
+        logging.info(f"Start export: {label}")
+
+        if columns is None:
+            with timer.stage("catalog"):
+                columns = fetch_columns(engine, owner=config["owner"], tables=[table]).get(table, [])
+        job = prepare_table_export(
+            config, table, columns, engine,
+            convert_numbers_to_text=convert_numbers_to_text,
+            exclude_columns=exclude_columns,
+            streaming=streaming,
+            where=where,
+            output_path=output_path,
+            geometry_mode=geometry_mode,
+        )
+        tmp_path, profile = job["tmp_path"], job["profile"]
+
+        if streaming:
+            connect_start, connect_started = time.perf_counter(), time.time()
+            with acquire_connection() as conn:
+                timer.add("connect", time.perf_counter() - connect_start, start=connect_started)
+                with timer.stage("lob_probe"):
+                    handler = make_table_handler(
+                        conn, table, columns, job["column_types"], config, exclude_columns=job["exclude_columns"],
+                        typed_numbers=job["typed_numbers"], geometry_mode=job["geometry_mode"],
+                    )
+                stream_options = {}
+                stream = stream_query_to_parquet
+                if config["pipeline"]:
+                    # Hämtning, konvertering och skrivning överlappar (spool.py)
+                    stream = stream_query_to_parquet_staged
+                    stream_options = {
+                        "queue_batches": config["pipeline_queue_batches"],
+                        "spool_dir": os.path.join(config["spool_dir"], os.path.basename(tmp_path)),
+                        "spool_memory_bytes": config["spool_memory_bytes"],
+                    }
+                n_rows = stream(
+                    conn,
+                    job["sql"],
+                    tmp_path,
+                    batch_size=batch_size,
+                    arraysize=arraysize,
+                    prefetchrows=config["prefetchrows"],
+                    column_types=job["column_types"],
+                    output_type_handler=handler,
+                    observers=job["observers"],
+                    writer_options=writer_options_for(profile),
+                    row_group_rows=profile.get("row_group_rows"),
+                    timer=timer,
+                    **stream_options,
+                )
+        else:
+            # pandas-vägen: hämtning och konvertering sker i samma anrop
+            with timer.stage("convert"):
+                df = pd.read_sql(job["sql"], con=engine)
+            n_rows = len(df)
+            with timer.stage("lob_read", rows=n_rows):
+                df = convert_lob_columns(df)
+            with timer.stage("write", rows=n_rows):
+                options = parquet_writer_options(profile, pa.Schema.from_pandas(df, preserve_index=False))
+                df.to_parquet(tmp_path, index=False, row_group_size=profile.get("row_group_rows"), **options)
+
+        finish_table_export(config, job, label, n_rows, timer)
+        return (label, "ok", n_rows)
+
+    except Exception as e:
+        return fail_table_export(job, label, e)
+
+
+def prepare_table_export(config, table, columns, engine, convert_numbers_to_text=None, exclude_columns=None,
+                         streaming=True, where=None, output_path=None, geometry_mode=None):
+    """
+    Allt som behövs innan hämtningen börjar: SELECT-sats, kolumntyper,
+    GeoParquet-observatör, skrivprofil och sökvägar (också för async-läget).
+
+    Returnerar:
+        dict: {"sql", "columns", "exclude_columns", "typed_numbers", "geometry_mode",
+               "column_types", "observers", "profile", "parquet_path", "tmp_path"}
+    """
+    if convert_numbers_to_text is None:
+        convert_numbers_to_text = config["numeric_mode"] == "text"
+    if exclude_columns is None:
+        exclude_columns = config["exclude_columns"]
+    geometry_mode = geometry_mode or config["geometry_mode"]
+    if not streaming:
+        # WKB/GeoParquet skrivs bara av den strömmande vägen
+        geometry_mode = "wkt"
+    # Typade tal kräver strömmande hämtning med output type handler
+    typed_numbers = streaming and not convert_numbers_to_text
+    # Regler från kvalitetsrapporten (giss-export scan): oläsbara kolumner hoppas över
+    cast_rules = quality_rules(config, table)
+    exclude_columns = list(exclude_columns) + [c for c, rule in cast_rules.items() if rule == "exclude"]
+
+    sql = build_select_with_wkt_safe(
+        table,
+        engine,
+        convert_numbers_to_text=convert_numbers_to_text,
+        exclude_columns=exclude_columns,
+        columns=columns,
+        typed_numbers=typed_numbers,
+        geometry_mode=geometry_mode,
+        owner=config["owner"],
+        cast_rules=cast_rules,
+    )
+
+    if where:
+        sql = f"{sql} WHERE {where}"
+
+    if output_path is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_path = os.path.join(config["parquet_dir"], f"{table.lower()}_{timestamp}.parquet")
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    observers = []
+    if geometry_mode == "wkb":
+        observers.append(GeoParquetCollector(geometry_srids(columns, geometry_mode)))
+    return {
+        "sql": sql,
+        "columns": columns,
+        "exclude_columns": exclude_columns,
+        "typed_numbers": typed_numbers,
+        "geometry_mode": geometry_mode,
+        "column_types": build_column_types(
+            columns, convert_numbers_to_text=not typed_numbers, geometry_mode=geometry_mode, cast_rules=cast_rules
+        ),
+        "observers": observers,
+        # Codec, row groups och kodningar (PARQUET_PROFILE / PARQUET_TABLE_PROFILES)
+        "profile": table_profile(config, table),
+        "parquet_path": output_path,
+        # Skrivs till en temporär fil som byter namn först när den är komplett
+        "tmp_path": temporary_path(output_path),
+    }
+
+
+def finish_table_export(config, job, label, n_rows, timer):
+    """Spatial klustring och namnbyte av den färdiga temporära filen."""
+    tmp_path, parquet_path = job["tmp_path"], job["parquet_path"]
+    # Spatial klustring: bbox-kolumn, sortering längs kurvan och små radgrupper
+    if config["spatial_sort"] != "none" and geometry_srids(job["columns"], job["geometry_mode"]):
+        with timer.stage("cluster", rows=n_rows):
+            clustered = cluster_parquet_file(
+                tmp_path, sort=config["spatial_sort"], row_group_rows=config["spatial_row_group_rows"],
+                profile=job["profile"],
+            )
+        if clustered:
+            print_with_time(
+                f"🗺️ {label}: sorterad ({config['spatial_sort']}) på {clustered['geometry']}, "
+                f"{clustered['row_groups']} radgrupper"
+            )
+    os.replace(tmp_path, parquet_path)
+
+    print_with_time(f"✅ {label}: {n_rows} rader hämtade")
+    logging.info(f"Export av {label} lyckades ({n_rows} rader).")
+    print_with_time(f"💾 {label}: sparad till {parquet_path}")
+
+
+def fail_table_export(job, label, error):
+    """Loggar felet, tar bort den halvskrivna filen och ger (label, "error", meddelande)."""
+    logging.error(f"Fel vid export av {label}: {error}")
+    print_with_time(f"⚠️ Fel vid export av {label}: {error}")
+    if job is not None and os.path.exists(job["tmp_path"]):
+        os.remove(job["tmp_path"])
+    return (label, "error", str(error))
+
+
+def export_work_item(item, convert_numbers_to_text=None, exclude_columns=None):
+    """
+    Exporterar en arbetsenhet från partition.build_work_items (hel tabell eller en del av den).
+
+    Transienta fel (manifest.is_transient_error) görs om upp till RETRIES gånger
+    med exponentiell backoff (RETRY_BACKOFF, 2*RETRY_BACKOFF, ... plus slumpad spridning
+    så att workers som föll samtidigt inte försöker igen i takt).
+
+    Returnerar:
+        tuple: (label, status, info, details) – som export_table plus
+               details = {"attempts": int, "checksum": str | None, "bytes": int | None,
+               "metrics": StageTimer.as_dict() för sista försöket, "rss_bytes": processens största RSS}.
+    """
+    config = giss_config.get_config()
+    attempt = 0
+    while True:
+        attempt += 1
+        timer = StageTimer()
+        label, status, info = export_table(
+            item["table"],
+            convert_numbers_to_text=convert_numbers_to_text,
+            exclude_columns=exclude_columns,
+            where=item["where"],
+            output_path=item["output_path"],
+            label=work_item_label(item),
+            columns=item.get("columns"),
+            timer=timer,
+        )
+        delay = retry_delay(config, label, status, info, attempt)
+        if delay is None:
+            break
+        time.sleep(delay)
+
+    return (label, status, info, unit_details(item, status, attempt, timer))
+
+
+def retry_delay(config, label, status, info, attempt):
+    """Väntetid före nästa försök, eller None om enheten är klar (lyckad, permanent fel eller slut på försök)."""
+    if status == "ok" or attempt > config["retries"] or not is_transient_error(info):
+        return None
+    delay = config["retry_backoff"] * 2 ** (attempt - 1) * random.uniform(1.0, 1.5)
+    logging.warning(f"Transient fel för {label}, försök {attempt + 1} om {delay:.0f}s: {info}")
+    print_with_time(f"🔁 {label}: transient fel, nytt försök om {delay:.0f}s")
+    return delay
+
+
+def unit_details(item, status, attempt, timer):
+    """details för en klar arbetsenhet (se export_work_item)."""
+    ok = status == "ok"
+    return {
+        "attempts": attempt,
+        "checksum": file_checksum(item["output_path"]) if ok else None,
+        "bytes": os.path.getsize(item["output_path"]) if ok else None,
+        "metrics": timer.as_dict(),
+        "rss_bytes": peak_rss_bytes(),
+    }
+
+
+# -------------------------------------------------------------
+# PLANERING
+# -------------------------------------------------------------
+def select_tables(engine, config, tables=None, all_tables=False):
+    """
+    Väljer vilka tabeller som ska exporteras.
+
+    Parametrar:
+        tables (list[str] | None): Uttryckligen angivna tabeller (t.ex. --tables).
+        all_tables (bool): Alla tabeller i schemat.
+        Annars används WANTED_TABLES.csv.
+
+    Returnerar:
+        tuple: (tabeller som finns i schemat, {tabell: (strategi, kolumn)} från CSV:n)
+    """
+    print_with_time("📡 Hämtar tabellista från Oracle...")
+    existing = get_table_names(engine, owner=config["owner"])
+    print_with_time(f"Totalt {len(existing)} tabeller hittade i {config['owner']}-schema.")
+
+    incremental_config = {}
+    if tables:
+        wanted = [t.strip().upper() for t in tables if t.strip()]
+    elif all_tables:
+        wanted = existing
+    else:
+        wanted, incremental_config = giss_config.read_wanted_tables(config["wanted_tables_csv"])
+        print("💡 Filtrerade tabeller från CSV:", wanted)
+
+    missing = sorted(set(wanted) - set(existing))
+    if missing:
+        print_with_time(f"⚠️ Finns inte i schemat, hoppas över: {missing}")
+
+    # Filtrera mot de tabeller som ska exporteras
+    filtered_tables = [t for t in existing if t in wanted]
+    print_with_time(f"💡 Filtrerade tabeller: {filtered_tables}")
+    return filtered_tables, incremental_config
+
+
+def plan_export(engine, config, tables, incremental_config=None, partitioned=True, timer=None):
+    """
+    Bygger exportplanen: laddar katalogen och storlekarna, sonderar tabellerna
+    i inkrementellt läge och skapar arbetsenheterna.
+
+    Parametrar:
+        timer (StageTimer | None): Tar emot tiden för catalog, sizes, probe och work_items.
+
+    Returnerar:
+        dict: {"work_items", "sizes", "marks", "state", "skipped", "timestamp"}
+    """
+    incremental_config = incremental_config or {}
+    owner = config["owner"]
+    timer = timer or StageTimer()
+
+    # Kolumnmetadata för hela schemat i en fråga (bara ändrade tabeller hämtas om)
+    with timer.stage("catalog"):
+        catalog = load_catalog(engine, config["catalog_cache"], owner=owner)
+    print_with_time(f"📚 Katalog laddad för {len(catalog)} tabeller.")
+
+    # Storlekar från ALL_TABLES/USER_SEGMENTS (+ tider från förra körningen)
+    os.makedirs(config["parquet_dir"], exist_ok=True)
+    with timer.stage("sizes"):
+        sizes = get_table_sizes_cached(engine, config["size_cache"], owner=owner)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    # Inkrementellt läge: jämför varje tabells märke med förra lyckade körningen
+    state = load_state(config["state_path"]) if config["incremental"] else {}
+    marks = {}
+    skipped = []
+    full_tables = tables
+    delta_items = []
+    if config["incremental"]:
+        full_tables = []
+        for table in tables:
+            strategy, column = incremental_config.get(table, (config["incremental_strategy"], None))
+            try:
+                checksum_columns = [
+                    c for c in get_columns(catalog, table) if c["data_type"] not in _NON_HASHABLE_TYPES
+                ]
+                with timer.stage("probe"):
+                    current = probe_table(
+                        engine, table, strategy=strategy, column=column,
+                        columns=checksum_columns or None, owner=owner,
+                    )
+            except Exception as e:
+                print_with_time(f"⚠️ Kunde inte sondera {table}, gör full export: {e}")
+                logging.warning(f"Kunde inte sondera {table}, gör full export: {e}")
+                full_tables.append(table)
+                continue
+
+            marks[table] = current
+            previous = state.get(table)
+            if is_unchanged(previous, current):
+                print_with_time(f"⏭️ {table}: oförändrad sedan förra exporten, hoppas över")
+                skipped.append(table)
+                continue
+            reason = delta_refusal(previous, current)
+            if reason is None:
+                delta_items.append(make_delta_item(table, previous, current, config["parquet_dir"], timestamp))
+                continue
+            # Med en stigande kolumn väntas en delta; säg till när det blir en full export ändå
+            if current["strategy"] == "column":
+                print_with_time(f"⚠️ {table}: full export i stället för delta – {reason}")
+            logging.info(f"{table}: full export – {reason}")
+            full_tables.append(table)
+        print_with_time(
+            f"🔁 Inkrementellt: {len(full_tables)} fulla, {len(delta_items)} delta, "
+            f"{len(skipped)} oförändrade"
+        )
+
+    # Stora tabeller delas upp i flera arbetsenheter så att alla processer hålls sysselsatta
+    n_parts = (config["partition_count"] or config["workers"]) if partitioned else 1
+    with timer.stage("work_items"):
+        work_items = build_work_items(
+            engine,
+            full_tables,
+            config["parquet_dir"],
+            timestamp,
+            n_parts=n_parts,
+            min_rows=config["partition_min_rows"],
+            row_estimates={t: info.get("num_rows", 0) for t, info in sizes.items()},
+            owner=owner,
+        ) + delta_items
+
+    # Workers läser kolumnerna från arbetsenheten i stället för att fråga katalogen
+    for item in work_items:
+        item["columns"] = get_columns(catalog, item["table"]) or None
+    n_split = len({item["table"] for item in work_items if item["part"] is not None})
+    print_with_time(f"🧩 {len(work_items)} arbetsenheter ({n_split} tabeller uppdelade).")
+
+    return {
+        "work_items": work_items,
+        "sizes": sizes,
+        "marks": marks,
+        "state": state,
+        "skipped": skipped,
+        "timestamp": timestamp,
+    }
+
+
+def plan_resume(engine, config, manifest):
+    """
+    Exportplan för --resume: bara de enheter i manifestet som inte är klara
+    (misslyckade, aldrig avslutade eller med saknad/ändrad fil), med samma
+    sökvägar och villkor som i den ursprungliga körningen.
+
+    Returnerar:
+        dict: Samma format som plan_export.
+    """
+    catalog = load_catalog(engine, config["catalog_cache"], owner=config["owner"])
+    sizes = get_table_sizes_cached(engine, config["size_cache"], owner=config["owner"])
+
+    work_items = units_to_resume(manifest)
+    for item in work_items:
+        item["columns"] = get_columns(catalog, item["table"]) or None
+    print_with_time(
+        f"♻️ Återupptar körning {manifest['run_id']}: {len(work_items)} av "
+        f"{len(manifest['units'])} arbetsenheter återstår."
+    )
+
+    marks = manifest.get("marks", {})
+    return {
+        "work_items": work_items,
+        "sizes": sizes,
+        "marks": marks,
+        "state": load_state(config["state_path"]) if marks else {},
+        "skipped": [],
+        "timestamp": manifest["run_id"],
+    }
+
+
+def print_plan(plan, mode, destination):
+    """Skriver ut planen i den ordning arbetsenheterna skulle delas ut (dry-run)."""
+    sizes = plan["sizes"]
+    print_with_time(f"📝 Plan ({mode} → {destination}), ingenting exporteras:")
+    rates = estimate_rates(sizes)
+    for item in order_largest_first(plan["work_items"], sizes):
+        cost = estimate_cost(item, sizes, rates)
+        where = f" WHERE {item['where']}" if item["where"] else ""
+        print(
+            f"  - {work_item_label(item)}: {item['kind']}, ~{item['est_rows']} rader, "
+            f"~{cost:.1f} s → {item['output_path']}{where}"
+        )
+    for table in plan["skipped"]:
+        print(f"  - {table}: oförändrad, hoppas över")
+
+
+# -------------------------------------------------------------
+# KÖRNING
+# -------------------------------------------------------------
+def _run_work_items(config, mode, work_items, sizes, export_func):
+    """Kör arbetsenheterna i valt läge och ger (item, result, timing) när de blir klara."""
+    if mode == "serial":
+        yield from run_serial(export_func, work_items, sizes)
+        return
+
+    if mode == "async":
+        from dlt_pipeline.giss.async_export import run_async
+
+        # Arbetsenheterna körs av async_export.export_work_item_async
+        yield from run_async(config, work_items, sizes)
+        return
+
+    if mode == "thread":
+        from multiprocessing.pool import ThreadPool
+
+        # Trådarna delar processens sessionspool, som måste rymma en session per tråd
+        init_shared_pool(config, config["workers"])
+        with ThreadPool(processes=config["workers"]) as pool:
+            yield from run_largest_first(pool, export_func, work_items, sizes)
+        return
+
+    from multiprocessing import Pool
+
+    # Huvudprocessens pool stängs före fork; varje worker öppnar en egen pool en gång
+    close_pool()
+    with Pool(processes=config["workers"], initializer=init_export_worker, initargs=(config,)) as pool:
+        # Största först (LPT), resultaten hanteras i den ordning de blir klara
+        yield from run_largest_first(pool, export_func, work_items, sizes)
+
+
+def run_export(
+    config,
+    mode=DEFAULT_MODE,
+    destination="parquet",
+    tables=None,
+    all_tables=False,
+    dry_run=False,
+    resume=False,
+):
+    """
+    Kör hela exporten.
+
+    Parametrar:
+        config (dict): Från config.load_config.
+        mode (str): serial | thread | process | partitioned | async.
+        destination (str): parquet | duckdb | dlt.
+        tables (list[str] | None): Tabeller att exportera (annars WANTED_TABLES.csv).
+        all_tables (bool): Exportera alla tabeller i schemat.
+        dry_run (bool): Skriv bara ut planen.
+        resume (bool): Kör bara om de enheter i förra körningens manifest som inte blev klara.
+
+    Returnerar:
+        list: (item, result, timing) per arbetsenhet (tom vid dry-run).
+    """
+    if mode not in MODES:
+        raise ValueError(f"Okänt läge: {mode} (välj bland {', '.join(MODES)})")
+    if mode == "async" and not config["streaming"]:
+        raise ValueError("Läget async strömmar alltid; pandas-vägen (STREAMING=false) finns inte i async-läget")
+
+    giss_config.set_config(config)
+    run_start = time.time()
+    run_timer = StageTimer()
+    # Huvudprocessen använder en egen pool för katalogfrågorna
+    if mode == "async":
+        # oracledb:s asyncio-API kräver thin mode, så Instant Client får inte laddas
+        init_worker({**config["connection"], "lib_dir": None})
+    else:
+        init_worker(config["connection"])
+    engine = get_engine()
+
+    manifest = load_manifest(config["manifest_path"]) if resume and destination != "dlt" else None
+    if resume and manifest is None:
+        print_with_time("⚠️ Inget manifest från en tidigare körning, gör en vanlig export.")
+    resumed = manifest is not None
+
+    if manifest is not None:
+        with run_timer.stage("plan"):
+            plan = plan_resume(engine, config, manifest)
+    else:
+        with run_timer.stage("tables"):
+            filtered_tables, incremental_config = select_tables(
+                engine, config, tables=tables, all_tables=all_tables
+            )
+
+    if destination == "dlt":
+        from dlt_pipeline.giss.destinations import run_dlt_pipeline
+
+        if dry_run:
+            print_with_time(f"📝 Plan (dlt → {config['duckdb_path']}): {filtered_tables}")
+            return []
+        run_dlt_pipeline(config, filtered_tables)
+        return []
+
+    if manifest is None:
+        plan = plan_export(
+            engine, config, filtered_tables, incremental_config, partitioned=mode == "partitioned",
+            timer=run_timer,
+        )
+    if dry_run:
+        print_plan(plan, mode, destination)
+        return []
+
+    work_items, sizes, marks, state = plan["work_items"], plan["sizes"], plan["marks"], plan["state"]
+    if manifest is None:
+        manifest = new_manifest(plan["timestamp"], mode, work_items, marks)
+    save_manifest(config["manifest_path"], manifest)
+
+    events = EventLog(config["events_path"], plan["timestamp"])
+    events.emit("run_start", mode=mode, destination=destination, owner=config["owner"], workers=config["workers"])
+    events.emit(
+        "plan", units=len(work_items), skipped=plan["skipped"],
+        stages={name: round(entry["seconds"], 4) for name, entry in run_timer.stages.items()},
+    )
+
+    finished = []
+    export_start, export_started = time.perf_counter(), time.time()
+    for item, result, timing in _run_work_items(config, mode, work_items, sizes, export_work_item):
+        finished.append((item, result, timing))
+        emit_unit(events, item, result, timing)
+        label, status, info, details = result
+        print_with_time(
+            f"🏁 {label}: {status} ({info}) på {timing['end'] - timing['start']:.1f}s "
+            f"[{timing['worker']}] – {len(finished)}/{len(work_items)} klara"
+        )
+        record_result(manifest, item, result, timing)
+        save_manifest(config["manifest_path"], manifest)
+
+        # State uppdateras först när alla delar av tabellen har skrivits utan fel
+        table = item["table"]
+        if table in marks and table_is_complete(manifest, table):
+            state[table] = {**marks[table], "exported_at": plan["timestamp"], "kind": item["kind"]}
+            save_state(config["state_path"], state)
+    run_timer.add("export", time.perf_counter() - export_start, start=export_started)
+
+    print_with_time("✅ Alla jobb klara.")
+    for _, (t, status, info, details), _ in finished:
+        retried = f", {details['attempts']} försök" if details["attempts"] > 1 else ""
+        print(f"  - {t}: {status} ({info}{retried})")
+    failed = [label for label, unit in manifest["units"].items() if unit["status"] != "ok"]
+    if failed:
+        print_with_time(f"⚠️ {len(failed)} enheter misslyckades, kör om dem med --resume: {failed}")
+
+    n_workers = {"serial": 1, "async": config["async_concurrency"]}.get(mode, config["workers"])
+    summary = summarize_schedule(finished, n_workers)
+    print_with_time(
+        f"⏱️ Körtid {summary['makespan']:.1f}s, total arbetstid {summary['total_work']:.1f}s, "
+        f"ideal {summary['ideal']:.1f}s (effektivitet {summary['efficiency']:.0%})"
+    )
+    # En återupptagen körning har bara tider för en del av tabellerna/delarna
+    with run_timer.stage("size_cache"):
+        save_size_cache(config["size_cache"], sizes if resumed else update_sizes_with_timings(sizes, finished))
+
+    # Katalogen över snapshots (latest-pekaren) följer med varje export;
+    # kompaktering, retention och latest-vyerna görs av giss-export compact
+    from dlt_pipeline.giss.compaction import build_snapshot_catalog, primary_keys, save_snapshot_catalog
+
+    with run_timer.stage("snapshot_catalog"):
+        save_snapshot_catalog(
+            config["parquet_dir"],
+            build_snapshot_catalog(config["parquet_dir"], keys=primary_keys(config["catalog_cache"])),
+        )
+
+    if config["diff"]:
+        from dlt_pipeline.giss.diff import run_snapshot_diff
+
+        # Före compact, som kan ta bort föregående snapshot
+        with run_timer.stage("diff"):
+            run_snapshot_diff(config, tables=sorted({item["table"] for item in work_items}))
+
+    if destination == "duckdb":
+        from dlt_pipeline.giss.destinations import load_parquet_into_duckdb
+
+        # Hela tabeller ur manifestet, även delar som blev klara i en tidigare (avbruten) körning
+        touched = {item["table"] for item in work_items}
+        with run_timer.stage("duckdb_load"):
+            load_parquet_into_duckdb(
+                config["duckdb_path"], [u for u in manifest["units"].values() if u["table"] in touched]
+            )
+
+    # Tid per tabell och steg: sammanfattning, händelselogg och valfritt Prometheus/trace
+    run_end = time.time()
+    metrics = summarize_metrics(finished, run_timer.as_dict()["stages"])
+    print_summary(metrics)
+    statuses = {}
+    for _, (_, status, _, _), _ in finished:
+        statuses[status] = statuses.get(status, 0) + 1
+    events.emit(
+        "run_end", seconds=round(run_end - run_start, 3), statuses=statuses,
+        stages=metrics["run_stages"], peak_rss_bytes=max(metrics["workers"].values(), default=None),
+    )
+    events.close()
+    if config["metrics_path"]:
+        write_prometheus(config["metrics_path"], metrics, plan["timestamp"], run_end - run_start, statuses)
+        print_with_time(f"📈 Prometheus-mått: {config['metrics_path']}")
+    if config["trace_path"]:
+        write_trace(config["trace_path"], plan["timestamp"], run_start, run_end, finished, run_timer)
+        print_with_time(f"🧵 Trace (OTLP/JSON): {config['trace_path']}")
+
+    print_with_time(f"🎉 Export från Oracle {config['owner']} schema klar!")
+    return finished
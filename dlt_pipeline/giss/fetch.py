@@ -0,0 +1,309 @@
+## detta är filen dlt_pipeline/giss/fetch.py
+
+"""
+Typad hämtning av Oracle-kolumner till Arrow.
+
+Oracle-typer från katalogcachen (catalog.load_catalog) översätts till
+Arrow-typer, så att Parquet-filerna får riktiga numeriska kolumner i
+stället för strängar:
+
+    NUMBER(p,0), p <= 18   -> int64
+    NUMBER(p,0), p > 18    -> decimal128(p, 0)
+    NUMBER(p,s), s > 0     -> decimal128(p, s)
+    NUMBER (utan p/s)      -> float64
+    FLOAT / BINARY_*       -> float64
+
+NUMBER-kolumner hämtas typade av drivrutinen (cursor.var(int/float/Decimal)
+i en output type handler), utan omvägen via text. En enkel outconverter
+per värde tillämpar samma regel som den tidigare TO_CHAR(CASE ...)-
+lösningen i SQL: mikroskopiska negativa värden (-1e-6 <= x < 0) klampas
+till 0, värden under -1e-6 och icke-ändliga värden blir NULL. Decimaler
+avrundas till kolumnens skala i en egen Decimal-kontext (38 siffror räcker
+inte alltid för standardkontexten). Kolumner med korrupta värden som ger
+ORA-22063 hämtas i stället med TO_CHAR enligt kvalitetsrapportens regler
+(quality.py) eller med NUMERIC_MODE=text.
+
+LOB:ar hämtas direkt som str/bytes av samma handler (LONG/LONG RAW-variabler),
+så att ingen extra rundresa per rad behövs för att läsa dem. Det gäller
+geometrier (TO_WKTGEOMETRY ger CLOB, TO_WKBGEOMETRY ger BLOB) och CLOB/BLOB-
+kolumner vars största värde ligger under en tröskel. Större LOB:ar hämtas
+som locatorer och läses batchvis av streaming-modulen.
+
+Handlern använder den klassiska signaturen (cursor, name, default_type,
+size, precision, scale) som fungerar med både cx_Oracle och oracledb.
+"""
+
+import importlib
+import math
+from decimal import Context, Decimal, InvalidOperation
+
+import pyarrow as pa
+
+from dlt_pipeline.giss.streaming import normalize_column_name
+
+# -------------------------------------------------------------
+# STANDARDVÄRDEN
+# -------------------------------------------------------------
+NEGATIVE_MICRO_LIMIT = Decimal("-1e-6")  # under detta blir värdet NULL
+_FLOAT_MICRO_LIMIT = float(NEGATIVE_MICRO_LIMIT)
+
+# Kvantisering till NUMBER(p,s): standardkontexten har bara 28 siffror, Oracle upp till 38
+_DECIMAL_CONTEXT = Context(prec=80)
+
+_FLOAT_TYPES = ("FLOAT", "BINARY_FLOAT", "BINARY_DOUBLE")
+_STRING_TYPES = ("VARCHAR2", "NVARCHAR2", "CHAR", "NCHAR", "CLOB", "NCLOB", "LONG")
+_BINARY_TYPES = ("BLOB", "RAW", "LONG RAW")
+_LOB_TYPES = ("CLOB", "NCLOB", "BLOB")
+
+DEFAULT_LOB_INLINE_MAX_BYTES = 16 * 1024 * 1024  # större LOB:ar läses via locator
+
+
+# -------------------------------------------------------------
+# TYPMAPPNING
+# -------------------------------------------------------------
+def arrow_type_for_column(column):
+    """
+    Arrow-typ för en kolumn från katalogcachen, eller None om typen ska
+    härledas från datat.
+    """
+    data_type = column["data_type"]
+    precision, scale = column.get("precision"), column.get("scale")
+
+    if data_type in ("NUMBER", "DECIMAL"):
+        if precision is None and scale is None:
+            return pa.float64()
+        precision = min(precision or 38, 38)
+        scale = scale or 0
+        if scale == 0 and precision <= 18:
+            return pa.int64()
+        return pa.decimal128(precision, max(scale, 0))
+    if data_type in _FLOAT_TYPES:
+        return pa.float64()
+    if data_type in _STRING_TYPES:
+        return pa.string()
+    if data_type in _BINARY_TYPES:
+        return pa.binary()
+    if data_type == "DATE" or data_type.startswith("TIMESTAMP"):
+        return pa.timestamp("us")
+    return None
+
+
+def geometry_alias(column_name, geometry_mode="wkt"):
+    """Alias för en geometrikolumn i SELECT, t.ex. GEOMETRI_wkt eller GEOMETRI_wkb."""
+    return f"{column_name}_{geometry_mode}"
+
+
+def build_column_types(columns, convert_numbers_to_text=False, geometry_mode="wkt", cast_rules=None):
+    """
+    Bygger {utdatakolumn: Arrow-typ} för en SELECT byggd av build_select_with_wkt_safe.
+
+    Parametrar:
+        columns (list[dict]): Kolumner från katalogcachen.
+        convert_numbers_to_text (bool): True om numeriska kolumner hämtas med TO_CHAR (blir string).
+        geometry_mode (str): "wkt" (text) eller "wkb" (binär) för geometrikolumnerna.
+        cast_rules (dict[str, str] | None): Regler från kvalitetsrapporten; kolumner med
+                                            "safe_text" hämtas med TO_CHAR (blir string).
+
+    Returnerar:
+        dict[str, pa.DataType]: Nycklar normaliserade som i streaming.normalize_column_name.
+    """
+    cast_rules = cast_rules or {}
+    column_types = {}
+    for column in columns:
+        name = column["name"]
+        if column["data_type"] == "SDO_GEOMETRY":
+            alias = normalize_column_name(geometry_alias(name, geometry_mode).upper())
+            column_types[alias] = pa.binary() if geometry_mode == "wkb" else pa.string()
+            continue
+        if column["data_type"] in ("NUMBER", "FLOAT", "DECIMAL") and (
+            convert_numbers_to_text or cast_rules.get(name) == "safe_text"
+        ):
+            column_types[normalize_column_name(name)] = pa.string()
+            continue
+        arrow_type = arrow_type_for_column(column)
+        if arrow_type is not None:
+            column_types[normalize_column_name(name)] = arrow_type
+    return column_types
+
+
+# -------------------------------------------------------------
+# TALKONVERTERING PÅ KLIENTEN
+# -------------------------------------------------------------
+def clean_number(value):
+    """
+    Rensar ett NUMBER-värde (Decimal, int, float eller text).
+
+    Returnerar:
+        Decimal | None: None för NULL, korrupta värden och värden under -1e-6.
+                        Värden mellan -1e-6 och 0 klampas till 0.
+    """
+    if value is None:
+        return None
+    try:
+        value = value if isinstance(value, Decimal) else Decimal(value)
+    except (InvalidOperation, ValueError, TypeError):
+        return None
+    if not value.is_finite():
+        return None
+    if value < 0:
+        return None if value < NEGATIVE_MICRO_LIMIT else Decimal(0)
+    return value
+
+
+def _clean_int(value):
+    # Heltal: varje negativt värde ligger under -1e-6
+    return value if value >= 0 else None
+
+
+def _clean_float(value):
+    if not math.isfinite(value):
+        return None
+    if value < 0:
+        return None if value < _FLOAT_MICRO_LIMIT else 0.0
+    return value
+
+
+def make_number_converter(arrow_type):
+    """
+    Python-typ som drivrutinen ska hämta och outconverter för Arrow-typen.
+
+    Returnerar:
+        tuple: (int | float | Decimal, callable) till cursor.var. Outconvertern
+               anropas inte för NULL.
+    """
+    if pa.types.is_integer(arrow_type):
+        return int, _clean_int
+    if pa.types.is_decimal(arrow_type):
+        quantum = Decimal(1).scaleb(-arrow_type.scale)
+        max_exponent = arrow_type.precision - arrow_type.scale
+
+        def convert(value):
+            value = clean_number(value)
+            if value is None:
+                return None
+            try:
+                value = value.quantize(quantum, context=_DECIMAL_CONTEXT)
+            except InvalidOperation:
+                return None
+            # Värden som inte ryms i kolumnens precision blir NULL i stället för ett Arrow-fel
+            return None if value and value.adjusted() >= max_exponent else value
+        return Decimal, convert
+    return float, _clean_float
+
+
+def _driver_module(cursor):
+    # cx_Oracle eller oracledb – typkonstanterna skiljer sig mellan drivrutinerna.
+    # Ersättaren i standin.py har konstanterna i sin egen modul.
+    module = type(cursor).__module__
+    driver = importlib.import_module(module.split(".")[0])
+    return driver if hasattr(driver, "DB_TYPE_LONG") else importlib.import_module(module)
+
+
+def geometry_srids(columns, geometry_mode="wkb"):
+    """{utdatakolumn: SRID} för tabellens geometrikolumner (till GeoParquetCollector)."""
+    return {
+        normalize_column_name(geometry_alias(c["name"], geometry_mode).upper()): c.get("srid")
+        for c in columns
+        if c["data_type"] == "SDO_GEOMETRY"
+    }
+
+
+def lob_length_query(table, columns, owner="GISS"):
+    """
+    Aggregatfrågan bakom probe_lob_lengths (också för async-läget).
+
+    Returnerar:
+        tuple: (CLOB/BLOB-kolumnernas namn, SELECT-sats eller None om tabellen saknar LOB:ar)
+    """
+    lob_names = [c["name"] for c in columns if c["data_type"] in _LOB_TYPES]
+    if not lob_names:
+        return lob_names, None
+    select = ", ".join(f"MAX(DBMS_LOB.GETLENGTH({name})) AS {name}" for name in lob_names)
+    return lob_names, f"SELECT {select} FROM {owner}.{table}"
+
+
+def probe_lob_lengths(conn, table, columns, owner="GISS"):
+    """
+    Största längd per CLOB/BLOB-kolumn i tabellen, med en enda aggregatfråga.
+
+    Returnerar:
+        dict[str, int]: kolumnnamn -> största längd (0 för tomma/NULL-kolumner)
+    """
+    lob_names, sql = lob_length_query(table, columns, owner=owner)
+    if sql is None:
+        return {}
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql)
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+    return {name: int(value or 0) for name, value in zip(lob_names, row)}
+
+
+def inline_lob_columns(columns, geometry_mode="wkt", lob_lengths=None, max_bytes=DEFAULT_LOB_INLINE_MAX_BYTES):
+    """
+    Utdatakolumner (normaliserade namn) vars LOB:ar hämtas direkt som str/bytes:
+    alla geometrikolumner samt CLOB/BLOB-kolumner vars största värde är högst max_bytes.
+
+    Parametrar:
+        columns (list[dict]): Kolumner från katalogcachen.
+        geometry_mode (str): "wkt" eller "wkb".
+        lob_lengths (dict[str, int] | None): Från probe_lob_lengths. Saknas längden
+                                             hämtas kolumnen via locator.
+        max_bytes (int): Tröskel för direkt hämtning.
+    """
+    lob_lengths = lob_lengths or {}
+    inline = set()
+    for column in columns:
+        name = column["name"]
+        if column["data_type"] == "SDO_GEOMETRY":
+            inline.add(normalize_column_name(geometry_alias(name, geometry_mode).upper()))
+        elif column["data_type"] in _LOB_TYPES and lob_lengths.get(name, max_bytes + 1) <= max_bytes:
+            inline.add(normalize_column_name(name))
+    return inline
+
+
+def make_output_type_handler(column_types, typed_numbers=True, inline_lob_columns=None):
+    """
+    Skapar en output type handler som hämtar NUMBER-kolumner typade enligt
+    column_types (int, float eller Decimal direkt från drivrutinen), samt
+    läser LOB-kolumner (t.ex. WKB-geometrier) direkt som str/bytes.
+
+    Parametrar:
+        column_types (dict[str, pa.DataType]): Från build_column_types.
+        typed_numbers (bool): Om True hämtas NUMBER-kolumner typade och rensas på klienten.
+        inline_lob_columns (set[str] | None): Utdatakolumner (normaliserade namn) vars
+                                              CLOB/BLOB hämtas direkt som str/bytes.
+
+    Returnerar:
+        callable: Sätts som cursor.outputtypehandler.
+    """
+    inline_lob_columns = set(inline_lob_columns or ())
+    converters = {
+        name: make_number_converter(arrow_type)
+        for name, arrow_type in column_types.items()
+        if typed_numbers
+        and (
+            pa.types.is_integer(arrow_type)
+            or pa.types.is_decimal(arrow_type)
+            or pa.types.is_floating(arrow_type)
+        )
+    }
+
+    def handler(cursor, name, default_type, size, precision, scale):
+        type_name = getattr(default_type, "name", "")
+        column = normalize_column_name(name)
+        if type_name == "DB_TYPE_NUMBER":
+            converter = converters.get(column)
+            if converter is None:
+                return None
+            python_type, outconverter = converter
+            return cursor.var(python_type, arraysize=cursor.arraysize, outconverter=outconverter)
+        if column in inline_lob_columns and type_name in ("DB_TYPE_CLOB", "DB_TYPE_NCLOB", "DB_TYPE_BLOB"):
+            driver = _driver_module(cursor)
+            long_type = driver.DB_TYPE_LONG_RAW if type_name == "DB_TYPE_BLOB" else driver.DB_TYPE_LONG
+            return cursor.var(long_type, arraysize=cursor.arraysize)
+        return None
+
+    return handler
@@ -0,0 +1,333 @@
+## detta är filen dlt_pipeline/giss/geometry.py
+
+"""
+Hjälpfunktioner för binära geometrier (WKB) och GeoParquet-metadata.
+
+Geometrier hämtas från Oracle med SDO_UTIL.TO_WKBGEOMETRY och skrivs som en
+binär kolumn. För att filerna ska vara GeoParquet samlas geometrityper och
+bbox in batch för batch, och när filen stängs läggs metadatanyckeln "geo"
+till i Parquet-footern (https://geoparquet.org/releases/v1.0.0/).
+
+WKB-läsaren hanterar OGC/ISO-WKB (2D, Z, M, ZM) och EWKB-flaggor och läser
+koordinaterna med numpy, så att bara strukturen gås igenom i Python.
+wkt_bounds ger motsvarande bbox för WKT-text.
+"""
+
+import copy
+import json
+import re
+import struct
+
+import numpy as np
+
+# -------------------------------------------------------------
+# KONSTANTER
+# -------------------------------------------------------------
+GEOPARQUET_VERSION = "1.0.0"
+
+_GEOMETRY_NAMES = {
+    1: "Point",
+    2: "LineString",
+    3: "Polygon",
+    4: "MultiPoint",
+    5: "MultiLineString",
+    6: "MultiPolygon",
+    7: "GeometryCollection",
+}
+
+# Oracle-specifika SRID:er som motsvarar en EPSG-kod
+_ORACLE_TO_EPSG = {8307: 4326, 8265: 4269, 8267: 4267}
+
+
+def _degree_axes():
+    return [
+        {"name": "Geodetic latitude", "abbreviation": "Lat", "direction": "north", "unit": "degree"},
+        {"name": "Geodetic longitude", "abbreviation": "Lon", "direction": "east", "unit": "degree"},
+    ]
+
+
+def _parameter(name, value, unit, code):
+    return {"name": name, "value": value, "unit": unit, "id": {"authority": "EPSG", "code": code}}
+
+
+# PROJJSON för de koordinatsystem GISS använder, så att "crs" blir giltig
+# även utan pyproj/GDAL. Andra EPSG-koder slås upp i pyproj eller osr.
+_PROJJSON = {
+    3006: {
+        "type": "ProjectedCRS",
+        "name": "SWEREF99 TM",
+        "base_crs": {
+            "name": "SWEREF99",
+            "datum": {
+                "type": "GeodeticReferenceFrame",
+                "name": "SWEREF99",
+                "ellipsoid": {"name": "GRS 1980", "semi_major_axis": 6378137, "inverse_flattening": 298.257222101},
+            },
+            "coordinate_system": {"subtype": "ellipsoidal", "axis": _degree_axes()},
+            "id": {"authority": "EPSG", "code": 4619},
+        },
+        "conversion": {
+            "name": "SWEREF99 TM",
+            "method": {"name": "Transverse Mercator", "id": {"authority": "EPSG", "code": 9807}},
+            "parameters": [
+                _parameter("Latitude of natural origin", 0, "degree", 8801),
+                _parameter("Longitude of natural origin", 15, "degree", 8802),
+                _parameter("Scale factor at natural origin", 0.9996, "unity", 8805),
+                _parameter("False easting", 500000, "metre", 8806),
+                _parameter("False northing", 0, "metre", 8807),
+            ],
+        },
+        "coordinate_system": {
+            "subtype": "Cartesian",
+            "axis": [
+                {"name": "Northing", "abbreviation": "N", "direction": "north", "unit": "metre"},
+                {"name": "Easting", "abbreviation": "E", "direction": "east", "unit": "metre"},
+            ],
+        },
+        "id": {"authority": "EPSG", "code": 3006},
+    },
+    4326: {
+        "type": "GeographicCRS",
+        "name": "WGS 84",
+        "datum": {
+            "type": "GeodeticReferenceFrame",
+            "name": "World Geodetic System 1984",
+            "ellipsoid": {"name": "WGS 84", "semi_major_axis": 6378137, "inverse_flattening": 298.257223563},
+        },
+        "coordinate_system": {"subtype": "ellipsoidal", "axis": _degree_axes()},
+        "id": {"authority": "EPSG", "code": 4326},
+    },
+}
+
+
+# -------------------------------------------------------------
+# WKB-LÄSNING
+# -------------------------------------------------------------
+def _read_header(buf, offset):
+    endian = "<" if buf[offset] == 1 else ">"
+    (code,) = struct.unpack_from(endian + "I", buf, offset + 1)
+    offset += 5
+
+    has_z = bool(code & 0x80000000)
+    has_m = bool(code & 0x40000000)
+    if code & 0x20000000:  # EWKB med inbäddad SRID
+        offset += 4
+    code &= 0x0FFFFFFF
+    if code >= 3000:
+        has_z = has_m = True
+    elif code >= 2000:
+        has_m = True
+    elif code >= 1000:
+        has_z = True
+    return endian, code % 1000, has_z, 2 + has_z + has_m, offset
+
+
+def _read_points(buf, offset, endian, n_points, dims, bounds):
+    coords = np.frombuffer(buf, dtype=endian + "f8", count=n_points * dims, offset=offset)
+    if n_points:
+        xy = coords.reshape(n_points, dims)[:, :2]
+        if not np.isnan(xy).all():
+            xmin, ymin = np.nanmin(xy, axis=0)
+            xmax, ymax = np.nanmax(xy, axis=0)
+            bounds[0] = min(bounds[0], xmin)
+            bounds[1] = min(bounds[1], ymin)
+            bounds[2] = max(bounds[2], xmax)
+            bounds[3] = max(bounds[3], ymax)
+    return offset + n_points * dims * 8
+
+
+def _walk(buf, offset, bounds):
+    endian, code, _, dims, offset = _read_header(buf, offset)
+    if code == 1:
+        return _read_points(buf, offset, endian, 1, dims, bounds)
+
+    (count,) = struct.unpack_from(endian + "I", buf, offset)
+    offset += 4
+    if code == 2:
+        return _read_points(buf, offset, endian, count, dims, bounds)
+    if code == 3:
+        for _ in range(count):
+            (n_points,) = struct.unpack_from(endian + "I", buf, offset)
+            offset = _read_points(buf, offset + 4, endian, n_points, dims, bounds)
+        return offset
+    for _ in range(count):
+        offset = _walk(buf, offset, bounds)
+    return offset
+
+
+def wkb_bounds(buf):
+    """
+    Bbox för en WKB-geometri.
+
+    Returnerar:
+        tuple[float, float, float, float] | None: (xmin, ymin, xmax, ymax), None för tomma geometrier.
+    """
+    bounds = [np.inf, np.inf, -np.inf, -np.inf]
+    _walk(buf, 0, bounds)
+    if bounds[0] == np.inf:
+        return None
+    return tuple(float(b) for b in bounds)
+
+
+_WKT_NUMBER_RE = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+
+def wkt_bounds(text):
+    """
+    Bbox för en WKT-geometri (samma format som wkb_bounds). Varje koordinat
+    avgränsas av komma eller parentes; de två första talen är x och y.
+    """
+    if not text or "(" not in text:
+        return None
+    xs, ys = [], []
+    for coordinate in re.split(r"[(),]", text[text.index("("):]):
+        numbers = _WKT_NUMBER_RE.findall(coordinate)
+        if len(numbers) >= 2:
+            xs.append(float(numbers[0]))
+            ys.append(float(numbers[1]))
+    if not xs:
+        return None
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def wkb_geometry_type(buf):
+    """GeoParquet-namn på geometritypen, t.ex. 'Polygon' eller 'MultiPolygon Z'."""
+    _, code, has_z, _, _ = _read_header(buf, 0)
+    name = _GEOMETRY_NAMES.get(code, "Unknown")
+    return f"{name} Z" if has_z else name
+
+
+# -------------------------------------------------------------
+# GEOPARQUET-METADATA
+# -------------------------------------------------------------
+def epsg_for_srid(srid):
+    """EPSG-koden för en Oracle SDO_SRID (None om SRID saknas)."""
+    if srid is None:
+        return None
+    return _ORACLE_TO_EPSG.get(int(srid), int(srid))
+
+
+def _projjson_from_library(code):
+    # pyproj i första hand, annars GDAL:s osr (båda valfria); None om ingen finns eller koden är okänd
+    try:
+        from pyproj import CRS
+    except ImportError:
+        pass
+    else:
+        try:
+            return CRS.from_epsg(code).to_json_dict()
+        except Exception:
+            return None
+    try:
+        from osgeo import osr
+    except ImportError:
+        return None
+    srs = osr.SpatialReference()
+    if srs.ImportFromEPSG(code) != 0:
+        return None
+    return json.loads(srs.ExportToPROJJSON())
+
+
+def crs_for_srid(srid):
+    """
+    PROJJSON för en Oracle SDO_SRID, till "crs" i GeoParquet-metadatan.
+
+    SWEREF99 TM och WGS 84 finns inbyggda; övriga EPSG-koder slås upp med
+    pyproj eller osr om de är installerade. Returnerar None (okänt
+    koordinatsystem) om SRID saknas eller inte går att slå upp; SRID:n finns
+    då kvar i katalogcachen (se gis.source_epsg).
+    """
+    code = epsg_for_srid(srid)
+    if code is None:
+        return None
+    if code in _PROJJSON:
+        return copy.deepcopy(_PROJJSON[code])
+    return _projjson_from_library(code)
+
+
+class GeoParquetCollector:
+    """
+    Samlar geometrityper och bbox per geometrikolumn medan batchar skrivs,
+    och bygger GeoParquet-metadatan ("geo") när filen är klar.
+
+    Används som observer i streaming.stream_query_to_parquet.
+    """
+
+    def __init__(self, geometry_columns, compute_bbox=True):
+        """
+        Parametrar:
+            geometry_columns (dict[str, int | None]): WKB-kolumnnamn -> SDO_SRID.
+            compute_bbox (bool): Om True beräknas bbox för hela filen.
+        """
+        self.geometry_columns = geometry_columns
+        self.compute_bbox = compute_bbox
+        self.types = {name: set() for name in geometry_columns}
+        self.bounds = {name: [np.inf, np.inf, -np.inf, -np.inf] for name in geometry_columns}
+
+    def observe(self, batch):
+        for name in self.geometry_columns:
+            index = batch.schema.get_field_index(name)
+            if index < 0:
+                continue
+            for value in batch.column(index).to_pylist():
+                if value is None:
+                    continue
+                self.types[name].add(wkb_geometry_type(value))
+                if self.compute_bbox:
+                    _walk(value, 0, self.bounds[name])
+
+    def key_value_metadata(self):
+        columns = {}
+        for name, srid in self.geometry_columns.items():
+            column = {
+                "encoding": "WKB",
+                "geometry_types": sorted(self.types[name]),
+                "crs": crs_for_srid(srid),
+            }
+            bounds = self.bounds[name]
+            if self.compute_bbox and bounds[0] != np.inf:
+                column["bbox"] = [float(b) for b in bounds]
+            columns[name] = column
+
+        if not columns:
+            return {}
+        geo = {
+            "version": GEOPARQUET_VERSION,
+            "primary_column": next(iter(columns)),
+            "columns": columns,
+        }
+        return {"geo": json.dumps(geo)}
+
+
+def merge_geo_metadata(values):
+    """
+    Slår ihop GeoParquet-metadata ("geo") från flera filer som skrivs om till
+    en, t.ex. vid kompaktering: geometrityperna förenas och bbox blir den
+    gemensamma rutan. Saknar någon fil bbox för en kolumn tas den bort.
+
+    Parametrar:
+        values (list[bytes | str | None]): "geo"-värdet ur varje fils footer.
+
+    Returnerar:
+        dict: {"geo": json} eller {} om ingen fil hade geo-metadata.
+    """
+    merged = None
+    for value in values:
+        if not value:
+            continue
+        geo = json.loads(value)
+        if merged is None:
+            merged = geo
+            continue
+        for name, column in geo.get("columns", {}).items():
+            target = merged["columns"].setdefault(name, column)
+            if target is column:
+                continue
+            types = set(target.get("geometry_types", [])) | set(column.get("geometry_types", []))
+            target["geometry_types"] = sorted(types)
+            if "bbox" in target and "bbox" in column:
+                a, b = target["bbox"], column["bbox"]
+                target["bbox"] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+            else:
+                target.pop("bbox", None)
+    return {"geo": json.dumps(merged)} if merged else {}
@@ -0,0 +1,418 @@
+## detta är filen dlt_pipeline/giss/gis.py
+
+"""
+Konvertering av exporterade geometritabeller till spatialt indexerade
+GIS-format med GDAL/OGR (giss-export convert).
+
+Källan är tabellens senaste fulla snapshot enligt snapshot-katalogen (se
+compaction.build_snapshot_catalog; deltan kommer med när compact har
+slagit ihop dem till en full snapshot, eftersom filerna konverteras var
+för sig och inte kan dedupliceras på nyckeln), med
+geometrin som WKB (GeoParquet) eller WKT. Resultatet skrivs med fasta
+namn i GIS_DIR, så att GIS-klienter alltid pekar på samma fil:
+
+    {tabell}.fgb       FlatGeobuf med packat Hilbert R-träd (SPATIAL_INDEX=YES)
+    {tabell}.gpkg      GeoPackage med R-tree-index (rtree_<tabell>_geom)
+    {tabell}.pmtiles   vektortiles (PMTiles, kräver GDAL >= 3.8), valfritt
+
+Konverteringen görs i två steg i en processpool (WORKERS), största först:
+
+    1. Delar: varje fil delas i delar om GIS_CHUNK_ROWS rader (hela
+       radgrupper). Varje del läses med pyarrow, geometrierna tolkas och
+       projiceras om till GIS_TARGET_SRID och delen skrivs som en
+       FlatGeobuf utan index. Omprojiceringen görs alltså en gång, oavsett
+       hur många format som skrivs.
+    2. Format: per tabell och format läses delarna som ett OGR VRT-lager
+       (OGRVRTUnionLayer) och skrivs med gdal.VectorTranslate till det
+       slutliga formatet, som då bygger sitt spatiala index.
+
+Tabeller vars källa (tidsstämpel och filer), format och SRID är desamma
+som vid förra konverteringen hoppas över ({GIS_DIR}/_gis_state.json).
+
+Källans SRID tas ur GeoParquet-metadatan och annars ur katalogcachen
+(ALL_SDO_GEOM_METADATA). Saknas den skrivs geometrierna utan
+koordinatsystem och utan omprojicering.
+
+GDAL:s Python-bindningar (osgeo, paketet gdal) importeras först i
+workerprocesserna.
+"""
+
+import json
+import os
+import shutil
+from xml.sax.saxutils import escape
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from dlt_pipeline.giss.catalog import get_columns, read_catalog_cache
+from dlt_pipeline.giss.compaction import build_snapshot_catalog
+from dlt_pipeline.giss.export import print_with_time
+from dlt_pipeline.giss.geometry import epsg_for_srid
+from dlt_pipeline.giss.manifest import load_manifest, save_manifest, temporary_path
+from dlt_pipeline.giss.scheduler import run_largest_first
+from dlt_pipeline.giss.spatial import BBOX_TYPE, find_geometry_column
+
+# -------------------------------------------------------------
+# STANDARDVÄRDEN
+# -------------------------------------------------------------
+GIS_DIR_NAME = "_gis"
+GIS_STATE_FILE_NAME = "_gis_state.json"
+DEFAULT_GIS_FORMATS = ("fgb", "gpkg")
+DEFAULT_GIS_CHUNK_ROWS = 250_000
+DEFAULT_TILE_MIN_ZOOM = 0
+DEFAULT_TILE_MAX_ZOOM = 14
+
+# Format -> (OGR-drivrutin, filändelse, lagerflaggor, datasetflaggor)
+GIS_FORMATS = {
+    "fgb": ("FlatGeobuf", "fgb", ["SPATIAL_INDEX=YES"], []),
+    "gpkg": ("GPKG", "gpkg", ["SPATIAL_INDEX=YES"], []),
+    "pmtiles": ("PMTiles", "pmtiles", [], [f"MINZOOM={DEFAULT_TILE_MIN_ZOOM}", f"MAXZOOM={DEFAULT_TILE_MAX_ZOOM}"]),
+}
+
+
+# -------------------------------------------------------------
+# PLANERING
+# -------------------------------------------------------------
+def parse_formats(value):
+    """"fgb,gpkg" -> ("fgb", "gpkg"); okända format ger ValueError."""
+    if not value:
+        return DEFAULT_GIS_FORMATS
+    formats = tuple(f.strip().lower() for f in value.split(",") if f.strip())
+    unknown = sorted(set(formats) - set(GIS_FORMATS))
+    if unknown:
+        raise ValueError(f"Okända GIS-format: {unknown} (välj bland {', '.join(GIS_FORMATS)})")
+    return formats
+
+
+def source_epsg(schema, geometry_column, catalog_columns):
+    """EPSG-koden för geometrikolumnen ur GeoParquet-metadatan, annars ur katalogcachen (None om okänd)."""
+    geo = (schema.metadata or {}).get(b"geo")
+    if geo:
+        crs = json.loads(geo).get("columns", {}).get(geometry_column, {}).get("crs") or {}
+        code = crs.get("id", {}).get("code")
+        if code is not None:
+            return int(code)
+    # Utdatakolumnen heter {kolumn}_wkb/_wkt
+    base = geometry_column.rsplit("_", 1)[0].upper()
+    for column in catalog_columns:
+        if column["name"] == base and column.get("srid") is not None:
+            return epsg_for_srid(column["srid"])
+    return None
+
+
+def _chunks(path, chunk_rows):
+    # Följande radgrupper slås ihop tills delen har minst chunk_rows rader
+    metadata = pq.read_metadata(path)
+    groups, rows = [], 0
+    for i in range(metadata.num_row_groups):
+        groups.append(i)
+        rows += metadata.row_group(i).num_rows
+        if rows >= chunk_rows:
+            yield groups, rows
+            groups, rows = [], 0
+    if groups or metadata.num_row_groups == 0:
+        yield groups, rows
+
+
+def _source_key(latest, formats, target_epsg):
+    return {"timestamp": latest["timestamp"], "files": latest["files"], "formats": list(formats), "srid": target_epsg}
+
+
+def output_path(gis_dir, table, fmt):
+    """Sökvägen till tabellens fil i ett format, t.ex. {GIS_DIR}/gavd.fgb."""
+    return os.path.join(gis_dir, f"{table.lower()}.{GIS_FORMATS[fmt][1]}")
+
+
+def plan_conversion(config, tables=None, formats=DEFAULT_GIS_FORMATS, force=False):
+    """
+    Väljer tabeller med geometri vars källa har ändrats och delar upp dem.
+
+    Returnerar:
+        dict: {"chunks": [arbetsenheter för steg 1], "tables": {tabell: {...}},
+               "skipped": [oförändrade], "sizes": {tabell: {"num_rows"}}}
+    """
+    gis_dir = config["gis_dir"]
+    target_epsg = config["gis_target_srid"]
+    state = load_manifest(os.path.join(gis_dir, GIS_STATE_FILE_NAME)) or {}
+    catalog_cache = read_catalog_cache(config["catalog_cache"])
+    wanted = {t.upper() for t in tables} if tables else None
+
+    chunks, planned, skipped, sizes = [], {}, [], {}
+    # Utan nycklar är latest bara senaste fulla snapshot
+    for table, entry in build_snapshot_catalog(config["parquet_dir"])["tables"].items():
+        if wanted is not None and table not in wanted:
+            continue
+        latest = entry["latest"]
+        schema = pq.read_schema(latest["files"][0])
+        found = find_geometry_column(schema)
+        if found is None:
+            continue
+        key = _source_key(latest, formats, target_epsg)
+        outputs = {fmt: output_path(gis_dir, table, fmt) for fmt in formats}
+        previous = state.get(table, {})
+        if not force and previous.get("source") == key and all(os.path.exists(p) for p in outputs.values()):
+            skipped.append(table)
+            continue
+
+        geometry, encoding = found
+        epsg = source_epsg(schema, geometry, get_columns(catalog_cache, table))
+        chunk_dir = os.path.join(gis_dir, f".{table.lower()}_{latest['timestamp']}")
+        table_chunks = [
+            (path, groups, rows)
+            for path in latest["files"]
+            for groups, rows in _chunks(path, config["gis_chunk_rows"])
+        ]
+        for part, (path, groups, rows) in enumerate(table_chunks):
+            chunks.append({
+                "table": table,
+                "part": part,
+                "n_parts": len(table_chunks),
+                "est_rows": rows,
+                "file": path,
+                "row_groups": groups,
+                "geometry": geometry,
+                "encoding": encoding,
+                "source_epsg": epsg,
+                "target_epsg": target_epsg,
+                "output_path": os.path.join(chunk_dir, f"part_{part:05d}.fgb"),
+            })
+        planned[table] = {"source": key, "outputs": outputs, "chunk_dir": chunk_dir, "epsg": epsg}
+        sizes[table] = {"num_rows": latest["rows"]}
+    return {"chunks": chunks, "tables": planned, "skipped": skipped, "sizes": sizes}
+
+
+# -------------------------------------------------------------
+# STEG 1: DELAR (OMPROJICERING)
+# -------------------------------------------------------------
+def _spatial_reference(epsg):
+    from osgeo import osr
+
+    if epsg is None:
+        return None
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(int(epsg))
+    # x = öst/longitud även för geografiska koordinatsystem (som i WKB/WKT från Oracle)
+    srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+    return srs
+
+
+def _field_type(arrow_type):
+    from osgeo import ogr
+
+    if pa.types.is_boolean(arrow_type):
+        return ogr.OFTInteger
+    if pa.types.is_integer(arrow_type):
+        return ogr.OFTInteger64
+    if pa.types.is_floating(arrow_type) or pa.types.is_decimal(arrow_type):
+        return ogr.OFTReal
+    if pa.types.is_date(arrow_type):
+        return ogr.OFTDate
+    if pa.types.is_timestamp(arrow_type):
+        return ogr.OFTDateTime
+    if pa.types.is_binary(arrow_type) or pa.types.is_large_binary(arrow_type):
+        return ogr.OFTBinary
+    return ogr.OFTString
+
+
+def _set_field(feature, index, field_type, value):
+    from osgeo import ogr
+
+    if field_type == ogr.OFTBinary:
+        feature.SetFieldBinaryFromHexString(index, value.hex())
+    elif field_type == ogr.OFTReal:
+        feature.SetField(index, float(value))
+    elif field_type in (ogr.OFTInteger, ogr.OFTInteger64):
+        feature.SetField(index, int(value))
+    elif field_type in (ogr.OFTDate, ogr.OFTDateTime):
+        feature.SetField(index, value.isoformat())
+    else:
+        feature.SetField(index, str(value))
+
+
+def convert_chunk(item):
+    """
+    Steg 1: en del av en fil till en FlatGeobuf utan index, omprojicerad.
+
+    Returnerar:
+        tuple: (label, status, info) – info = antal objekt eller felmeddelande.
+    """
+    from osgeo import ogr, osr
+
+    ogr.UseExceptions()
+    osr.UseExceptions()
+    label = f"{item['table']}[{item['part'] + 1}/{item['n_parts']}]"
+    tmp_path = temporary_path(item["output_path"])
+    try:
+        table = pq.ParquetFile(item["file"]).read_row_groups(item["row_groups"])
+        source = _spatial_reference(item["source_epsg"])
+        target = _spatial_reference(item["target_epsg"]) if source is not None else None
+        transform = None
+        if target is not None and not source.IsSame(target):
+            # En transformation per del, återanvänd för alla geometrier
+            transform = osr.CoordinateTransformation(source, target)
+
+        os.makedirs(os.path.dirname(item["output_path"]), exist_ok=True)
+        dataset = ogr.GetDriverByName("FlatGeobuf").CreateDataSource(tmp_path)
+        layer = dataset.CreateLayer(
+            item["table"].lower(), srs=target or source, geom_type=ogr.wkbUnknown, options=["SPATIAL_INDEX=NO"]
+        )
+        # Attributen är alla kolumner utom geometrin och bbox-kolumnen från klustringen
+        fields = []
+        for field in table.schema:
+            if field.name == item["geometry"] or field.type == BBOX_TYPE:
+                continue
+            field_type = _field_type(field.type)
+            layer.CreateField(ogr.FieldDefn(field.name, field_type))
+            fields.append((field.name, field_type))
+        definition = layer.GetLayerDefn()
+
+        values = [table.column(name).to_pylist() for name, _ in fields]
+        geometries = table.column(item["geometry"]).to_pylist()
+        parse = ogr.CreateGeometryFromWkb if item["encoding"] == "wkb" else ogr.CreateGeometryFromWkt
+        for row, data in enumerate(geometries):
+            feature = ogr.Feature(definition)
+            for index, (_, field_type) in enumerate(fields):
+                value = values[index][row]
+                if value is not None:
+                    _set_field(feature, index, field_type, value)
+            if data is not None:
+                geometry = parse(data)
+                if transform is not None:
+                    geometry.Transform(transform)
+                feature.SetGeometryDirectly(geometry)
+            layer.CreateFeature(feature)
+        dataset = None  # stänger och skriver filen
+        os.replace(tmp_path, item["output_path"])
+        return (label, "ok", table.num_rows)
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return (label, "error", str(e))
+
+
+# -------------------------------------------------------------
+# STEG 2: FORMAT (SPATIALT INDEX)
+# -------------------------------------------------------------
+def union_vrt(layer, paths):
+    """OGR VRT (XML) som läser delarna som ett lager."""
+    sources = "".join(
+        f'<OGRVRTLayer name="{layer}_{i}"><SrcDataSource>{escape(path)}</SrcDataSource>'
+        f"<SrcLayer>{layer}</SrcLayer></OGRVRTLayer>"
+        for i, path in enumerate(paths)
+    )
+    return f'<OGRVRTDataSource><OGRVRTUnionLayer name="{layer}">{sources}</OGRVRTUnionLayer></OGRVRTDataSource>'
+
+
+def build_output(item):
+    """
+    Steg 2: tabellens delar till ett format med spatialt index.
+
+    Returnerar:
+        tuple: (label, status, info) – info = sökväg eller felmeddelande.
+    """
+    from osgeo import gdal
+
+    gdal.UseExceptions()
+    label = f"{item['table']} → {item['format']}"
+    driver, _, layer_options, dataset_options = GIS_FORMATS[item["format"]]
+    tmp_path = temporary_path(item["output_path"])
+    try:
+        if gdal.GetDriverByName(driver) is None:
+            raise RuntimeError(f"GDAL saknar drivrutinen {driver} (PMTiles kräver GDAL >= 3.8)")
+        layer = item["table"].lower()
+        gdal.VectorTranslate(
+            tmp_path,
+            union_vrt(layer, item["chunks"]),
+            options=gdal.VectorTranslateOptions(
+                format=driver,
+                layerName=layer,
+                layerCreationOptions=layer_options,
+                datasetCreationOptions=dataset_options,
+            ),
+        )
+        os.replace(tmp_path, item["output_path"])
+        return (label, "ok", item["output_path"])
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return (label, "error", str(e))
+
+
+# -------------------------------------------------------------
+# KÖRNING
+# -------------------------------------------------------------
+def run_gis_conversion(config, tables=None, formats=None, force=False, dry_run=False):
+    """
+    Konverterar ändrade geometritabeller till GIS-formaten.
+
+    Parametrar:
+        config (dict): Från config.load_config (parquet_dir, gis_dir, gis_formats,
+                       gis_target_srid, gis_chunk_rows, workers, catalog_cache).
+        tables (list[str] | None): Bara dessa tabeller (annars alla med geometri).
+        formats (tuple[str] | None): Format (standard: GIS_FORMATS i .env).
+        force (bool): Konvertera även oförändrade tabeller.
+        dry_run (bool): Skriv bara ut planen.
+
+    Returnerar:
+        dict: {tabell: {"status", "outputs", "features"}} för de konverterade tabellerna.
+    """
+    from multiprocessing import Pool
+
+    formats = formats or config["gis_formats"]
+    gis_dir = config["gis_dir"]
+    plan = plan_conversion(config, tables=tables, formats=formats, force=force)
+    for table in plan["skipped"]:
+        print_with_time(f"⏭️ {table}: oförändrad sedan förra konverteringen")
+    print_with_time(
+        f"🌍 {len(plan['tables'])} tabeller → {', '.join(formats)} i {gis_dir} "
+        f"({len(plan['chunks'])} delar, SRID {config['gis_target_srid'] or 'som källan'})"
+    )
+    if dry_run or not plan["tables"]:
+        return {}
+
+    results = {table: {"status": "ok", "outputs": {}, "features": 0} for table in plan["tables"]}
+    with Pool(processes=config["workers"]) as pool:
+        for item, (label, status, info), timing in run_largest_first(pool, convert_chunk, plan["chunks"], plan["sizes"]):
+            if status != "ok":
+                results[item["table"]]["status"] = "error"
+                print_with_time(f"⚠️ {label}: {info}")
+                continue
+            results[item["table"]]["features"] += info
+            print_with_time(f"🧩 {label}: {info} objekt på {timing['end'] - timing['start']:.1f}s")
+
+        outputs = [
+            {
+                "table": table,
+                "format": fmt,
+                "n_parts": 1,
+                "chunks": [c["output_path"] for c in plan["chunks"] if c["table"] == table],
+                "output_path": path,
+            }
+            for table, info in plan["tables"].items()
+            if results[table]["status"] == "ok"
+            for fmt, path in info["outputs"].items()
+        ]
+        for item, (label, status, info), timing in run_largest_first(pool, build_output, outputs, plan["sizes"]):
+            if status != "ok":
+                results[item["table"]]["status"] = "error"
+                print_with_time(f"⚠️ {label}: {info}")
+                continue
+            results[item["table"]]["outputs"][item["format"]] = info
+            print_with_time(f"🗺️ {label}: {info} på {timing['end'] - timing['start']:.1f}s")
+
+    # Bara helt lyckade tabeller räknas som konverterade; delarna tas bort i båda fallen
+    state_path = os.path.join(gis_dir, GIS_STATE_FILE_NAME)
+    state = load_manifest(state_path) or {}
+    for table, info in plan["tables"].items():
+        shutil.rmtree(info["chunk_dir"], ignore_errors=True)
+        if results[table]["status"] == "ok":
+            state[table] = {"source": info["source"], "outputs": info["outputs"], "source_srid": info["epsg"]}
+    os.makedirs(gis_dir, exist_ok=True)
+    save_manifest(state_path, state)
+
+    failed = [t for t, r in results.items() if r["status"] != "ok"]
+    if failed:
+        print_with_time(f"⚠️ {len(failed)} tabeller kunde inte konverteras: {failed}")
+    print_with_time(f"🎉 GIS-konvertering klar ({len(results) - len(failed)} av {len(results)} tabeller)")
+    return results
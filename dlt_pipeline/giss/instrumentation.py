@@ -0,0 +1,364 @@
+## detta är filen dlt_pipeline/giss/instrumentation.py
+
+"""
+Tidmätning per steg och tabell för exporten.
+
+Varje arbetsenhet mäts med en StageTimer som följer med genom
+export.export_table och streaming.stream_query_to_parquet:
+
+    catalog      kolumnerna från ALL_TAB_COLUMNS (bara om de inte kom med arbetsenheten)
+    connect      lån av session ur poolen (inklusive ping)
+    lob_probe    MAX(DBMS_LOB.GETLENGTH) för CLOB/BLOB-kolumnerna
+    execute      cursor.execute
+    fetch        cursor.fetchmany (nätverk och drivrutinens typkonvertering)
+    lob_read     read() på LOB-locatorer
+    convert      rader -> Arrow (RecordBatch) eller pd.read_sql i pandas-vägen
+    observe      GeoParquet-metadata (WKB)
+    write        Parquet-skrivning
+    cluster      spatial klustring (SPATIAL_SORT)
+
+Med PIPELINE=true (spool.py) körs fetch, convert och write samtidigt och
+tillkommer:
+
+    backpressure hämtningen väntar på plats i kön till konverteringen
+    spill        RecordBatches som inte ryms i minnet skrivs till Arrow IPC
+    spool_read   spolade batchar läses tillbaka (minnesmappat)
+
+Tiden för varje steg summeras över alla batchar, tillsammans med rader,
+bytes och antal anrop. Antalet nätverksrundresor uppskattas ur
+arraysize (en per execute plus ceil(rader / arraysize) per fetchmany) –
+drivrutinen redovisar dem inte.
+
+Måtten skickas tillbaka i arbetsenhetens details och skrivs av
+huvudprocessen som JSON-rader till {PARQUET_DIR}/_export_events.jsonl:
+
+    {"event": "run_start" | "plan" | "unit" | "stage" | "run_end", "run_id", "ts", ...}
+
+Valfritt skrivs även Prometheus-mått (textfilsformatet för node_exporters
+textfile collector, METRICS_PATH) och en trace i OpenTelemetrys
+OTLP/JSON-format (TRACE_PATH), utan andra beroenden. I trace-filen är
+ett steg ett spann från första till sista gången det kördes i enheten,
+med den summerade tiden som attributet busy_seconds.
+"""
+
+import hashlib
+import json
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# -------------------------------------------------------------
+# STANDARDVÄRDEN
+# -------------------------------------------------------------
+EVENTS_FILE_NAME = "_export_events.jsonl"
+DEFAULT_SUMMARY_TOP = 5
+METRIC_PREFIX = "giss_export"
+TRACE_SERVICE_NAME = "giss-export"
+
+
+def peak_rss_bytes(children=False):
+    """Största RSS för processen (eller dess avslutade barnprocesser) i bytes."""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss är kB på Linux men bytes på macOS
+    return usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+# -------------------------------------------------------------
+# TIDMÄTNING
+# -------------------------------------------------------------
+class StageTimer:
+    """Summerad tid, rader, bytes och anrop per steg för en arbetsenhet."""
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+
+    def add(self, stage, seconds, rows=0, n_bytes=0, calls=1, start=None):
+        """Lägger till ett anrop av steget (start = time.time() när det började)."""
+        end = time.time()
+        start = end - seconds if start is None else start
+        entry = self.stages.get(stage)
+        if entry is None:
+            entry = self.stages[stage] = {
+                "seconds": 0.0, "rows": 0, "bytes": 0, "calls": 0, "start": start, "end": end,
+            }
+        entry["seconds"] += seconds
+        entry["rows"] += rows
+        entry["bytes"] += n_bytes
+        entry["calls"] += calls
+        entry["end"] = end
+
+    @contextmanager
+    def stage(self, stage, rows=0, n_bytes=0):
+        """Mäter tiden för with-blocket som ett anrop av steget."""
+        start, started = time.perf_counter(), time.time()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start, rows=rows, n_bytes=n_bytes, start=started)
+
+    def count(self, counter, value=1):
+        """Räknar upp en räknare, t.ex. "round_trips"."""
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def as_dict(self):
+        """Picklebar/JSON-vänlig form (skickas tillbaka från workern)."""
+        return {
+            "stages": {
+                name: {**entry, "seconds": round(entry["seconds"], 4)} for name, entry in self.stages.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+
+# -------------------------------------------------------------
+# HÄNDELSER (JSON-RADER)
+# -------------------------------------------------------------
+class EventLog:
+    """Skriver händelser som JSON-rader (en rad per händelse, filen växer mellan körningar)."""
+
+    def __init__(self, path, run_id):
+        self.path = path
+        self.run_id = run_id
+        self._file = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = open(path, "a", encoding="utf-8")
+
+    def emit(self, event, **fields):
+        if self._file is None:
+            return
+        record = {"event": event, "run_id": self.run_id, "ts": datetime.now().isoformat(timespec="milliseconds")}
+        record.update(fields)
+        self._file.write(json.dumps(record, default=str) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def emit_unit(events, item, result, timing):
+    """En "unit"-händelse och en "stage"-händelse per steg för en klar arbetsenhet."""
+    label, status, info, details = result
+    metrics = details.get("metrics", {})
+    counters = metrics.get("counters", {})
+    events.emit(
+        "unit",
+        table=item["table"],
+        label=label,
+        status=status,
+        rows=info if status == "ok" else None,
+        error=None if status == "ok" else info,
+        bytes=details.get("bytes"),
+        seconds=round(timing["end"] - timing["start"], 3),
+        round_trips=counters.get("round_trips"),
+        spilled_batches=counters.get("spilled_batches"),
+        rss_bytes=details.get("rss_bytes"),
+        worker=timing.get("worker"),
+        attempts=details.get("attempts"),
+    )
+    for stage, entry in metrics.get("stages", {}).items():
+        events.emit(
+            "stage",
+            table=item["table"],
+            label=label,
+            stage=stage,
+            seconds=entry["seconds"],
+            rows=entry["rows"],
+            bytes=entry["bytes"],
+            calls=entry["calls"],
+        )
+
+
+# -------------------------------------------------------------
+# SAMMANFATTNING
+# -------------------------------------------------------------
+def summarize_metrics(finished, run_stages=None):
+    """
+    Summerar körningens arbetsenheter per tabell och per steg.
+
+    Parametrar:
+        finished (list): (item, result, timing) från run_export.
+        run_stages (dict | None): StageTimer.as_dict()["stages"] för huvudprocessens steg (planering m.m.).
+
+    Returnerar:
+        dict: {"tables": {tabell: {"seconds", "rows", "bytes", "units", "round_trips", "stages"}},
+               "stages": {steg: {"seconds", "rows", "bytes", "calls"}},
+               "run_stages": {...}, "workers": {worker: största RSS}}
+    """
+    tables, stages, workers = {}, {}, {}
+    for item, (_, status, info, details), timing in finished:
+        metrics = details.get("metrics", {})
+        table = tables.setdefault(
+            item["table"], {"seconds": 0.0, "rows": 0, "bytes": 0, "units": 0, "round_trips": 0, "stages": {}}
+        )
+        table["seconds"] += timing["end"] - timing["start"]
+        table["units"] += 1
+        table["round_trips"] += metrics.get("counters", {}).get("round_trips", 0)
+        if status == "ok":
+            table["rows"] += info
+            table["bytes"] += details.get("bytes") or 0
+        for stage, entry in metrics.get("stages", {}).items():
+            table["stages"][stage] = table["stages"].get(stage, 0.0) + entry["seconds"]
+            total = stages.setdefault(stage, {"seconds": 0.0, "rows": 0, "bytes": 0, "calls": 0})
+            for key in total:
+                total[key] += entry[key]
+        if details.get("rss_bytes"):
+            worker = timing.get("worker", timing.get("pid"))
+            workers[worker] = max(workers.get(worker, 0), details["rss_bytes"])
+    return {
+        "tables": tables,
+        "stages": stages,
+        "run_stages": {name: entry["seconds"] for name, entry in (run_stages or {}).items()},
+        "workers": workers,
+    }
+
+
+def print_summary(summary, top=DEFAULT_SUMMARY_TOP):
+    """Skriver ut de långsammaste tabellerna och stegen."""
+    tables = sorted(summary["tables"].items(), key=lambda kv: kv[1]["seconds"], reverse=True)
+    if tables:
+        print(f"🐢 Långsammaste tabellerna (av {len(tables)}):")
+        for name, table in tables[:top]:
+            slowest = max(table["stages"].items(), key=lambda kv: kv[1], default=None)
+            rate = f", {table['rows'] / table['seconds']:,.0f} rader/s" if table["seconds"] > 0 else ""
+            step = f", mest tid i {slowest[0]} ({slowest[1]:.1f}s)" if slowest else ""
+            print(
+                f"  - {name}: {table['seconds']:.1f}s, {table['rows']:,} rader, "
+                f"{table['bytes'] / 1e6:.1f} MB{rate}{step}"
+            )
+
+    stages = {name: entry["seconds"] for name, entry in summary["stages"].items()}
+    total = sum(stages.values())
+    if stages:
+        print("⏱️ Tid per steg (summerad över alla workers):")
+        for name, seconds in sorted(stages.items(), key=lambda kv: kv[1], reverse=True)[:top * 2]:
+            share = f" ({seconds / total:.0%})" if total > 0 else ""
+            print(f"  - {name}: {seconds:.1f}s{share}")
+    if summary["run_stages"]:
+        # Huvudprocessens steg (export är väggklockan för alla arbetsenheter)
+        print("  huvudprocessen: " + ", ".join(f"{name} {s:.1f}s" for name, s in summary["run_stages"].items()))
+
+    if summary["workers"]:
+        worker, rss = max(summary["workers"].items(), key=lambda kv: kv[1])
+        print(f"🧠 Största RSS: {rss / 1e6:.0f} MB ({worker})")
+
+
+# -------------------------------------------------------------
+# PROMETHEUS OCH TRACE
+# -------------------------------------------------------------
+def _label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _metric_lines(name, help_text, samples):
+    lines = [f"# HELP {METRIC_PREFIX}_{name} {help_text}", f"# TYPE {METRIC_PREFIX}_{name} gauge"]
+    for labels, value in samples:
+        label_text = ",".join(f'{key}="{_label_value(v)}"' for key, v in labels.items())
+        lines.append(f"{METRIC_PREFIX}_{name}{{{label_text}}} {value}")
+    return lines
+
+
+def write_prometheus(path, summary, run_id, seconds, statuses):
+    """
+    Skriver måtten i Prometheus textformat (node_exporter textfile collector).
+
+    Parametrar:
+        statuses (dict[str, int]): Antal arbetsenheter per status ("ok", "error").
+    """
+    tables = summary["tables"].items()
+    stages = [((table, stage), secs) for table, t in tables for stage, secs in t["stages"].items()]
+    lines = []
+    lines += _metric_lines("run_seconds", "Total tid för senaste körningen", [({"run_id": run_id}, round(seconds, 3))])
+    lines += _metric_lines("run_units", "Arbetsenheter per status", [({"status": s}, n) for s, n in statuses.items()])
+    lines += _metric_lines("run_stage_seconds", "Tid i huvudprocessens steg",
+                           [({"stage": s}, round(v, 4)) for s, v in summary["run_stages"].items()])
+    lines += _metric_lines("table_seconds", "Exporttid per tabell (summa över delar)",
+                           [({"table": t}, round(v["seconds"], 3)) for t, v in tables])
+    lines += _metric_lines("table_rows", "Exporterade rader per tabell", [({"table": t}, v["rows"]) for t, v in tables])
+    lines += _metric_lines("table_bytes", "Skrivna Parquet-bytes per tabell", [({"table": t}, v["bytes"]) for t, v in tables])
+    lines += _metric_lines("table_round_trips", "Uppskattade rundresor per tabell",
+                           [({"table": t}, v["round_trips"]) for t, v in tables])
+    lines += _metric_lines("stage_seconds", "Tid per tabell och steg",
+                           [({"table": t, "stage": s}, round(v, 4)) for (t, s), v in stages])
+    lines += _metric_lines("worker_peak_rss_bytes", "Största RSS per worker",
+                           [({"worker": w}, v) for w, v in summary["workers"].items()])
+    lines += _metric_lines("last_run_timestamp_seconds", "När körningen blev klar", [({}, int(time.time()))])
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+
+
+def _span_id(*parts):
+    return hashlib.sha256("/".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:16]
+
+
+def _attribute_value(value):
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    return {"stringValue": str(value)}
+
+
+def _span(trace_id, span_id, parent_id, name, start, end, attributes):
+    return {
+        "traceId": trace_id,
+        "spanId": span_id,
+        "parentSpanId": parent_id or "",
+        "name": name,
+        "kind": 1,
+        "startTimeUnixNano": str(int(start * 1e9)),
+        "endTimeUnixNano": str(int(end * 1e9)),
+        "attributes": [
+            {"key": key, "value": _attribute_value(value)} for key, value in attributes.items() if value is not None
+        ],
+    }
+
+
+def write_trace(path, run_id, start, end, finished, run_timer=None):
+    """
+    Skriver körningen som en trace i OTLP/JSON-format: ett rotspann för
+    körningen, ett spann per huvudprocessteg och arbetsenhet och ett per
+    steg i arbetsenheten.
+    """
+    trace_id = _span_id("trace", run_id) + _span_id("trace", run_id, 1)
+    root = _span_id(run_id)
+    spans = [_span(trace_id, root, None, "export", start, end, {"run_id": run_id})]
+    for stage, entry in (run_timer.stages if run_timer else {}).items():
+        spans.append(_span(trace_id, _span_id(run_id, "run", stage), root, stage, entry["start"], entry["end"],
+                           {"busy_seconds": entry["seconds"]}))
+    for item, (label, status, info, details), timing in finished:
+        unit = _span_id(run_id, label)
+        spans.append(_span(trace_id, unit, root, label, timing["start"], timing["end"], {
+            "table": item["table"], "status": status, "worker": timing.get("worker"),
+            "rows": info if status == "ok" else None, "error": None if status == "ok" else info,
+        }))
+        for stage, entry in details.get("metrics", {}).get("stages", {}).items():
+            spans.append(_span(trace_id, _span_id(run_id, label, stage), unit, stage, entry["start"], entry["end"], {
+                "busy_seconds": float(entry["seconds"]), "rows": entry["rows"] or None, "calls": entry["calls"],
+            }))
+
+    trace = {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": TRACE_SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": "dlt_pipeline.giss"}, "spans": spans}],
+        }]
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(trace, f)
@@ -0,0 +1,179 @@
+## detta är filen dlt_pipeline/giss/manifest.py
+
+"""
+Körmanifest och återupptagning av avbrutna exporter.
+
+Varje körning skriver {PARQUET_DIR}/_run_manifest.json med en post per
+arbetsenhet (hel tabell, partition eller delta):
+
+    {
+        "run_id": "20251001_120000",
+        "mode": "partitioned",
+        "marks": {"GAVD": {...}},          # inkrementella märken från sonderingen
+        "units": {
+            "GAVD[2/4]": {"table": "GAVD", "part": 1, "n_parts": 4, "kind": "full",
+                          "where": "...", "output_path": "...", "status": "ok",
+                          "rows": 104233, "checksum": "sha256:...", "attempts": 1,
+                          "seconds": 12.3, "error": None},
+            ...
+        }
+    }
+
+Status är "pending" tills enheten är klar och sedan "ok" eller "error".
+Med --resume körs bara enheter som inte är "ok", eller vars fil saknas
+eller inte längre stämmer med checksumman. Manifestet skrivs atomiskt
+efter varje enhet, så det är aktuellt även om processen dör.
+
+Transienta fel (I/O-fel, tappade anslutningar) känns igen på meddelandet
+och görs om med exponentiell backoff av exporten.
+"""
+
+import hashlib
+import json
+import os
+
+from dlt_pipeline.giss.partition import work_item_label
+
+# -------------------------------------------------------------
+# STANDARDVÄRDEN
+# -------------------------------------------------------------
+MANIFEST_FILE_NAME = "_run_manifest.json"
+DEFAULT_RETRIES = 3          # nya försök efter ett transient fel
+DEFAULT_RETRY_BACKOFF = 5.0  # sekunder före första nya försöket, dubbleras varje gång
+
+# Felmeddelanden som tyder på tillfälliga fel (nätverk, I/O, omstartad databas)
+TRANSIENT_ERROR_PATTERNS = (
+    "Errno 5",
+    "Input/output error",
+    "ORA-03113",  # end-of-file on communication channel
+    "ORA-03114",  # not connected to ORACLE
+    "ORA-03135",  # connection lost contact
+    "ORA-12170",  # connect timeout
+    "ORA-12537",  # connection closed
+    "ORA-12541",  # no listener
+    "ORA-25408",  # can not safely replay call
+    "DPY-4011",   # the database or network closed the connection
+    "DPI-1080",   # connection was closed by ORA-%d
+    "Broken pipe",
+    "Connection reset",
+)
+
+_UNIT_FIELDS = ("table", "part", "n_parts", "where", "est_rows", "output_path", "kind")
+
+
+# -------------------------------------------------------------
+# HJÄLPFUNKTIONER
+# -------------------------------------------------------------
+def is_transient_error(message):
+    """True om felmeddelandet tyder på ett tillfälligt fel som är värt att försöka igen."""
+    return any(pattern in str(message) for pattern in TRANSIENT_ERROR_PATTERNS)
+
+
+def file_checksum(path, chunk_size=1024 * 1024):
+    """SHA-256 för en fil, som "sha256:<hex>"."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return "sha256:" + digest.hexdigest()
+
+
+def temporary_path(path):
+    """
+    Temporär fil bredvid målfilen. Namnet börjar med punkt och slutar inte på
+    .parquet, så att halvskrivna filer aldrig matchar *.parquet i PARQUET_DIR.
+    """
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+
+
+# -------------------------------------------------------------
+# MANIFEST-FIL
+# -------------------------------------------------------------
+def load_manifest(manifest_path):
+    """Läser manifestet (None om det saknas)."""
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest_path, manifest):
+    """Skriver manifestet atomiskt (temporär fil + os.replace)."""
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, manifest_path)
+
+
+def new_manifest(run_id, mode, work_items, marks=None):
+    """Manifest för en ny körning där alla arbetsenheter är "pending"."""
+    return {
+        "run_id": run_id,
+        "mode": mode,
+        "marks": marks or {},
+        "units": {
+            work_item_label(item): {
+                **{key: item.get(key) for key in _UNIT_FIELDS},
+                "status": "pending",
+                "rows": None,
+                "checksum": None,
+                "attempts": 0,
+                "seconds": None,
+                "error": None,
+            }
+            for item in work_items
+        },
+    }
+
+
+def record_result(manifest, item, result, timing):
+    """
+    Uppdaterar enhetens post med resultatet från export.export_work_item.
+
+    Returnerar:
+        dict: Den uppdaterade posten.
+    """
+    label, status, info, details = result
+    unit = manifest["units"].setdefault(label, {key: item.get(key) for key in _UNIT_FIELDS})
+    unit.update(
+        status=status,
+        rows=info if status == "ok" else None,
+        error=None if status == "ok" else info,
+        checksum=details.get("checksum"),
+        attempts=unit.get("attempts", 0) + details.get("attempts", 1),
+        seconds=round(timing["end"] - timing["start"], 3),
+    )
+    return unit
+
+
+# -------------------------------------------------------------
+# ÅTERUPPTAGNING
+# -------------------------------------------------------------
+def unit_is_complete(unit, verify_checksum=True):
+    """True om enheten är klar och filen finns (och stämmer med checksumman)."""
+    if unit.get("status") != "ok" or not os.path.exists(unit["output_path"]):
+        return False
+    if verify_checksum and unit.get("checksum"):
+        return file_checksum(unit["output_path"]) == unit["checksum"]
+    return True
+
+
+def units_to_resume(manifest, verify_checksum=True):
+    """
+    Arbetsenheter (samma format som partition.build_work_items) som måste
+    köras om: misslyckade, aldrig klara eller med saknad/ändrad fil.
+    """
+    return [
+        {key: unit.get(key) for key in _UNIT_FIELDS}
+        for unit in manifest["units"].values()
+        if not unit_is_complete(unit, verify_checksum=verify_checksum)
+    ]
+
+
+def table_is_complete(manifest, table):
+    """True om alla enheter för tabellen i manifestet är "ok"."""
+    units = [u for u in manifest["units"].values() if u["table"] == table]
+    return bool(units) and all(u["status"] == "ok" for u in units)
@@ -0,0 +1,172 @@
+## detta är filen dlt_pipeline/giss/partition.py
+
+"""
+Delar upp stora GISS-tabeller i flera arbetsenheter (partitioner).
+
+Varje partition är ett WHERE-villkor som exporteras av en egen worker till
+en egen Parquet-delfil i en katalog per tabell. Små tabeller blir en enda
+arbetsenhet som exporteras till en vanlig fil. Schemaläggaren blandar
+delarna med hela tabeller så att alla workers hålls sysselsatta.
+
+Strategier:
+    - "pk":   intervall över en numerisk primärnyckel (MIN/MAX delas i N lika stora intervall)
+    - "hash": ORA_HASH(ROWID, N-1) = i, fungerar för alla tabeller
+
+ROWID-extents (DBA_EXTENTS) kräver DBA-behörighet och används därför inte.
+"""
+
+import os
+
+import pandas as pd
+
+# -------------------------------------------------------------
+# STANDARDVÄRDEN
+# -------------------------------------------------------------
+DEFAULT_PARTITION_MIN_ROWS = 200_000  # tabeller med fler rader delas upp
+
+
+# -------------------------------------------------------------
+# KATALOGFRÅGOR
+# -------------------------------------------------------------
+def get_table_row_estimates(conn, owner="GISS"):
+    """
+    Hämtar uppskattat antal rader per tabell från ALL_TABLES (senaste statistiken).
+
+    Returnerar:
+        dict[str, int]: tabellnamn -> antal rader (0 om statistik saknas)
+    """
+    query = f"SELECT table_name, num_rows FROM all_tables WHERE owner = '{owner}'"
+    df = pd.read_sql(query, con=conn)
+    df.columns = [c.upper() for c in df.columns]
+    return {
+        row["TABLE_NAME"]: int(row["NUM_ROWS"]) if pd.notna(row["NUM_ROWS"]) else 0
+        for _, row in df.iterrows()
+    }
+
+
+def get_numeric_primary_key(conn, table, owner="GISS"):
+    """
+    Returnerar namnet på tabellens primärnyckel om den består av en enda
+    NUMBER-kolumn, annars None.
+    """
+    query = f"""
+        SELECT cc.column_name, tc.data_type
+        FROM all_constraints c
+        JOIN all_cons_columns cc
+          ON cc.owner = c.owner AND cc.constraint_name = c.constraint_name
+        JOIN all_tab_columns tc
+          ON tc.owner = cc.owner AND tc.table_name = cc.table_name AND tc.column_name = cc.column_name
+        WHERE c.owner = '{owner}' AND c.table_name = '{table}' AND c.constraint_type = 'P'
+    """
+    df = pd.read_sql(query, con=conn)
+    df.columns = [c.upper() for c in df.columns]
+    if len(df) != 1 or df["DATA_TYPE"].iloc[0] != "NUMBER":
+        return None
+    return df["COLUMN_NAME"].iloc[0]
+
+
+def get_key_range(conn, table, key, owner="GISS"):
+    """
+    Returnerar (min, max) för en nyckelkolumn, eller None om tabellen är tom.
+    """
+    df = pd.read_sql(f"SELECT MIN({key}) AS lo, MAX({key}) AS hi FROM {owner}.{table}", con=conn)
+    df.columns = [c.upper() for c in df.columns]
+    lo, hi = df["LO"].iloc[0], df["HI"].iloc[0]
+    if pd.isna(lo) or pd.isna(hi):
+        return None
+    return int(lo), int(hi)
+
+
+# -------------------------------------------------------------
+# PLANERING
+# -------------------------------------------------------------
+def plan_table_partitions(n_parts, key=None, key_range=None):
+    """
+    Bygger WHERE-villkor som tillsammans täcker hela tabellen exakt en gång.
+
+    Parametrar:
+        n_parts (int): Antal partitioner.
+        key (str | None): Numerisk primärnyckel. Om None används ORA_HASH(ROWID).
+        key_range (tuple[int, int] | None): (min, max) för nyckeln.
+
+    Returnerar:
+        list[str]: Ett WHERE-villkor per partition.
+    """
+    if key is None or key_range is None:
+        return [f"ORA_HASH(ROWID, {n_parts - 1}) = {i}" for i in range(n_parts)]
+
+    lo, hi = key_range
+    step = max((hi - lo + 1) // n_parts, 1)
+    predicates = []
+    for i in range(n_parts):
+        start = lo + i * step
+        if i == 0:
+            predicates.append(f"{key} < {start + step}")
+        elif i == n_parts - 1:
+            predicates.append(f"{key} >= {start}")
+        else:
+            predicates.append(f"{key} >= {start} AND {key} < {start + step}")
+    return predicates
+
+
+def build_work_items(
+    conn,
+    tables,
+    output_dir,
+    timestamp,
+    n_parts,
+    min_rows=DEFAULT_PARTITION_MIN_ROWS,
+    row_estimates=None,
+    owner="GISS",
+):
+    """
+    Skapar arbetsenheter för exporten. Tabeller med fler än min_rows rader
+    delas upp i n_parts delar som skrivs till {output_dir}/{tabell}_{timestamp}/part-NNNNN.parquet,
+    övriga tabeller exporteras hela till {output_dir}/{tabell}_{timestamp}.parquet.
+
+    Returnerar:
+        list[dict]: En dict per arbetsenhet med nycklarna
+                    table, part, n_parts, where, est_rows, output_path, kind.
+    """
+    if row_estimates is None:
+        row_estimates = get_table_row_estimates(conn, owner=owner)
+
+    items = []
+    for table in tables:
+        est_rows = row_estimates.get(table, 0)
+        base = os.path.join(output_dir, f"{table.lower()}_{timestamp}")
+
+        if n_parts < 2 or est_rows < min_rows:
+            items.append({
+                "table": table,
+                "part": None,
+                "n_parts": 1,
+                "where": None,
+                "est_rows": est_rows,
+                "output_path": base + ".parquet",
+                "kind": "full",
+            })
+            continue
+
+        key = get_numeric_primary_key(conn, table, owner=owner)
+        key_range = get_key_range(conn, table, key, owner=owner) if key else None
+        predicates = plan_table_partitions(n_parts, key=key, key_range=key_range)
+
+        for i, where in enumerate(predicates):
+            items.append({
+                "table": table,
+                "part": i,
+                "n_parts": n_parts,
+                "where": where,
+                "est_rows": est_rows // n_parts,
+                "output_path": os.path.join(base, f"part-{i:05d}.parquet"),
+                "kind": "full",
+            })
+    return items
+
+
+def work_item_label(item):
+    """Kort namn för loggning, t.ex. 'TDOK' eller 'TDOK[2/4]'."""
+    if item["part"] is None:
+        return item["table"]
+    return f"{item['table']}[{item['part'] + 1}/{item['n_parts']}]"
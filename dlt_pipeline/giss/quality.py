@@ -0,0 +1,260 @@
+## detta är filen dlt_pipeline/giss/quality.py
+
+"""
+Datakvalitet för numeriska kolumner: en aggregatfråga per tabell, parallellt
+över hela schemat, med en sparad rapport som exporten använder.
+
+För varje NUMBER/FLOAT-kolumn räknas i samma tabellskanning:
+
+    nulls            antal NULL
+    negatives        antal värden < 0
+    micro_negatives  antal värden i [-1e-6, 0) (ger ORA-22063 vid hämtning)
+    min / max        som text (TO_CHAR), så att även udda värden kan läsas
+    out_of_range     antal värden som inte ryms i kolumnens NUMBER(p,s)
+
+Misslyckas tabellens fråga (t.ex. ORA-22063 på ett korrupt värde) görs den
+om kolumn för kolumn för att hitta den eller de kolumner som inte går att läsa.
+
+Rapporten sparas i {PARQUET_DIR}/_quality_report.json och ger regler per
+kolumn (safe_cast_rules):
+
+    "safe_text"  kolumnen har negativa eller för stora värden och läses som
+                 TO_CHAR(CASE WHEN x < -1e-6 THEN NULL ...), även med typade tal
+    "exclude"    kolumnen går inte att läsa alls och hoppas över
+
+Reglerna ersätter den tidigare hårdkodade listan problematic_null_cols i
+queries.build_select_with_wkt_safe. Med typade tal (standard) rensas
+övriga numeriska kolumner på klienten (fetch.py).
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from dlt_pipeline.giss.connection import get_engine
+from dlt_pipeline.giss.manifest import save_manifest
+
+# -------------------------------------------------------------
+# STANDARDVÄRDEN
+# -------------------------------------------------------------
+QUALITY_REPORT_FILE_NAME = "_quality_report.json"
+NUMERIC_TYPES = ("NUMBER", "FLOAT", "DECIMAL", "BINARY_FLOAT", "BINARY_DOUBLE")
+MICRO_NEGATIVE_LIMIT = "-1e-6"  # samma gräns som fetch.NEGATIVE_MICRO_LIMIT
+
+_METRICS = ("NN", "NEG", "MICRO", "MIN", "MAX", "OOR")
+
+
+# -------------------------------------------------------------
+# FRÅGOR
+# -------------------------------------------------------------
+def numeric_columns(columns, exclude_columns=None):
+    """Numeriska kolumner (från katalogcachen) som ska kontrolleras."""
+    excluded = set(exclude_columns or [])
+    return [c for c in columns if c["data_type"] in NUMERIC_TYPES and c["name"] not in excluded]
+
+
+def _column_aggregates(index, column):
+    name = column["name"]
+    precision, scale = column.get("precision"), column.get("scale") or 0
+    if precision is not None and column["data_type"] in ("NUMBER", "DECIMAL"):
+        # NUMBER(p,s) rymmer |x| < 10^(p-s)
+        out_of_range = f"SUM(CASE WHEN ABS({name}) >= 1e{precision - scale} THEN 1 ELSE 0 END)"
+    else:
+        out_of_range = "0"
+    # Korta alias (C<n>_...) så att de ryms i Oracles 30 tecken
+    return [
+        f"COUNT({name}) AS C{index}_NN",
+        f"SUM(CASE WHEN {name} < 0 THEN 1 ELSE 0 END) AS C{index}_NEG",
+        f"SUM(CASE WHEN {name} < 0 AND {name} >= {MICRO_NEGATIVE_LIMIT} THEN 1 ELSE 0 END) AS C{index}_MICRO",
+        f"TO_CHAR(MIN({name})) AS C{index}_MIN",
+        f"TO_CHAR(MAX({name})) AS C{index}_MAX",
+        f"{out_of_range} AS C{index}_OOR",
+    ]
+
+
+def build_profile_query(table, columns, owner="GISS"):
+    """
+    En aggregatfråga som ger alla mått för alla kolumner i en skanning.
+
+    Parametrar:
+        columns (list[dict]): Numeriska kolumner från numeric_columns.
+    """
+    aggregates = ["COUNT(*) AS N_ROWS"]
+    for i, column in enumerate(columns):
+        aggregates.extend(_column_aggregates(i, column))
+    return f"SELECT {', '.join(aggregates)} FROM {owner.lower()}.{table}"
+
+
+def _int(value):
+    return int(value) if value is not None and not pd.isna(value) else 0
+
+
+def _parse_profile(row, columns):
+    n_rows = _int(row["N_ROWS"])
+    result = {}
+    for i, column in enumerate(columns):
+        values = {metric: row[f"C{i}_{metric}"] for metric in _METRICS}
+        result[column["name"]] = {
+            "data_type": column["data_type"],
+            "precision": column.get("precision"),
+            "scale": column.get("scale"),
+            "nulls": n_rows - _int(values["NN"]),
+            "negatives": _int(values["NEG"]),
+            "micro_negatives": _int(values["MICRO"]),
+            "min": values["MIN"],
+            "max": values["MAX"],
+            "out_of_range": _int(values["OOR"]),
+            "error": None,
+        }
+    return n_rows, result
+
+
+def _error_message(error):
+    # Första raden räcker (pandas/SQLAlchemy upprepar hela SQL-satsen)
+    return str(error).strip().splitlines()[0][:500]
+
+
+def _run_profile(engine, table, columns, owner):
+    df = pd.read_sql(build_profile_query(table, columns, owner), con=engine)
+    df.columns = [c.upper() for c in df.columns]  # säkerställ versaler
+    return _parse_profile(df.iloc[0], columns)
+
+
+# -------------------------------------------------------------
+# PROFILERING AV EN TABELL
+# -------------------------------------------------------------
+def profile_table(engine, table, columns, owner="GISS"):
+    """
+    Mått för alla numeriska kolumner i en tabell.
+
+    Returnerar:
+        dict: {"rows", "seconds", "scanned_at", "error", "columns": {kolumn: {...}}, "rules": {...}}
+    """
+    start = time.time()
+    report = {"rows": None, "error": None, "columns": {}}
+    if columns:
+        try:
+            report["rows"], report["columns"] = _run_profile(engine, table, columns, owner)
+        except Exception as e:
+            # En kolumn i taget för att hitta den som inte går att läsa
+            report["error"] = _error_message(e)
+            for column in columns:
+                try:
+                    report["rows"], profiled = _run_profile(engine, table, [column], owner)
+                    report["columns"].update(profiled)
+                except Exception as column_error:
+                    report["columns"][column["name"]] = {
+                        "data_type": column["data_type"],
+                        "error": _error_message(column_error),
+                    }
+    report["rules"] = safe_cast_rules(report)
+    report["seconds"] = round(time.time() - start, 3)
+    report["scanned_at"] = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return report
+
+
+def safe_cast_rules(table_report):
+    """
+    Regler per kolumn ur en tabells rapport: "exclude" för kolumner som inte
+    går att läsa, "safe_text" för kolumner med negativa eller för stora värden.
+    """
+    rules = {}
+    for name, stats in table_report.get("columns", {}).items():
+        if stats.get("error"):
+            rules[name] = "exclude"
+        elif stats.get("negatives") or stats.get("out_of_range"):
+            rules[name] = "safe_text"
+    return rules
+
+
+def scan_table_item(item):
+    """Arbetsenhet för scheduler.run_largest_first: {"table", "columns", "owner"} -> (tabell, rapport)."""
+    return item["table"], profile_table(get_engine(), item["table"], item["columns"], owner=item["owner"])
+
+
+# -------------------------------------------------------------
+# RAPPORT
+# -------------------------------------------------------------
+_report_cache = {"path": None, "mtime": None, "report": None}
+
+
+def load_quality_report(report_path):
+    """Läser rapporten (tom rapport om den saknas); läses om bara när filen ändras."""
+    if not os.path.exists(report_path):
+        return {"tables": {}}
+    mtime = os.path.getmtime(report_path)
+    if _report_cache["path"] != report_path or _report_cache["mtime"] != mtime:
+        with open(report_path, encoding="utf-8") as f:
+            _report_cache.update(path=report_path, mtime=mtime, report=json.load(f))
+    return _report_cache["report"]
+
+
+def save_quality_report(report_path, report):
+    """Skriver rapporten atomiskt."""
+    save_manifest(report_path, report)
+
+
+def quality_rules(config, table):
+    """Regler för en tabell ur den sparade rapporten ({} om tabellen inte har skannats)."""
+    report = load_quality_report(config["quality_report_path"])
+    return report.get("tables", {}).get(table.upper(), {}).get("rules", {})
+
+
+# -------------------------------------------------------------
+# SKANNING AV SCHEMAT
+# -------------------------------------------------------------
+def run_quality_scan(config, tables=None, all_tables=False):
+    """
+    Skannar tabellerna parallellt (en tråd per tabell, upp till WORKERS),
+    största tabellen först, och sparar rapporten.
+
+    Returnerar:
+        dict: Hela rapporten ({"updated_at", "owner", "tables": {...}}).
+    """
+    from multiprocessing.pool import ThreadPool
+
+    from dlt_pipeline.giss import config as giss_config
+    from dlt_pipeline.giss.catalog import get_columns, load_catalog
+    from dlt_pipeline.giss.connection import init_worker
+    from dlt_pipeline.giss.export import init_shared_pool, print_with_time, select_tables
+    from dlt_pipeline.giss.scheduler import load_size_cache, run_largest_first
+
+    giss_config.set_config(config)
+    init_worker(config["connection"])
+    engine = get_engine()
+    owner = config["owner"]
+
+    filtered_tables, _ = select_tables(engine, config, tables=tables, all_tables=all_tables)
+    catalog = load_catalog(engine, config["catalog_cache"], owner=owner)
+    items = [
+        {
+            "table": table,
+            "columns": numeric_columns(get_columns(catalog, table), config["exclude_columns"]),
+            "owner": owner,
+        }
+        for table in filtered_tables
+    ]
+    sizes = load_size_cache(config["size_cache"])
+
+    report = load_quality_report(config["quality_report_path"])
+    report = {**report, "owner": owner, "tables": dict(report.get("tables", {}))}
+    print_with_time(f"🔎 Kvalitetsskanning av {len(items)} tabeller med {config['workers']} trådar")
+
+    init_shared_pool(config, config["workers"])
+    with ThreadPool(processes=config["workers"]) as pool:
+        for item, (table, table_report), timing in run_largest_first(pool, scan_table_item, items, sizes):
+            report["tables"][table] = table_report
+            rules = table_report["rules"]
+            status = "⚠️" if rules or table_report["error"] else "✅"
+            print_with_time(
+                f"{status} {table}: {len(item['columns'])} kolumner, {table_report['rows']} rader, "
+                f"{timing['end'] - timing['start']:.1f}s" + (f" – regler {rules}" if rules else "")
+            )
+
+    report["updated_at"] = datetime.now().strftime("%Y%m%d_%H%M%S")
+    save_quality_report(config["quality_report_path"], report)
+    print_with_time(f"📒 Kvalitetsrapport: {config['quality_report_path']}")
+    return report
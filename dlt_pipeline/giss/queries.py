@@ -0,0 +1,120 @@
+## detta är filen dlt_pipeline/giss/queries.py
+
+"""
+SELECT-byggare och enkla katalogfrågor för GISS-schemat.
+
+Kolumnerna tas från katalogcachen (catalog.load_catalog); bara om de inte
+skickas in frågas ALL_TAB_COLUMNS för den enskilda tabellen.
+"""
+
+import pandas as pd
+
+from dlt_pipeline.giss.catalog import fetch_columns
+from dlt_pipeline.giss.fetch import geometry_alias
+
+
+# -------------------------------------------------------------
+# HJÄLPFUNKTIONER FÖR ORACLE
+# -------------------------------------------------------------
+def get_table_names(conn, owner="GISS"):
+    query = f"SELECT table_name FROM all_tables WHERE owner = '{owner}'"
+    df = pd.read_sql(query, con=conn)
+    df.columns = [c.upper() for c in df.columns]
+    return df['TABLE_NAME'].tolist()
+
+def get_geometry_columns(conn, table, columns=None, owner="GISS"):
+    """SDO_GEOMETRY-kolumner för en tabell, från katalogcachen om kolumnerna skickas in."""
+    if columns is None:
+        columns = fetch_columns(conn, owner=owner, tables=[table]).get(table, [])
+    return [c["name"] for c in columns if c["data_type"] == "SDO_GEOMETRY"]
+
+def build_select_with_wkt(table, geom_cols, conn, columns=None, owner="GISS"):
+    if columns is None:
+        columns = fetch_columns(conn, owner=owner, tables=[table]).get(table, [])
+    all_cols = [c["name"] for c in columns]
+
+    select_cols = []
+    for col in all_cols:
+        if col in geom_cols:
+            select_cols.append(f"SDO_UTIL.TO_WKTGEOMETRY({col}) AS {col}_wkt")
+        else:
+            select_cols.append(col)
+
+    select_clause = ", ".join(select_cols)
+    sql = f"SELECT {select_clause} FROM {owner.lower()}.{table}"
+    return sql
+
+def build_select_with_wkt_safe(
+    table,
+    engine,
+    convert_numbers_to_text=True,
+    exclude_columns=None,
+    columns=None,
+    typed_numbers=False,
+    geometry_mode="wkt",
+    owner="GISS",
+    cast_rules=None,
+):
+    """
+    Bygger en SQL SELECT-sats för en tabell där:
+      - SDO_GEOMETRY-kolumner konverteras till WKT
+      - Problematiska numeriska kolumner (t.ex. med None eller negativa mikrotal) hanteras säkert
+
+    Parametrar:
+        table (str): Namn på tabellen.
+        engine: SQLAlchemy engine.
+        convert_numbers_to_text (bool): Om True konverteras alla NUMBER/FLOAT-kolumner till text (TO_CHAR)
+                                        för att undvika ORA-22063.
+        exclude_columns (list[str]): Lista på kolumner som ska ignoreras vid SELECT.
+        columns (list[dict] | None): Kolumner från katalogcachen (catalog.load_catalog).
+                                     Om None hämtas de från ALL_TAB_COLUMNS.
+        typed_numbers (bool): Om True hämtas numeriska kolumner som de är och rensas i stället
+                              på klienten (fetch.make_output_type_handler), så att de behåller sin typ.
+                              Kolumner med regeln "safe_text" hämtas ändå med TO_CHAR.
+        geometry_mode (str): "wkt" ger SDO_UTIL.TO_WKTGEOMETRY AS <kolumn>_wkt,
+                             "wkb" ger SDO_UTIL.TO_WKBGEOMETRY AS <kolumn>_wkb.
+        owner (str): Schemaägare.
+        cast_rules (dict[str, str] | None): Regler per kolumn från kvalitetsrapporten
+                                            (quality.quality_rules): "safe_text" eller "exclude".
+
+    Returnerar:
+        str: SQL SELECT-sats.
+    """
+
+    cast_rules = cast_rules or {}
+    exclude_columns = (exclude_columns or []) + ["SE_ANNO_CAD_DATA"]
+
+    if columns is None:
+        columns = fetch_columns(engine, owner=owner, tables=[table]).get(table, [])
+
+    select_cols = []
+    for column in columns:
+        col_name = column["name"]
+        data_type = column["data_type"]
+
+        if col_name in exclude_columns or cast_rules.get(col_name) == "exclude":
+            continue
+
+        # 1️⃣ Geometrikolumner → WKT (text) eller WKB (binär)
+        if data_type == "SDO_GEOMETRY":
+            func = "SDO_UTIL.TO_WKBGEOMETRY" if geometry_mode == "wkb" else "SDO_UTIL.TO_WKTGEOMETRY"
+            select_cols.append(f"{func}({col_name}) AS {geometry_alias(col_name, geometry_mode)}")
+
+        # 2️⃣ Numeriska kolumner → text, alla (NUMERIC_MODE=text) eller de med negativa/för
+        #    stora värden enligt kvalitetsrapporten (även med typade tal, där resten
+        #    rensas på klienten); fetch.build_column_types gör dem till string
+        elif data_type in ("NUMBER", "FLOAT", "DECIMAL") and (
+            (convert_numbers_to_text and not typed_numbers) or cast_rules.get(col_name) == "safe_text"
+        ):
+            # Säkerhetsfilter för små/negativa tal som kan ge ORA-22063
+            select_cols.append(
+                f"TO_CHAR(CASE WHEN {col_name} < -1e-6 THEN NULL ELSE {col_name} END) AS {col_name}"
+            )
+
+        # 3️⃣ Allt annat → ta som det är
+        else:
+            select_cols.append(col_name)
+
+    select_clause = ", ".join(select_cols)
+    sql = f"SELECT {select_clause} FROM {owner.lower()}.{table}"
+    return sql
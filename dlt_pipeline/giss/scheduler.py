@@ -0,0 +1,241 @@
+## detta är filen dlt_pipeline/giss/scheduler.py
+
+"""
+Storleksmedveten schemaläggning av exportjobb.
+
+Arbetsenheterna sorteras störst först (LPT – Longest Processing Time) och
+delas ut via Pool.imap_unordered, så att en stor tabell aldrig hamnar sist
+och förlänger hela körningen. Storleken hämtas från ALL_TABLES/USER_SEGMENTS
+och sparas i en cache-fil tillsammans med uppmätta exporttider, så att nästa
+körning kan planeras efter verklig tidsåtgång.
+"""
+
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+# -------------------------------------------------------------
+# STORLEKAR FRÅN ORACLE
+# -------------------------------------------------------------
+def get_table_sizes(conn, owner="GISS"):
+    """
+    Hämtar antal rader och storlek i bytes per tabell.
+
+    Bytes tas från USER_SEGMENTS (fungerar när vi är inloggade som schemaägaren).
+    Saknas segmentet används NUM_ROWS * AVG_ROW_LEN från ALL_TABLES.
+
+    Returnerar:
+        dict[str, dict]: tabellnamn -> {"num_rows": int, "bytes": int}
+    """
+    query = f"""
+        SELECT table_name, num_rows, avg_row_len
+        FROM all_tables WHERE owner = '{owner}'
+    """
+    df = pd.read_sql(query, con=conn)
+    df.columns = [c.upper() for c in df.columns]
+
+    try:
+        seg = pd.read_sql(
+            """
+            SELECT segment_name, SUM(bytes) AS bytes FROM user_segments
+            WHERE segment_type LIKE 'TABLE%' GROUP BY segment_name
+            """,
+            con=conn,
+        )
+        seg.columns = [c.upper() for c in seg.columns]
+        segment_bytes = dict(zip(seg["SEGMENT_NAME"], seg["BYTES"]))
+    except Exception:
+        segment_bytes = {}
+
+    sizes = {}
+    for _, row in df.iterrows():
+        num_rows = int(row["NUM_ROWS"]) if pd.notna(row["NUM_ROWS"]) else 0
+        avg_row_len = int(row["AVG_ROW_LEN"]) if pd.notna(row["AVG_ROW_LEN"]) else 0
+        n_bytes = segment_bytes.get(row["TABLE_NAME"])
+        sizes[row["TABLE_NAME"]] = {
+            "num_rows": num_rows,
+            "bytes": int(n_bytes) if n_bytes is not None else num_rows * avg_row_len,
+        }
+    return sizes
+
+
+def load_size_cache(cache_path):
+    """Läser storleks-/tidscachen från förra körningen (tom dict om den saknas)."""
+    if not os.path.exists(cache_path):
+        return {}
+    with open(cache_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_size_cache(cache_path, sizes):
+    """Skriver storleks-/tidscachen atomiskt."""
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(sizes, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, cache_path)
+
+
+def get_table_sizes_cached(conn, cache_path, owner="GISS"):
+    """
+    Hämtar tabellstorlekar från Oracle och slår ihop dem med cachen
+    (som även innehåller uppmätta exporttider). Om katalogfrågan
+    misslyckas används cachen som den är.
+    """
+    cached = load_size_cache(cache_path)
+    try:
+        fresh = get_table_sizes(conn, owner=owner)
+    except Exception:
+        return cached
+
+    for table, info in fresh.items():
+        cached.setdefault(table, {}).update(info)
+    return cached
+
+
+# -------------------------------------------------------------
+# LPT-ORDNING
+# -------------------------------------------------------------
+# Antagen hastighet innan något har mätts; ersätts av uppmätta värden från cachen
+DEFAULT_SECONDS_PER_BYTE = 1 / (20 * 1024 * 1024)
+DEFAULT_SECONDS_PER_ROW = 1 / 40_000
+
+
+def estimate_rates(sizes):
+    """
+    Genomsnittlig exporthastighet från tabeller som har uppmätt tid, i
+    sekunder per byte och sekunder per rad. Saknas mätningar används
+    DEFAULT_SECONDS_PER_BYTE/DEFAULT_SECONDS_PER_ROW.
+
+    Returnerar:
+        dict: {"bytes": float, "rows": float}
+    """
+    rates = {"bytes": DEFAULT_SECONDS_PER_BYTE, "rows": DEFAULT_SECONDS_PER_ROW}
+    for key, size in (("bytes", "bytes"), ("rows", "num_rows")):
+        timed = [info for info in sizes.values() if info.get("seconds") and info.get(size)]
+        if timed:
+            rates[key] = sum(info["seconds"] for info in timed) / sum(info[size] for info in timed)
+    return rates
+
+
+def estimate_cost(item, sizes, rates=None):
+    """
+    Uppskattad tid i sekunder för en arbetsenhet.
+
+    Uppmätt tid från förra körningen används i första hand. Annars räknas
+    bytes eller antal rader om till sekunder med hastigheten från
+    estimate_rates, så att alla enheter jämförs i samma enhet. Delar av en
+    tabell får sin andel av tiden; en delta räknas på sina uppskattade rader.
+    """
+    rates = rates or estimate_rates(sizes)
+    info = sizes.get(item["table"], {})
+    if item.get("kind") == "delta":
+        return (item.get("est_rows") or 0) * rates["rows"]
+    n_parts = item.get("n_parts") or 1
+    if info.get("seconds"):
+        cost = info["seconds"]
+    elif info.get("bytes"):
+        cost = info["bytes"] * rates["bytes"]
+    else:
+        cost = (info.get("num_rows") or item.get("est_rows") or 0) * rates["rows"]
+    return cost / n_parts
+
+
+def order_largest_first(items, sizes):
+    """Sorterar arbetsenheterna med den största först (LPT)."""
+    rates = estimate_rates(sizes)
+    return sorted(items, key=lambda item: estimate_cost(item, sizes, rates), reverse=True)
+
+
+# -------------------------------------------------------------
+# KÖRNING
+# -------------------------------------------------------------
+def _timed_call(args):
+    func, item = args
+    start = time.time()
+    result = func(item)
+    end = time.time()
+    # Med en trådpool delar alla workers pid, därför nycklas de även på tråd
+    worker = f"{os.getpid()}/{threading.current_thread().name}"
+    return item, result, {"pid": os.getpid(), "worker": worker, "start": start, "end": end}
+
+
+def run_largest_first(pool, func, items, sizes):
+    """
+    Delar ut arbetsenheterna störst först via imap_unordered och returnerar
+    resultaten i den ordning de blir klara.
+
+    Parametrar:
+        pool: multiprocessing.Pool.
+        func: Picklebar funktion som tar en arbetsenhet (t.ex. functools.partial).
+        items (list[dict]): Arbetsenheter från partition.build_work_items.
+        sizes (dict): Tabellstorlekar från get_table_sizes_cached.
+
+    Yields:
+        tuple: (item, result, timing) där timing = {"pid", "worker", "start", "end"}.
+    """
+    ordered = order_largest_first(items, sizes)
+    yield from pool.imap_unordered(_timed_call, [(func, item) for item in ordered], chunksize=1)
+
+
+def run_serial(func, items, sizes):
+    """
+    Som run_largest_first men en arbetsenhet i taget i den egna processen
+    (seriellt läge, ingen pool).
+    """
+    for item in order_largest_first(items, sizes):
+        yield _timed_call((func, item))
+
+
+def update_sizes_with_timings(sizes, finished):
+    """
+    Lägger in uppmätt exporttid per tabell (summan av alla delar) i
+    storlekscachen, så att nästa körning kan ordnas efter verklig tid.
+    Delta-exporter räknas inte, de säger inget om en full export. En tabell
+    där någon del inte blev "ok" räknas inte heller: tiden för ett fel (eller
+    för bara en del av tabellen) skulle ge fel ordning nästa gång.
+    """
+    seconds, failed = {}, set()
+    for item, (_, status, _, _), timing in finished:
+        if item.get("kind") == "delta":
+            continue
+        if status != "ok":
+            failed.add(item["table"])
+        seconds[item["table"]] = seconds.get(item["table"], 0.0) + timing["end"] - timing["start"]
+    for table, secs in seconds.items():
+        if table in failed:
+            continue
+        sizes.setdefault(table, {})["seconds"] = round(secs, 3)
+    return sizes
+
+
+def summarize_schedule(finished, n_workers):
+    """
+    Sammanfattar körningen: total arbetstid, faktisk körtid (makespan)
+    och den ideala körtiden total arbetstid / antal workers.
+
+    Returnerar:
+        dict: {"makespan", "total_work", "ideal", "efficiency", "per_worker"}
+    """
+    if not finished:
+        return {"makespan": 0.0, "total_work": 0.0, "ideal": 0.0, "efficiency": 1.0, "per_worker": {}}
+
+    first_start = min(t["start"] for _, _, t in finished)
+    last_end = max(t["end"] for _, _, t in finished)
+    per_worker = {}
+    for _, _, t in finished:
+        worker = t.get("worker", t["pid"])
+        per_worker[worker] = per_worker.get(worker, 0.0) + t["end"] - t["start"]
+
+    makespan = last_end - first_start
+    total_work = sum(per_worker.values())
+    ideal = total_work / n_workers
+    return {
+        "makespan": makespan,
+        "total_work": total_work,
+        "ideal": ideal,
+        "efficiency": ideal / makespan if makespan > 0 else 1.0,
+        "per_worker": per_worker,
+    }
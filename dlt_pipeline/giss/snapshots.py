@@ -0,0 +1,117 @@
+## detta är filen dlt_pipeline/giss/snapshots.py
+
+"""
+Uppslag av exporterade ögonblicksbilder (snapshots) i PARQUET_DIR.
+
+Exporten skriver filer enligt:
+
+    {tabell}_{YYYYmmdd_HHMMSS}.parquet          hel tabell
+    {tabell}_{YYYYmmdd_HHMMSS}/part-NNNNN.parquet   uppdelad tabell
+    {tabell}_delta_{YYYYmmdd_HHMMSS}.parquet    delta (inkrementell export)
+
+En snapshot räknas inte som klar om körmanifestet för samma körning har
+enheter för tabellen som inte är "ok" (t.ex. en uppdelad tabell som
+fortfarande skrivs). Temporära filer (.*.tmp) och andra filer ignoreras.
+
+Inga tunga beroenden – modulen används även av servern.
+"""
+
+import json
+import os
+import re
+
+from dlt_pipeline.giss.manifest import MANIFEST_FILE_NAME
+
+_SNAPSHOT_RE = re.compile(r"^(?P<table>.+?)(?P<delta>_delta)?_(?P<timestamp>\d{8}_\d{6})(?P<ext>\.parquet)?$")
+
+
+# -------------------------------------------------------------
+# HJÄLPFUNKTIONER
+# -------------------------------------------------------------
+def parse_snapshot_name(name):
+    """
+    Tolkar ett fil- eller katalognamn i PARQUET_DIR.
+
+    Returnerar:
+        dict | None: {"table", "timestamp", "kind"} eller None om namnet inte är en snapshot.
+    """
+    if name.startswith("."):
+        return None
+    match = _SNAPSHOT_RE.match(name)
+    if not match:
+        return None
+    return {
+        "table": match["table"].upper(),
+        "timestamp": match["timestamp"],
+        "kind": "delta" if match["delta"] else "full",
+    }
+
+
+def _incomplete(parquet_dir):
+    # (tabell, run_id) för enheter i senaste körmanifestet som inte är klara
+    path = os.path.join(parquet_dir, MANIFEST_FILE_NAME)
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return set()
+    return {
+        (unit["table"], manifest.get("run_id"))
+        for unit in manifest.get("units", {}).values()
+        if unit.get("status") != "ok"
+    }
+
+
+# -------------------------------------------------------------
+# UPPSLAG
+# -------------------------------------------------------------
+def list_snapshots(parquet_dir):
+    """
+    Alla klara snapshots i katalogen, per tabell och sorterade på tidsstämpel.
+
+    Returnerar:
+        dict[str, list[dict]]: tabell -> [{"table", "timestamp", "kind", "path", "files", "mtime"}, ...]
+    """
+    if not os.path.isdir(parquet_dir):
+        return {}
+    incomplete = _incomplete(parquet_dir)
+
+    snapshots = {}
+    for entry in os.scandir(parquet_dir):
+        info = parse_snapshot_name(entry.name)
+        if info is None or (info["table"], info["timestamp"]) in incomplete:
+            continue
+        if entry.is_dir():
+            files = sorted(
+                os.path.join(entry.path, name)
+                for name in os.listdir(entry.path)
+                if name.endswith(".parquet") and not name.startswith(".")
+            )
+            if not files:
+                continue
+        elif entry.name.endswith(".parquet"):
+            files = [entry.path]
+        else:
+            continue
+        info.update(
+            path=entry.path,
+            files=files,
+            mtime=max(os.path.getmtime(f) for f in files),
+        )
+        snapshots.setdefault(info["table"], []).append(info)
+
+    for table_snapshots in snapshots.values():
+        table_snapshots.sort(key=lambda s: (s["timestamp"], s["kind"] == "delta"))
+    return snapshots
+
+
+def latest_snapshot(parquet_dir, table, snapshots=None):
+    """
+    Senaste fulla snapshot för en tabell (None om ingen finns).
+
+    Parametrar:
+        snapshots (dict | None): Resultat från list_snapshots, för att slippa läsa katalogen igen.
+    """
+    snapshots = list_snapshots(parquet_dir) if snapshots is None else snapshots
+    full = [s for s in snapshots.get(table.upper(), []) if s["kind"] == "full"]
+    return full[-1] if full else None
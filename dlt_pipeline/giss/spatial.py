@@ -0,0 +1,233 @@
+## detta är filen dlt_pipeline/giss/spatial.py
+
+"""
+Spatialt klustrad GeoParquet: bbox-kolumn per rad och sortering längs en
+rumsfyllande kurva.
+
+Oracle lämnar raderna i godtycklig ordning, så varje radgrupp täcker i
+praktiken hela utbredningen och en bbox-fråga måste läsa allt. Här skrivs
+en exporterad fil om så att:
+
+    - varje rad får en bbox-kolumn, struct<xmin, ymin, xmax, ymax>, beräknad
+      ur geometrin (WKB eller WKT)
+    - raderna sorteras på Hilbert- eller Z-ordningsnyckeln för bboxens
+      mittpunkt (normerad mot filens utbredning)
+    - radgrupperna är små nog (row_group_rows) för att min/max-statistiken
+      för bbox-fälten ska utesluta de flesta radgrupper vid en regionfråga
+    - GeoParquet-metadatan blir version 1.1 med "covering" som pekar ut
+      bbox-kolumnen (https://geoparquet.org/releases/v1.1.0/)
+
+WKT är ingen GeoParquet-kodning; för WKT-kolumner skrivs bbox-kolumnen och
+sorteringen ändå, men ingen geo-metadata. Sorteringen görs per fil (en
+uppdelad tabell sorteras alltså del för del) och hela filen läses in i
+minnet.
+"""
+
+import json
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from dlt_pipeline.giss.config import SPATIAL_SORTS
+from dlt_pipeline.giss.geometry import wkb_bounds, wkt_bounds
+from dlt_pipeline.giss.manifest import temporary_path
+from dlt_pipeline.giss.writer import DEFAULT_WRITER_PROFILE, get_profile, write_table
+
+# -------------------------------------------------------------
+# STANDARDVÄRDEN
+# -------------------------------------------------------------
+DEFAULT_SPATIAL_SORT = "none"
+DEFAULT_SPATIAL_ROW_GROUP_ROWS = 16 * 1024  # små radgrupper ger träffsäker min/max-statistik
+GEOPARQUET_COVERING_VERSION = "1.1.0"
+BBOX_COLUMN = "bbox"
+CURVE_ORDER = 16  # bitar per axel i sorteringsnyckeln
+
+BBOX_TYPE = pa.struct([
+    ("xmin", pa.float64()),
+    ("ymin", pa.float64()),
+    ("xmax", pa.float64()),
+    ("ymax", pa.float64()),
+])
+
+
+# -------------------------------------------------------------
+# BBOX OCH SORTERINGSNYCKLAR
+# -------------------------------------------------------------
+def geometry_bounds(array, encoding="wkb"):
+    """
+    Bbox per rad för en geometrikolumn.
+
+    Parametrar:
+        array (pa.Array | pa.ChunkedArray): WKB (binär) eller WKT (text).
+        encoding (str): "wkb" eller "wkt".
+
+    Returnerar:
+        np.ndarray: (n, 4) med xmin, ymin, xmax, ymax; NaN för null och tomma geometrier.
+    """
+    bounds = wkt_bounds if encoding == "wkt" else wkb_bounds
+    result = np.full((len(array), 4), np.nan)
+    for i, value in enumerate(array.to_pylist()):
+        if value is not None:
+            b = bounds(value)
+            if b is not None:
+                result[i] = b
+    return result
+
+
+def _grid(bounds, order=CURVE_ORDER):
+    # Mittpunkterna som heltal i [0, 2**order) över bboxarnas gemensamma utbredning
+    cx = (bounds[:, 0] + bounds[:, 2]) / 2
+    cy = (bounds[:, 1] + bounds[:, 3]) / 2
+    side = (1 << order) - 1
+    grid = []
+    for values in (cx, cy):
+        low, high = np.nanmin(values), np.nanmax(values)
+        span = high - low if high > low else 1.0
+        grid.append(np.nan_to_num((values - low) / span * side).astype(np.int64))
+    return grid
+
+
+def hilbert_keys(bounds, order=CURVE_ORDER):
+    """Hilbertkurvans index för varje bbox mittpunkt (int64, vektoriserat)."""
+    x, y = _grid(bounds, order)
+    n = 1 << order
+    d = np.zeros(len(x), dtype=np.int64)
+    s = n >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        d += s * s * ((3 * rx.astype(np.int64)) ^ ry.astype(np.int64))
+        # Rotera kvadranten så att kurvan fortsätter sammanhängande
+        flip = ~ry & rx
+        x = np.where(flip, n - 1 - x, x)
+        y = np.where(flip, n - 1 - y, y)
+        x, y = np.where(~ry, y, x), np.where(~ry, x, y)
+        s >>= 1
+    return d
+
+
+def zorder_keys(bounds, order=CURVE_ORDER):
+    """Z-ordningens (Morton) index för varje bbox mittpunkt."""
+    x, y = _grid(bounds, order)
+    d = np.zeros(len(x), dtype=np.int64)
+    for bit in range(order):
+        d |= ((x >> bit) & 1) << (2 * bit)
+        d |= ((y >> bit) & 1) << (2 * bit + 1)
+    return d
+
+
+def spatial_sort_indices(bounds, sort="hilbert"):
+    """Radordning längs kurvan; rader utan geometri hamnar sist."""
+    valid = ~np.isnan(bounds[:, 0])
+    if not valid.any():
+        return np.arange(len(bounds))
+    keys = hilbert_keys(bounds) if sort == "hilbert" else zorder_keys(bounds)
+    keys = np.where(valid, keys, np.iinfo(np.int64).max)
+    return np.argsort(keys, kind="stable")
+
+
+# -------------------------------------------------------------
+# OMSKRIVNING AV FILER
+# -------------------------------------------------------------
+def find_geometry_column(schema):
+    """
+    (kolumn, kodning) för filens primära geometri: ur GeoParquet-metadatan,
+    annars första kolumnen som slutar på _wkb/_wkt. None om filen saknar geometri.
+    """
+    geo = (schema.metadata or {}).get(b"geo")
+    if geo:
+        meta = json.loads(geo)
+        name = meta.get("primary_column")
+        if name in schema.names:
+            return name, meta["columns"][name].get("encoding", "WKB").lower()
+    for name in schema.names:
+        if name.lower().endswith("_wkb"):
+            return name, "wkb"
+        if name.lower().endswith("_wkt"):
+            return name, "wkt"
+    return None
+
+
+def bbox_column_name(schema, geometry_column):
+    """
+    "bbox", eller {geometri}_bbox om tabellen redan har en annan kolumn som
+    heter bbox. En befintlig bbox-kolumn av rätt typ (från en tidigare
+    klustring) återanvänds.
+    """
+    taken = {field.name.lower() for field in schema if field.type != BBOX_TYPE}
+    return BBOX_COLUMN if BBOX_COLUMN not in taken else f"{geometry_column}_{BBOX_COLUMN}"
+
+
+def covering_metadata(geo, geometry_column, bbox_column):
+    """GeoParquet 1.1-metadata med bbox-covering för geometrikolumnen."""
+    geo = dict(geo, version=GEOPARQUET_COVERING_VERSION)
+    geo["columns"][geometry_column]["covering"] = {
+        "bbox": {field: [bbox_column, field] for field in ("xmin", "ymin", "xmax", "ymax")}
+    }
+    return geo
+
+
+def cluster_parquet_file(input_path, output_path=None, sort="hilbert",
+                         row_group_rows=DEFAULT_SPATIAL_ROW_GROUP_ROWS, profile=None):
+    """
+    Skriver om en Parquet-fil spatialt klustrad (se modulbeskrivningen).
+
+    Parametrar:
+        input_path (str): Fil att läsa.
+        output_path (str | None): Resultatfil; None skriver över input_path.
+        sort (str): "hilbert", "zorder" eller "none" (bara bbox-kolumn och radgrupper).
+        row_group_rows (int): Rader per radgrupp (går före profilens).
+        profile (dict | None): Skrivprofil från writer.py (codec, kodningar).
+
+    Returnerar:
+        dict | None: {"geometry", "encoding", "bbox_column", "rows", "row_groups"}
+                     eller None om filen saknar geometri (filen lämnas då orörd).
+    """
+    if sort not in SPATIAL_SORTS:
+        raise ValueError(f"Okänd sortering: {sort} (välj bland {', '.join(SPATIAL_SORTS)})")
+    output_path = output_path or input_path
+    table = pq.read_table(input_path)
+    geometry = find_geometry_column(table.schema)
+    if geometry is None:
+        return None
+    name, encoding = geometry
+
+    bounds = geometry_bounds(table.column(name), encoding)
+    if sort != "none" and table.num_rows:
+        order = spatial_sort_indices(bounds, sort)
+        table = table.take(pa.array(order))
+        bounds = bounds[order]
+
+    bbox_column = bbox_column_name(table.schema, name)
+    missing = np.isnan(bounds[:, 0])
+    bbox = pa.StructArray.from_arrays(
+        [pa.array(np.ascontiguousarray(bounds[:, i]), mask=missing) for i in range(4)],
+        fields=list(BBOX_TYPE),
+        mask=pa.array(missing),
+    )
+    metadata = dict(table.schema.metadata or {})
+    if b"geo" in metadata and encoding == "wkb":
+        geo = covering_metadata(json.loads(metadata[b"geo"]), name, bbox_column)
+        metadata[b"geo"] = json.dumps(geo).encode("utf-8")
+    index = table.schema.get_field_index(bbox_column)
+    if index >= 0:
+        table = table.remove_column(index)
+    table = table.append_column(bbox_column, bbox).replace_schema_metadata(metadata)
+
+    tmp_path = temporary_path(output_path)
+    try:
+        write_table(table, tmp_path, profile or get_profile(DEFAULT_WRITER_PROFILE), row_group_rows=row_group_rows)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return {
+        "geometry": name,
+        "encoding": encoding,
+        "bbox_column": bbox_column,
+        "rows": table.num_rows,
+        "row_groups": pq.read_metadata(output_path).num_row_groups,
+    }
@@ -0,0 +1,310 @@
+## detta är filen dlt_pipeline/giss/spool.py
+
+"""
+Strömmande export i tre steg som körs samtidigt (PIPELINE=true).
+
+I stream_query_to_parquet görs hämtning, konvertering och skrivning efter
+varandra i samma tråd. Oracle-sessionen står då still medan pyarrow kodar,
+och CPU:n står still medan vi väntar på nätverket. Här blir de tre stegen
+egna trådar med köer emellan:
+
+    hämtning      cursor.fetchmany (+ read() på LOB-locatorer) i anroparens tråd
+        │  begränsad kö med råa rader (PIPELINE_QUEUE_BATCHES batchar)
+    konvertering  rader -> RecordBatch (streaming.rows_to_record_batch)
+        │  SpoolQueue: RecordBatches upp till SPOOL_MEMORY_BYTES i minnet,
+        │  resten skrivs som Arrow IPC-filer i SPOOL_DIR och läses tillbaka
+        │  minnesmappade
+    skrivning     ParquetBatchSink (observatörer, row groups, footer)
+
+Den begränsade radkön ger mottryck: är konverteringen långsammast väntar
+hämtningen ("backpressure" i mätningen), så minnet hålls begränsat. Är
+skrivningen långsammast (t.ex. zstd på hög nivå) fortsätter hämtning och
+konvertering, och det som inte ryms i minnet hamnar på disk. Cursorn kan
+då stängas innan filen är skriven, och sessionen blir ledig tidigare.
+Tiden per tabell närmar sig det långsammaste stegets tid i stället för
+summan av stegen.
+
+LOB-locatorer läses i hämtningstråden: en anslutning får inte användas
+från flera trådar samtidigt. Det finns en tråd per steg, eftersom
+ordningen på raderna ska vara densamma som utan pipeline. Konverteringen
+håller GIL:en, så fler konverteringstrådar skulle ändå inte gå fortare.
+"""
+
+import math
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import deque
+
+import pyarrow as pa
+
+from dlt_pipeline.giss.instrumentation import StageTimer
+from dlt_pipeline.giss.streaming import (
+    DEFAULT_ARRAYSIZE,
+    DEFAULT_BATCH_SIZE,
+    ParquetBatchSink,
+    configure_cursor,
+    lob_column_indexes,
+    normalize_column_name,
+    rows_to_record_batch,
+)
+
+# -------------------------------------------------------------
+# STANDARDVÄRDEN
+# -------------------------------------------------------------
+DEFAULT_PIPELINE_QUEUE_BATCHES = 4          # råa radbatchar mellan hämtning och konvertering
+DEFAULT_SPOOL_MEMORY_BYTES = 256 * 1024**2  # RecordBatches i minnet innan de spolas till disk
+SPOOL_DIR_NAME = "_spool"
+
+_POLL_SECONDS = 0.1
+_DONE = object()
+
+
+# -------------------------------------------------------------
+# SPOOL
+# -------------------------------------------------------------
+class SpoolQueue:
+    """
+    Ordnad kö av RecordBatches för en producent och en konsument.
+
+    Batchar ligger i minnet så länge de ryms i memory_bytes. Därefter skrivs
+    de till Arrow IPC-filer i spool_dir och läses tillbaka minnesmappade
+    när konsumenten kommer ikapp. En batch spolas aldrig om kön är tom.
+    """
+
+    def __init__(self, spool_dir, memory_bytes=DEFAULT_SPOOL_MEMORY_BYTES, timer=None):
+        self.spool_dir = spool_dir
+        self.memory_bytes = memory_bytes
+        self.timer = timer or StageTimer()
+        self.spilled = 0
+        self._items = deque()
+        self._memory = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._read_paths = []
+
+    def put(self, batch):
+        with self._cond:
+            spill = bool(self._items) and self._memory + batch.nbytes > self.memory_bytes
+            if not spill:
+                self._memory += batch.nbytes
+                self._items.append(("memory", batch))
+                self._cond.notify()
+                return
+        # Skrivs utanför låset; det finns bara en producent, så ordningen behålls
+        path = self._spill(batch)
+        with self._cond:
+            self._items.append(("disk", path))
+            self._cond.notify()
+
+    def _spill(self, batch):
+        os.makedirs(self.spool_dir, exist_ok=True)
+        path = os.path.join(self.spool_dir, f"batch_{self.spilled:06d}.arrow")
+        with self.timer.stage("spill", rows=batch.num_rows, n_bytes=batch.nbytes):
+            with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, batch.schema) as writer:
+                writer.write_batch(batch)
+        self.spilled += 1
+        return path
+
+    def close(self):
+        """Producenten är klar; get() ger None när kön är tömd."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def get(self, stop=None):
+        """
+        Nästa batch i ordning, eller None när kön är stängd och tom
+        (eller stop, en threading.Event, har satts).
+        """
+        self._remove_read()
+        with self._cond:
+            while not self._items and not self._closed:
+                if stop is not None and stop.is_set():
+                    return None
+                self._cond.wait(_POLL_SECONDS)
+            if not self._items:
+                return None
+            kind, value = self._items.popleft()
+            if kind == "memory":
+                self._memory -= value.nbytes
+                return value
+        with self.timer.stage("spool_read"):
+            batch = pa.ipc.open_file(pa.memory_map(value)).get_batch(0)
+        # Filen tas bort först vid nästa get(), när batchen har skrivits
+        self._read_paths.append(value)
+        return batch
+
+    def _remove_read(self):
+        while self._read_paths:
+            path = self._read_paths.pop()
+            if os.path.exists(path):
+                os.remove(path)
+
+    def cleanup(self):
+        """Tar bort spoolkatalogen med eventuella kvarvarande filer."""
+        self._read_paths = []
+        self._items.clear()
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+
+
+# -------------------------------------------------------------
+# PIPELINE
+# -------------------------------------------------------------
+def _put(q, item, stop, timer):
+    # Väntar på plats i kön (mottryck) men ger upp om ett annat steg har fallerat
+    start = time.perf_counter()
+    while True:
+        try:
+            q.put(item, timeout=_POLL_SECONDS)
+            break
+        except queue.Full:
+            if stop.is_set():
+                return False
+    waited = time.perf_counter() - start
+    if waited > 0.001:
+        timer.add("backpressure", waited)
+    return True
+
+
+def _read_lob_rows(rows, lob_columns):
+    # LOB-locatorer läses i hämtningstråden, innan raderna lämnas till konverteringen
+    rows = [list(row) for row in rows]
+    for row in rows:
+        for i in lob_columns:
+            if hasattr(row[i], "read"):
+                row[i] = row[i].read()
+    return rows
+
+
+def _get(q, stop):
+    while True:
+        try:
+            return q.get(timeout=_POLL_SECONDS)
+        except queue.Empty:
+            if stop.is_set():
+                return _DONE
+
+
+def stream_query_to_parquet_staged(
+    conn,
+    sql,
+    parquet_path,
+    batch_size=DEFAULT_BATCH_SIZE,
+    arraysize=DEFAULT_ARRAYSIZE,
+    prefetchrows=None,
+    schema=None,
+    params=None,
+    column_types=None,
+    output_type_handler=None,
+    observers=None,
+    writer_options=None,
+    row_group_rows=None,
+    timer=None,
+    queue_batches=DEFAULT_PIPELINE_QUEUE_BATCHES,
+    spool_dir=None,
+    spool_memory_bytes=DEFAULT_SPOOL_MEMORY_BYTES,
+):
+    """
+    Som streaming.stream_query_to_parquet (samma parametrar och samma fil),
+    men med hämtning, konvertering och skrivning i var sin tråd.
+
+    Parametrar:
+        queue_batches (int): Råa radbatchar som får vänta på konvertering.
+        spool_dir (str | None): Katalog för spolade batchar. Standard är
+                                {parquet_path}.spool, som tas bort efteråt.
+        spool_memory_bytes (int): Bytes RecordBatches i minnet innan de spolas till disk.
+
+    Returnerar:
+        int: Antal skrivna rader.
+    """
+    timer = timer or StageTimer()
+    spool = SpoolQueue(spool_dir or f"{parquet_path}.spool", memory_bytes=spool_memory_bytes, timer=timer)
+    sink = ParquetBatchSink(
+        parquet_path, observers=observers, writer_options=writer_options, row_group_rows=row_group_rows, timer=timer
+    )
+    rows_queue = queue.Queue(maxsize=max(queue_batches, 1))
+    stop = threading.Event()
+    errors = []
+    state = {"names": None, "schema": schema, "n_rows": 0}
+
+    def convert():
+        try:
+            while True:
+                rows = _get(rows_queue, stop)
+                if rows is _DONE or rows is None:
+                    break
+                batch = rows_to_record_batch(state["names"], rows, state["schema"], column_types, timer=timer)
+                state["schema"] = batch.schema
+                spool.put(batch)
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            spool.close()
+
+    def write():
+        try:
+            while True:
+                batch = spool.get(stop)
+                if batch is None:
+                    break
+                sink.write(batch)
+            if not stop.is_set():
+                state["n_rows"] = sink.finish(
+                    lambda: rows_to_record_batch(state["names"], [], state["schema"], column_types)
+                )
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    cursor = conn.cursor()
+    threads = []
+    try:
+        configure_cursor(cursor, arraysize=arraysize, prefetchrows=prefetchrows)
+        if output_type_handler is not None:
+            cursor.outputtypehandler = output_type_handler
+        with timer.stage("execute"):
+            if params is None:
+                cursor.execute(sql)
+            else:
+                cursor.execute(sql, params)
+        timer.count("round_trips")
+
+        state["names"] = [normalize_column_name(d[0]) for d in cursor.description]
+        lob_columns = lob_column_indexes(cursor.description)
+        threads = [
+            threading.Thread(target=convert, name="giss-convert", daemon=True),
+            threading.Thread(target=write, name="giss-write", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        arraysize = max(getattr(cursor, "arraysize", 1) or 1, 1)
+        while not stop.is_set():
+            start = time.perf_counter()
+            rows = cursor.fetchmany(batch_size)
+            timer.add("fetch", time.perf_counter() - start, rows=len(rows))
+            timer.count("round_trips", max(math.ceil(len(rows) / arraysize), 1))
+            if rows and lob_columns:
+                with timer.stage("lob_read", rows=len(rows)):
+                    rows = _read_lob_rows(rows, lob_columns)
+            if not _put(rows_queue, rows or None, stop, timer) or not rows:
+                break
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        cursor.close()
+        for thread in threads:
+            thread.join()
+        sink.close()
+        if spool.spilled:
+            timer.count("spilled_batches", spool.spilled)
+        spool.cleanup()
+
+    if errors:
+        raise errors[0]
+    return state["n_rows"]
@@ -0,0 +1,560 @@
+## detta är filen dlt_pipeline/giss/standin.py
+
+"""
+Lokal ersättare för Oracle: en DuckDB-fil med syntetiska GISS-liknande
+tabeller bakom samma gränssnitt som connection.py (pool, acquire, cursor).
+
+Används av benchmarken (benchmark.py) så att exporten kan köras och mätas
+utan databasserver. Poolen väljs när anslutningsinställningarna har
+nyckeln "stand_in" (se stand_in_settings):
+
+    config["connection"] = stand_in_settings("./data/bench/standin_1.duckdb")
+    run_export(config, mode="thread", tables=list(STAND_IN_TABLES))
+
+Det som exporten förväntar sig av Oracle efterliknas:
+
+    - schemat GISS med tabellerna och katalogvyerna ALL_TABLES, ALL_OBJECTS,
+      ALL_TAB_COLUMNS, ALL_SDO_GEOM_METADATA, ALL_CONSTRAINTS, ALL_CONS_COLUMNS
+    - TO_CHAR, SDO_UTIL.TO_WKTGEOMETRY/TO_WKBGEOMETRY, DBMS_LOB.GETLENGTH och
+      ORA_HASH som DuckDB-makron (geometrierna lagras som struct<wkt, wkb>)
+    - cursorn anropar outputtypehandler per kolumn, gör om NUMBER-värden till
+      typen i cursor.var (int, float, Decimal eller str) och kör outconverters,
+      och lämnar LOB:ar som locatorer med read() – samma arbete per värde som
+      med oracledb, men utan nätverk
+    - okvoterade kolumnnamn kommer tillbaka i versaler
+    - AsyncStandInPool motsvarar oracledb.create_pool_async (async-läget);
+      frågorna körs i trådar så att flera hämtningar pågår samtidigt
+
+Tabellerna (antal rader gånger scale):
+
+    BENCH_WIDE      50 000   ID + 40 numeriska kolumner, några mikronegativa värden
+    BENCH_CLOB      20 000   CLOB med 0,1–8 kB text per rad
+    BENCH_POLYGON    5 000   polygoner med 4–2 048 hörn (SWEREF 99 TM)
+    BENCH_LARGE    400 000   smal tabell med tal, text och datum
+    BENCH_EMPTY          0   alla typer, inga rader
+"""
+
+import asyncio
+import os
+import struct
+import warnings
+from datetime import datetime
+from decimal import Decimal
+
+import duckdb
+import numpy as np
+import pyarrow as pa
+
+# -------------------------------------------------------------
+# STANDARDVÄRDEN
+# -------------------------------------------------------------
+DEFAULT_STAND_IN_SCALE = 1.0
+STAND_IN_SRID = 3006
+
+# (namn, Oracle-typ, precision, skala, DuckDB-uttryck över radnumret i)
+# bench_rand(i, k) ger ett deterministiskt tal i [0, 1)
+_WIDE_COLUMNS = (
+    [("ID", "NUMBER", 10, 0, "i")]
+    + [(f"BELOPP{k:02d}", "NUMBER", 12, 3, f"(bench_rand(i, {k}) - 0.05) * 1e6") for k in range(1, 11)]
+    + [
+        (f"VARDE{k:02d}", "NUMBER", None, None,
+         f"CASE WHEN bench_rand(i, {k + 10}) < 0.01 THEN -bench_rand(i, {k + 20}) * 1e-7 "
+         f"ELSE bench_rand(i, {k + 20}) * 1e4 END")
+        for k in range(1, 11)
+    ]
+    + [(f"ANTAL{k:02d}", "NUMBER", 9, 0, f"floor(bench_rand(i, {k + 30}) * 1e6)") for k in range(1, 11)]
+    + [(f"KVOT{k:02d}", "FLOAT", 126, None, f"bench_rand(i, {k + 40})") for k in range(1, 11)]
+)
+
+STAND_IN_TABLES = {
+    "BENCH_WIDE": {"rows": 50_000, "key": "ID", "columns": _WIDE_COLUMNS},
+    "BENCH_CLOB": {
+        "rows": 20_000,
+        "key": "ID",
+        "columns": [
+            ("ID", "NUMBER", 10, 0, "i"),
+            ("NAMN", "VARCHAR2", None, None, "'Dokument ' || i"),
+            ("BESKRIVNING", "CLOB", None, None,
+             "repeat('Lorem ipsum dolor sit amet. ', 4 + floor(bench_rand(i, 1) * 290)::INTEGER)"),
+            ("ANDRAD", "DATE", None, None, "TIMESTAMP '2020-01-01' + to_seconds(i * 37)"),
+        ],
+    },
+    "BENCH_POLYGON": {
+        "rows": 5_000,
+        "key": "ID",
+        "columns": [
+            ("ID", "NUMBER", 10, 0, "i"),
+            ("OBJEKTTYP", "VARCHAR2", None, None, "'Typ ' || (i % 17)"),
+            ("AREAL", "NUMBER", 12, 2, "bench_rand(i, 1) * 1e5"),
+            ("GEOMETRI", "SDO_GEOMETRY", None, None, None),
+        ],
+    },
+    "BENCH_LARGE": {
+        "rows": 400_000,
+        "key": "ID",
+        "columns": [
+            ("ID", "NUMBER", 10, 0, "i"),
+            ("OBJEKT_ID", "NUMBER", 12, 0, "floor(bench_rand(i, 1) * 1e11)"),
+            ("LANGD", "NUMBER", 10, 2, "bench_rand(i, 2) * 1e4"),
+            ("BREDD", "NUMBER", None, None, "bench_rand(i, 3) * 50"),
+            ("KOD", "VARCHAR2", None, None, "'K' || (i % 251)"),
+            ("STATUS", "VARCHAR2", None, None, "CASE WHEN i % 9 = 0 THEN 'HIST' ELSE 'AKTIV' END"),
+            ("GILTIG_FROM", "DATE", None, None, "TIMESTAMP '2010-01-01' + to_seconds(i * 613)"),
+        ],
+    },
+    "BENCH_EMPTY": {
+        "rows": 0,
+        "key": None,
+        "columns": [
+            ("ID", "NUMBER", 10, 0, "i"),
+            ("VARDE", "NUMBER", 12, 3, "bench_rand(i, 1)"),
+            ("TEXT", "CLOB", None, None, "'x'"),
+            ("GEOMETRI", "SDO_GEOMETRY", None, None, None),
+        ],
+    },
+}
+
+# Antal hörn per polygon och andel av raderna
+_POLYGON_VERTICES = (4, 16, 64, 256, 2048)
+_POLYGON_WEIGHTS = (0.35, 0.3, 0.2, 0.1, 0.05)
+
+_GEOMETRY_DUCKDB_TYPE = "STRUCT(wkt VARCHAR, wkb BLOB)"
+
+_MACROS = (
+    "CREATE SCHEMA IF NOT EXISTS sdo_util",
+    "CREATE SCHEMA IF NOT EXISTS dbms_lob",
+    "CREATE OR REPLACE MACRO bench_rand(i, k) AS (hash(i, k) % 1000000) / 1000000.0",
+    # Formatet i TO_CHAR(x, fmt) ignoreras; DuckDB:s text är densamma i varje session
+    "CREATE OR REPLACE MACRO to_char(x) AS CAST(x AS VARCHAR), (x, fmt) AS CAST(x AS VARCHAR)",
+    "CREATE OR REPLACE MACRO ora_hash(x) AS hash(x) % 4294967296, (x, n) AS hash(x) % (n + 1)",
+    "CREATE OR REPLACE MACRO sdo_util.to_wktgeometry(g) AS g.wkt",
+    "CREATE OR REPLACE MACRO sdo_util.to_wkbgeometry(g) AS g.wkb",
+    "CREATE OR REPLACE MACRO dbms_lob.getlength(x) AS length(CAST(x AS VARCHAR))",
+)
+
+
+# -------------------------------------------------------------
+# TYPER SOM I ORACLEDB
+# -------------------------------------------------------------
+class _DbType:
+    # Motsvarar oracledb.DbType (streaming.lob_column_indexes läser .name)
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return f"<DbType {self.name}>"
+
+
+DB_TYPE_NUMBER = _DbType("DB_TYPE_NUMBER")
+DB_TYPE_VARCHAR = _DbType("DB_TYPE_VARCHAR")
+DB_TYPE_DATE = _DbType("DB_TYPE_DATE")
+DB_TYPE_RAW = _DbType("DB_TYPE_RAW")
+DB_TYPE_CLOB = _DbType("DB_TYPE_CLOB")
+DB_TYPE_BLOB = _DbType("DB_TYPE_BLOB")
+# Används av fetch.make_output_type_handler för LOB:ar som hämtas direkt
+DB_TYPE_LONG = _DbType("DB_TYPE_LONG")
+DB_TYPE_LONG_RAW = _DbType("DB_TYPE_LONG_RAW")
+
+_NUMBER_TYPES = ("DECIMAL", "BIGINT", "INTEGER", "SMALLINT", "TINYINT", "HUGEINT", "DOUBLE", "FLOAT")
+
+
+def _db_type(name, duckdb_type, lob_columns):
+    type_name = str(duckdb_type).upper()
+    if name in lob_columns and type_name in ("VARCHAR", "BLOB"):
+        return DB_TYPE_BLOB if type_name == "BLOB" else DB_TYPE_CLOB
+    if type_name.startswith(_NUMBER_TYPES):
+        return DB_TYPE_NUMBER
+    if type_name == "BLOB":
+        return DB_TYPE_RAW
+    if type_name.startswith(("TIMESTAMP", "DATE")):
+        return DB_TYPE_DATE
+    return DB_TYPE_VARCHAR
+
+
+def duckdb_type(column):
+    """DuckDB-typ för en kolumn i tabellspecifikationen (Oracle-typ, precision, skala)."""
+    _, data_type, precision, scale, _ = column
+    if data_type == "NUMBER":
+        return "DOUBLE" if precision is None else f"DECIMAL({precision}, {scale or 0})"
+    if data_type == "FLOAT":
+        return "DOUBLE"
+    if data_type == "DATE":
+        return "TIMESTAMP"
+    if data_type == "SDO_GEOMETRY":
+        return _GEOMETRY_DUCKDB_TYPE
+    return "VARCHAR"
+
+
+class _Lob:
+    # LOB-locator: värdet läses med read() som med oracledb
+    __slots__ = ("_value",)
+
+    def __init__(self, value):
+        self._value = value
+
+    def read(self):
+        return self._value
+
+
+class _Var:
+    # Det som cursor.var() returnerar; bara typ och outconverter används
+    def __init__(self, var_type, outconverter=None):
+        self.type = var_type
+        self.outconverter = outconverter
+
+
+_VAR_TYPES = (int, float, Decimal, str)
+
+
+def _var_converter(var):
+    # Värdet görs om till typen i cursor.var(...) innan outconvertern körs, som i oracledb
+    cast = var.type if var.type in _VAR_TYPES else None
+    if var.outconverter is None:
+        return cast
+    if cast is None:
+        return var.outconverter
+    outconverter = var.outconverter
+    return lambda value: outconverter(cast(value))
+
+
+# -------------------------------------------------------------
+# CURSOR, ANSLUTNING OCH POOL
+# -------------------------------------------------------------
+class StandInCursor:
+    """DB-API-cursor över en DuckDB-anslutning med oracledb:s typhantering (se modulbeskrivningen)."""
+
+    def __init__(self, connection, lob_columns):
+        self._cursor = connection
+        self._lob_columns = lob_columns
+        self._converters = {}
+        self.arraysize = 100
+        self.prefetchrows = 2
+        self.outputtypehandler = None
+        self.description = None
+
+    def var(self, var_type, size=None, arraysize=None, outconverter=None):
+        return _Var(var_type, outconverter)
+
+    def execute(self, sql, params=None):
+        if params is None:
+            self._cursor.execute(sql)
+        else:
+            self._cursor.execute(sql, params)
+        self.description = [
+            (d[0].upper(), _db_type(d[0].upper(), d[1], self._lob_columns), None, None, None, None, None)
+            for d in self._cursor.description or []
+        ]
+        self._converters = {}
+        for i, d in enumerate(self.description):
+            var = None
+            if self.outputtypehandler is not None:
+                var = self.outputtypehandler(self, d[0], d[1], None, None, None)
+            converter = _var_converter(var) if var is not None else None
+            if converter is not None:
+                self._converters[i] = converter
+            elif var is None and d[1] in (DB_TYPE_CLOB, DB_TYPE_BLOB):
+                self._converters[i] = _Lob
+        return self
+
+    def _convert(self, rows):
+        if not self._converters:
+            return rows
+        converters = list(self._converters.items())
+        result = []
+        for row in rows:
+            row = list(row)
+            for i, convert in converters:
+                if row[i] is not None:
+                    row[i] = convert(row[i])
+            result.append(tuple(row))
+        return result
+
+    def fetchmany(self, size=None):
+        return self._convert(self._cursor.fetchmany(size or self.arraysize))
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return None if row is None else self._convert([row])[0]
+
+    def fetchall(self):
+        return self._convert(self._cursor.fetchall())
+
+    def close(self):
+        self._cursor.close()
+
+
+class StandInConnection:
+    """En lånad session: en egen DuckDB-anslutning till filen."""
+
+    def __init__(self, connection, lob_columns):
+        self._connection = connection
+        self._lob_columns = lob_columns
+
+    def cursor(self):
+        return StandInCursor(self._connection.cursor(), self._lob_columns)
+
+    def ping(self):
+        self._connection.execute("SELECT 1").fetchone()
+
+    def is_healthy(self):
+        return True
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self._connection.close()
+
+
+class StandInPool:
+    """Sessionspool med samma metoder som oracledb.ConnectionPool (acquire, release, drop, close)."""
+
+    def __init__(self, db_path):
+        # pandas varnar för DB-API-anslutningar som inte är SQLAlchemy/sqlite3
+        warnings.filterwarnings("ignore", message="pandas only supports SQLAlchemy")
+        self._db = duckdb.connect(db_path, read_only=True)
+        self._lob_columns = _lob_output_columns(self._db)
+
+    def acquire(self):
+        return StandInConnection(self._db.cursor(), self._lob_columns)
+
+    def release(self, conn):
+        conn.close()
+
+    def drop(self, conn):
+        conn.close()
+
+    def close(self, force=False):
+        self._db.close()
+
+    def engine(self):
+        """Ersätter SQLAlchemy-enginen i connection.get_engine (pd.read_sql tar DB-API-anslutningen)."""
+        return StandInEngine(self)
+
+
+class StandInEngine(StandInConnection):
+    """Anslutning för pd.read_sql: varje cursor får en egen DuckDB-anslutning (trådsäkert)."""
+
+    def __init__(self, pool):
+        super().__init__(pool._db, pool._lob_columns)
+
+    def close(self):
+        pass
+
+    def dispose(self):
+        pass
+
+
+class _AsyncLob:
+    # Som oracledb.AsyncLOB: read() är en korutin
+    __slots__ = ("_value",)
+
+    def __init__(self, value):
+        self._value = value
+
+    async def read(self):
+        return self._value
+
+
+class AsyncStandInCursor:
+    """Som oracledb.AsyncCursor: execute/fetch är korutiner som kör StandInCursor i en tråd."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    # configure_cursor och outputtypehandler sätts på den underliggande cursorn
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        if name == "_cursor":
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._cursor, name, value)
+
+    async def execute(self, sql, params=None):
+        await asyncio.to_thread(self._cursor.execute, sql, params)
+        return self
+
+    def _async_lobs(self, rows):
+        # Bara frågor med LOB-locatorer behöver gås igenom
+        if _Lob not in self._cursor._converters.values():
+            return rows
+        return [tuple(_AsyncLob(v.read()) if isinstance(v, _Lob) else v for v in row) for row in rows]
+
+    async def fetchmany(self, size=None):
+        return self._async_lobs(await asyncio.to_thread(self._cursor.fetchmany, size))
+
+    async def fetchone(self):
+        row = await asyncio.to_thread(self._cursor.fetchone)
+        return None if row is None else self._async_lobs([row])[0]
+
+    def close(self):
+        self._cursor.close()
+
+
+class AsyncStandInConnection(StandInConnection):
+    """En lånad session för async-läget (cursor() ger en AsyncStandInCursor)."""
+
+    def cursor(self):
+        return AsyncStandInCursor(super().cursor())
+
+    async def ping(self):
+        await asyncio.to_thread(super().ping)
+
+
+class AsyncStandInPool(StandInPool):
+    """Sessionspool med samma korutiner som oracledb.AsyncConnectionPool (acquire, release, drop, close)."""
+
+    async def acquire(self):
+        return AsyncStandInConnection(self._db.cursor(), self._lob_columns)
+
+    async def release(self, conn):
+        conn.close()
+
+    async def drop(self, conn):
+        conn.close()
+
+    async def close(self, force=False):
+        self._db.close()
+
+
+def _lob_output_columns(db):
+    # Utdatakolumner som Oracle levererar som LOB: CLOB/BLOB och geometrierna (TO_WKT/TO_WKB)
+    rows = db.execute(
+        "SELECT column_name, data_type FROM all_tab_columns "
+        "WHERE data_type IN ('CLOB', 'NCLOB', 'BLOB', 'SDO_GEOMETRY')"
+    ).fetchall()
+    names = set()
+    for name, data_type in rows:
+        if data_type == "SDO_GEOMETRY":
+            names.update({f"{name}_WKT", f"{name}_WKB"})
+        else:
+            names.add(name)
+    return frozenset(names)
+
+
+def stand_in_settings(db_path, max_sessions=1):
+    """Anslutningsinställningar (config["connection"]) som ger en StandInPool över db_path."""
+    return {"stand_in": os.path.abspath(db_path), "max": max_sessions}
+
+
+# -------------------------------------------------------------
+# SYNTETISKA DATA
+# -------------------------------------------------------------
+def _polygon(rng, n_vertices):
+    # Ungefär cirkulär polygon med brus i radien, sluten (första hörnet upprepas)
+    cx, cy = rng.uniform(300_000, 900_000), rng.uniform(6_150_000, 7_650_000)
+    radius = rng.uniform(10, 500) * (1 + rng.uniform(0, 0.3, n_vertices))
+    angles = np.linspace(0, 2 * np.pi, n_vertices, endpoint=False)
+    coords = np.column_stack([cx + radius * np.cos(angles), cy + radius * np.sin(angles)]).round(3)
+    coords = np.vstack([coords, coords[:1]])
+    wkt = "POLYGON ((" + ", ".join(f"{x:.3f} {y:.3f}" for x, y in coords) + "))"
+    wkb = struct.pack("<BIII", 1, 3, 1, len(coords)) + coords.astype("<f8").tobytes()
+    return wkt, wkb
+
+
+def generate_geometries(n_rows, seed=42):
+    """
+    Polygoner med varierande antal hörn, som Arrow-tabell (ID, wkt, wkb).
+    Var hundrade rad saknar geometri.
+    """
+    rng = np.random.default_rng(seed)
+    vertices = rng.choice(_POLYGON_VERTICES, size=n_rows, p=_POLYGON_WEIGHTS)
+    wkts, wkbs = [], []
+    for i, n_vertices in enumerate(vertices):
+        if i % 100 == 99:
+            wkts.append(None)
+            wkbs.append(None)
+            continue
+        wkt, wkb = _polygon(rng, int(n_vertices))
+        wkts.append(wkt)
+        wkbs.append(wkb)
+    return pa.table({
+        "ID": pa.array(np.arange(n_rows, dtype=np.int64)),
+        "wkt": pa.array(wkts, pa.string()),
+        "wkb": pa.array(wkbs, pa.binary()),
+    })
+
+
+def _create_table(db, table, spec, n_rows, owner):
+    select = ", ".join(
+        f"CAST({column[4] or 'NULL'} AS {duckdb_type(column)}) AS {column[0]}" for column in spec["columns"]
+    )
+    db.execute(f"CREATE OR REPLACE TABLE {owner}.{table} AS SELECT {select} FROM range({n_rows}) t(i)")
+    for name, data_type, _, _, _ in spec["columns"]:
+        if data_type == "SDO_GEOMETRY" and n_rows:
+            db.register("geometries", generate_geometries(n_rows))
+            db.execute(
+                f"UPDATE {owner}.{table} SET {name} = CASE WHEN g.wkt IS NULL THEN NULL "
+                f"ELSE {{'wkt': g.wkt, 'wkb': g.wkb}} END FROM geometries g WHERE {table}.ID = g.ID"
+            )
+            db.unregister("geometries")
+
+
+def _create_catalog(db, tables, row_counts, owner):
+    now = datetime.now()
+    db.execute("CREATE OR REPLACE TABLE all_tables (owner VARCHAR, table_name VARCHAR, num_rows BIGINT, avg_row_len BIGINT)")
+    db.execute("CREATE OR REPLACE TABLE all_objects (owner VARCHAR, object_name VARCHAR, object_type VARCHAR, last_ddl_time TIMESTAMP)")
+    db.execute(
+        "CREATE OR REPLACE TABLE all_tab_columns (owner VARCHAR, table_name VARCHAR, column_name VARCHAR, "
+        "data_type VARCHAR, data_precision INTEGER, data_scale INTEGER, nullable VARCHAR, data_length INTEGER, "
+        "column_id INTEGER)"
+    )
+    db.execute("CREATE OR REPLACE TABLE all_sdo_geom_metadata (owner VARCHAR, table_name VARCHAR, column_name VARCHAR, srid INTEGER)")
+    db.execute("CREATE OR REPLACE TABLE all_constraints (owner VARCHAR, constraint_name VARCHAR, table_name VARCHAR, constraint_type VARCHAR)")
+    db.execute("CREATE OR REPLACE TABLE all_cons_columns (owner VARCHAR, constraint_name VARCHAR, table_name VARCHAR, column_name VARCHAR, position INTEGER)")
+
+    for table, spec in tables.items():
+        n_rows = row_counts[table]
+        # Radlängd som i ALL_TABLES.AVG_ROW_LEN (ungefär, ur textformen av raden)
+        avg_row_len = db.execute(f"SELECT AVG(strlen(CAST(t AS VARCHAR))) FROM {owner}.{table} t").fetchone()[0]
+        db.execute("INSERT INTO all_tables VALUES (?, ?, ?, ?)", [owner, table, n_rows, int(avg_row_len or 0)])
+        db.execute("INSERT INTO all_objects VALUES (?, ?, 'TABLE', ?)", [owner, table, now])
+        for column_id, (name, data_type, precision, scale, _) in enumerate(spec["columns"], start=1):
+            db.execute(
+                "INSERT INTO all_tab_columns VALUES (?, ?, ?, ?, ?, ?, 'Y', ?, ?)",
+                [owner, table, name, data_type, precision, scale, 22 if data_type == "NUMBER" else 4000, column_id],
+            )
+            if data_type == "SDO_GEOMETRY":
+                db.execute("INSERT INTO all_sdo_geom_metadata VALUES (?, ?, ?, ?)", [owner, table, name, STAND_IN_SRID])
+        if spec["key"]:
+            constraint = f"PK_{table}"
+            db.execute("INSERT INTO all_constraints VALUES (?, ?, ?, 'P')", [owner, constraint, table])
+            db.execute("INSERT INTO all_cons_columns VALUES (?, ?, ?, ?, 1)", [owner, constraint, table, spec["key"]])
+
+
+def create_stand_in(db_path, scale=DEFAULT_STAND_IN_SCALE, tables=None, owner="GISS"):
+    """
+    Skapar (eller skriver över) en DuckDB-fil med de syntetiska tabellerna och katalogvyerna.
+
+    Parametrar:
+        db_path (str): DuckDB-fil att skapa.
+        scale (float): Faktor för antalet rader i STAND_IN_TABLES.
+        tables (dict | None): Egna tabellspecifikationer (samma format som STAND_IN_TABLES).
+        owner (str): Schemaägare.
+
+    Returnerar:
+        dict[str, int]: Antal rader per tabell.
+    """
+    tables = tables or STAND_IN_TABLES
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    row_counts = {table: int(spec["rows"] * scale) for table, spec in tables.items()}
+    db = duckdb.connect(db_path)
+    try:
+        db.execute(f"CREATE SCHEMA IF NOT EXISTS {owner}")
+        for statement in _MACROS:
+            db.execute(statement)
+        for table, spec in tables.items():
+            _create_table(db, table, spec, row_counts[table], owner)
+        _create_catalog(db, tables, row_counts, owner)
+        db.execute("CHECKPOINT")
+    finally:
+        db.close()
+    return row_counts
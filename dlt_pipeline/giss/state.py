@@ -0,0 +1,245 @@
+## detta är filen dlt_pipeline/giss/state.py
+
+"""
+Inkrementell export med sparade high-water marks per tabell.
+
+Före exporten "sonderas" varje tabell med en billig aggregatfråga som ger
+ett märke (mark) och antal rader. Märket jämförs med det som sparades vid
+förra lyckade körningen:
+
+    - oförändrat märke och radantal  -> tabellen hoppas över helt
+    - tabell med stigande nyckel/ändringsdatum -> bara nya/ändrade rader
+      exporteras som en delta-fil ({tabell}_delta_{tidsstämpel}.parquet)
+    - annars -> full export
+
+Strategier:
+    - "rowscn": MAX(ORA_ROWSCN) + COUNT(*)
+    - "column": MAX(<kolumn>) + COUNT(*) för en stigande nyckel eller ett ändringsdatum
+    - "checksum": COUNT(*) + SUM av en radhash byggd av ORA_HASH per kolumn
+      (datum/tidsstämplar med explicit TO_CHAR-format, se checksum_expression)
+
+Borttagna rader fångas inte av en delta. Minskar radantalet görs därför
+alltid en full export. State-filen skrivs atomiskt och uppdateras först när
+alla delar av en tabell har skrivits utan fel.
+"""
+
+import json
+import numbers
+import os
+from datetime import date, datetime
+from decimal import Decimal
+
+import pandas as pd
+
+# -------------------------------------------------------------
+# STANDARDVÄRDEN
+# -------------------------------------------------------------
+STATE_FILE_NAME = "_export_state.json"
+DEFAULT_STRATEGY = "rowscn"
+
+# Format för datum/tidsstämplar i kontrollsumman, oberoende av sessionens NLS-inställningar
+DATE_CHECKSUM_FORMAT = 'YYYY-MM-DD"T"HH24:MI:SS'
+TIMESTAMP_CHECKSUM_FORMAT = 'YYYY-MM-DD"T"HH24:MI:SS.FF'
+TIMESTAMP_TZ_CHECKSUM_FORMAT = 'YYYY-MM-DD"T"HH24:MI:SS.FF TZH:TZM'
+# Kolumnhashar per ORA_HASH av en konkatenering: högst 11 tecken per kolumn,
+# så 300 kolumner håller sig under VARCHAR2-gränsen på 4000 byte
+CHECKSUM_CHUNK_COLUMNS = 300
+
+
+# -------------------------------------------------------------
+# STATE-FIL
+# -------------------------------------------------------------
+def load_state(state_path):
+    """Läser state-filen (tom dict om den saknas)."""
+    if not os.path.exists(state_path):
+        return {}
+    with open(state_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(state_path, state):
+    """Skriver state-filen atomiskt (temporär fil + os.replace)."""
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, state_path)
+
+
+# -------------------------------------------------------------
+# SONDERING
+# -------------------------------------------------------------
+def _json_value(value):
+    # Gör om märket till något som går att spara i JSON och jämföra nästa gång
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None, None
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return pd.Timestamp(value).isoformat(), "timestamp"
+    # Heltal och NUMBER (Decimal) sparas exakt; float() tappar precision över 2^53
+    if isinstance(value, numbers.Integral):
+        return int(value), "number"
+    if isinstance(value, Decimal):
+        return (int(value) if value == value.to_integral_value() else str(value)), "number"
+    if isinstance(value, numbers.Real):
+        number = float(value)
+        return (int(number) if number.is_integer() else number), "number"
+    return str(value), "string"
+
+
+def get_checksum_columns(conn, table, owner="GISS"):
+    """
+    Skalära kolumner (ej LOB/SDO_GEOMETRY) som kan ingå i en ORA_HASH-kontrollsumma.
+
+    Returnerar:
+        list[dict]: [{"name", "data_type"}] i kolumnordning.
+    """
+    query = f"""
+        SELECT column_name, data_type FROM all_tab_columns
+        WHERE owner = '{owner}' AND table_name = '{table}'
+        AND data_type NOT IN ('SDO_GEOMETRY', 'CLOB', 'NCLOB', 'BLOB', 'LONG', 'LONG RAW')
+        ORDER BY column_id
+    """
+    df = pd.read_sql(query, con=conn)
+    df.columns = [c.upper() for c in df.columns]
+    return [{"name": name, "data_type": data_type} for name, data_type in zip(df["COLUMN_NAME"], df["DATA_TYPE"])]
+
+
+def _column_hash(column):
+    # Datum och tidsstämplar får ett explicit format; övriga typer hashas direkt.
+    # NULL får ett eget värde (-1) så att kolumnernas positioner inte förskjuts.
+    name, data_type = column["name"], column.get("data_type") or ""
+    if data_type == "DATE":
+        name = f"TO_CHAR({name}, '{DATE_CHECKSUM_FORMAT}')"
+    elif data_type.startswith("TIMESTAMP"):
+        fmt = TIMESTAMP_TZ_CHECKSUM_FORMAT if "TIME ZONE" in data_type else TIMESTAMP_CHECKSUM_FORMAT
+        name = f"TO_CHAR({name}, '{fmt}')"
+    return f"COALESCE(ORA_HASH({name}), -1)"
+
+
+def checksum_expression(columns):
+    """
+    Aggregatuttryck för strategin "checksum".
+
+    Varje kolumn hashas för sig med ORA_HASH, så att ingen konkatenering av
+    själva värdena kan slå i gränsen på 4000 byte. Kolumnhasharna slås ihop
+    till en radhash (i grupper om CHECKSUM_CHUNK_COLUMNS) och radhasharna summeras.
+
+    Parametrar:
+        columns (list[dict]): Kolumner med "name" och "data_type" (t.ex. från katalogcachen).
+
+    Returnerar:
+        str: SUM(...)-uttryck.
+    """
+    hashes = [_column_hash(c) for c in columns]
+    chunks = [
+        "ORA_HASH(" + " || '|' || ".join(hashes[i:i + CHECKSUM_CHUNK_COLUMNS]) + ")"
+        for i in range(0, len(hashes), CHECKSUM_CHUNK_COLUMNS)
+    ]
+    row_hash = chunks[0] if len(chunks) == 1 else "ORA_HASH(" + " || '|' || ".join(chunks) + ")"
+    return f"SUM({row_hash})"
+
+
+def probe_table(conn, table, strategy=DEFAULT_STRATEGY, column=None, columns=None, owner="GISS"):
+    """
+    Kör en aggregatfråga som ger tabellens nuvarande märke.
+
+    Parametrar:
+        conn: SQLAlchemy engine eller connection.
+        table (str): Tabellnamn.
+        strategy (str): "rowscn", "column" eller "checksum".
+        column (str | None): Kolumn för strategin "column".
+        columns (list[dict] | None): Kolumner ({"name", "data_type"}) som ingår i kontrollsumman
+                                     för "checksum". None betyder alla skalära kolumner (ej LOB/geometri).
+
+    Returnerar:
+        dict: {"strategy", "column", "mark", "mark_type", "rows"}
+    """
+    if strategy == "column":
+        if not column:
+            raise ValueError(f"Strategin 'column' kräver en kolumn för {table}")
+        expr = f"MAX({column})"
+    elif strategy == "checksum":
+        expr = checksum_expression(columns or get_checksum_columns(conn, table, owner=owner))
+    elif strategy == "rowscn":
+        expr = "MAX(ORA_ROWSCN)"
+    else:
+        raise ValueError(f"Okänd strategi: {strategy}")
+
+    df = pd.read_sql(f"SELECT {expr} AS mark, COUNT(*) AS n FROM {owner}.{table}", con=conn)
+    df.columns = [c.upper() for c in df.columns]
+    mark, mark_type = _json_value(df["MARK"].iloc[0])
+    return {
+        "strategy": strategy,
+        "column": column,
+        "mark": mark,
+        "mark_type": mark_type,
+        "rows": int(df["N"].iloc[0]),
+    }
+
+
+def is_unchanged(previous, current):
+    """True om tabellen inte har ändrats sedan förra lyckade exporten."""
+    if not previous:
+        return False
+    return (
+        previous.get("strategy") == current["strategy"]
+        and previous.get("column") == current["column"]
+        and previous.get("mark") == current["mark"]
+        and previous.get("rows") == current["rows"]
+    )
+
+
+def delta_refusal(previous, current):
+    """
+    Varför en delta inte går att använda (en full export görs i stället),
+    eller None om bara nya/ändrade rader behöver exporteras.
+    """
+    if current["strategy"] != "column":
+        return f"strategin {current['strategy']} visar bara att tabellen har ändrats"
+    if previous is None:
+        return "inget märke från en tidigare export"
+    if previous.get("strategy") != "column" or previous.get("column") != current["column"]:
+        return "förra märket sattes med en annan strategi eller kolumn"
+    if previous.get("mark") is None:
+        return "förra märket saknas (tom tabell?)"
+    if current["rows"] < previous.get("rows", 0):
+        return (
+            f"radantalet minskade ({previous.get('rows', 0)} → {current['rows']}), "
+            "borttagna rader fångas inte av en delta"
+        )
+    return None
+
+
+def can_export_delta(previous, current):
+    """
+    True om bara nya/ändrade rader behöver exporteras: strategin är "column",
+    förra märket finns och inga rader har tagits bort.
+    """
+    return delta_refusal(previous, current) is None
+
+
+def delta_predicate(previous):
+    """WHERE-villkor för rader som tillkommit/ändrats efter förra märket."""
+    column, mark = previous["column"], previous["mark"]
+    if previous.get("mark_type") == "timestamp":
+        literal = f"TO_TIMESTAMP('{pd.Timestamp(mark):%Y-%m-%d %H:%M:%S.%f}', 'YYYY-MM-DD HH24:MI:SS.FF6')"
+    elif previous.get("mark_type") == "number":
+        # int eller exakt decimalsträng, oförändrad i SQL:en
+        literal = str(mark)
+    else:
+        literal = "'" + str(mark).replace("'", "''") + "'"
+    return f"{column} > {literal}"
+
+
+def make_delta_item(table, previous, current, output_dir, timestamp):
+    """Arbetsenhet (samma format som partition.build_work_items) för en delta-export."""
+    return {
+        "table": table,
+        "part": None,
+        "n_parts": 1,
+        "where": delta_predicate(previous),
+        "est_rows": max(current["rows"] - previous.get("rows", 0), 0),
+        "output_path": os.path.join(output_dir, f"{table.lower()}_delta_{timestamp}.parquet"),
+        "kind": "delta",
+    }
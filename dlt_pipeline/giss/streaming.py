@@ -0,0 +1,403 @@
+## detta är filen dlt_pipeline/giss/streaming.py
+
+"""
+Strömmande export av en SQL-fråga till en Parquet-fil.
+
+Raderna hämtas från en DB-API-cursor i batchar (fetchmany), varje batch
+görs om till en pyarrow RecordBatch och läggs till i en och samma
+Parquet-fil via ParquetWriter. Minnesåtgången styrs därmed av batchstorleken
+och inte av tabellens storlek.
+
+Modulen känner inte till Oracle specifikt – alla DB-API-anslutningar
+(cx_Oracle, oracledb, sqlite3, duckdb) fungerar, vilket gör att exporten
+kan testas lokalt mot SQLite eller DuckDB.
+"""
+
+import math
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from dlt_pipeline.giss.instrumentation import StageTimer
+
+# -------------------------------------------------------------
+# STANDARDVÄRDEN
+# -------------------------------------------------------------
+DEFAULT_BATCH_SIZE = 50_000   # rader per RecordBatch / row group
+DEFAULT_ARRAYSIZE = 5_000     # rader per nätverksrundresa mot databasen
+DEFAULT_NULL_DEFER_ROWS = 200_000  # rader som hålls i minnet medan en kolumn bara har NULL
+
+
+# -------------------------------------------------------------
+# HJÄLPFUNKTIONER
+# -------------------------------------------------------------
+def configure_cursor(cursor, arraysize=DEFAULT_ARRAYSIZE, prefetchrows=None):
+    """
+    Sätter arraysize (och prefetchrows om drivrutinen stödjer det) på en cursor.
+    DuckDB:s cursor saknar arraysize; där styr fetchmany(batch_size) ensamt.
+    """
+    try:
+        cursor.arraysize = arraysize
+    except AttributeError:
+        pass
+    if prefetchrows is not None and hasattr(cursor, "prefetchrows"):
+        cursor.prefetchrows = prefetchrows
+
+
+def normalize_column_name(name):
+    """
+    Gör om kolumnnamn på samma sätt som SQLAlchemy/pd.read_sql:
+    Oracles versala namn blir gemener, blandade namn lämnas orörda.
+    """
+    return name.lower() if name.upper() == name else name
+
+
+_LOB_TYPE_NAMES = ("DB_TYPE_CLOB", "DB_TYPE_NCLOB", "DB_TYPE_BLOB", "DB_TYPE_BFILE")
+
+
+def lob_column_indexes(description):
+    """
+    Index för kolumner som drivrutinen rapporterar som LOB (cx_Oracle/oracledb).
+    Bara dessa kolumner behöver läsas med .read(); övriga kolumner typkontrolleras aldrig.
+    """
+    return {
+        i for i, d in enumerate(description)
+        if getattr(d[1], "name", "") in _LOB_TYPE_NAMES
+    }
+
+
+def _read_lobs(values):
+    # LOB-locatorer (stora LOB:ar som inte hämtats direkt) läses till str/bytes före nästa fetch
+    return [v.read() if hasattr(v, "read") else v for v in values]
+
+
+def _to_array(values, field_type=None):
+    if field_type is None:
+        # En kolumn med bara NULL får typen null; ParquetBatchSink bestämmer typen senare
+        return pa.array(values)
+    try:
+        return pa.array(values, type=field_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        if pa.types.is_string(field_type):
+            return pa.array([None if v is None else str(v) for v in values], type=field_type)
+        raise
+
+
+def rows_to_record_batch(names, rows, schema=None, column_types=None, lob_columns=None, timer=None):
+    """
+    Gör om en lista med rader (tupler) till en pyarrow RecordBatch.
+
+    Parametrar:
+        names (list[str]): Kolumnnamn.
+        rows (list[tuple]): Rader från cursor.fetchmany().
+        schema (pa.Schema | None): Schema att följa. Om None härleds typerna från datat;
+                                   fält med typen null (bara NULL hittills) härleds också.
+        column_types (dict[str, pa.DataType] | None): Kända typer per kolumnnamn
+                                                      (används när schema saknas).
+        lob_columns (set[int] | None): Index för kolumner som kan innehålla LOB-locatorer.
+        timer (StageTimer | None): Tar emot tiden för "lob_read" och "convert".
+
+    Returnerar:
+        pa.RecordBatch
+    """
+    start = time.perf_counter()
+    lob_seconds = 0.0
+    columns = list(zip(*rows)) if rows else [[] for _ in names]
+    column_types = column_types or {}
+    lob_columns = lob_columns or set()
+    arrays = []
+    for i, values in enumerate(columns):
+        if schema is not None and not pa.types.is_null(schema.field(i).type):
+            field_type = schema.field(i).type
+        else:
+            field_type = column_types.get(names[i])
+        if i in lob_columns:
+            lob_start = time.perf_counter()
+            values = _read_lobs(values)
+            lob_seconds += time.perf_counter() - lob_start
+        arrays.append(_to_array(values, field_type))
+    if schema is not None:
+        schema = pa.schema(
+            [field.with_type(array.type) for field, array in zip(schema, arrays)], metadata=schema.metadata
+        )
+        batch = pa.RecordBatch.from_arrays(arrays, schema=schema)
+    else:
+        batch = pa.RecordBatch.from_arrays(arrays, names=names)
+    if timer is not None:
+        if lob_columns:
+            timer.add("lob_read", lob_seconds, rows=len(rows))
+        timer.add("convert", time.perf_counter() - start - lob_seconds, rows=len(rows))
+    return batch
+
+
+def iter_record_batches(cursor, batch_size=DEFAULT_BATCH_SIZE, schema=None, column_types=None, timer=None):
+    """
+    Generator som hämtar rader från en exekverad cursor i batchar om
+    batch_size rader och returnerar dem som RecordBatches.
+
+    Schemat från första batchen används för alla följande batchar
+    (om inget schema skickas in), så att alla batchar går att skriva till
+    samma Parquet-fil. Kolumner som bara har haft NULL har typen null tills
+    ett värde dyker upp.
+
+    Med timer (StageTimer) mäts "fetch", "lob_read" och "convert", och
+    rundresorna uppskattas till ceil(rader / arraysize) per fetchmany.
+    """
+    timer = timer or StageTimer()
+    names = [normalize_column_name(d[0]) for d in cursor.description]
+    lob_columns = lob_column_indexes(cursor.description)
+    arraysize = max(getattr(cursor, "arraysize", 1) or 1, 1)
+    while True:
+        start = time.perf_counter()
+        rows = cursor.fetchmany(batch_size)
+        timer.add("fetch", time.perf_counter() - start, rows=len(rows))
+        timer.count("round_trips", max(math.ceil(len(rows) / arraysize), 1))
+        if not rows:
+            break
+        batch = rows_to_record_batch(names, rows, schema, column_types, lob_columns, timer)
+        schema = batch.schema
+        yield batch
+
+
+def iter_query_batches(
+    conn,
+    sql,
+    batch_size=DEFAULT_BATCH_SIZE,
+    arraysize=DEFAULT_ARRAYSIZE,
+    prefetchrows=None,
+    params=None,
+    column_types=None,
+    output_type_handler=None,
+):
+    """
+    Kör en SQL-fråga och ger resultatet som RecordBatches om batch_size rader,
+    t.ex. för att skicka Arrow-data direkt till dlt. Parametrarna är desamma
+    som för stream_query_to_parquet. Cursorn stängs när generatorn tar slut.
+    """
+    cursor = conn.cursor()
+    try:
+        configure_cursor(cursor, arraysize=arraysize, prefetchrows=prefetchrows)
+        if output_type_handler is not None:
+            cursor.outputtypehandler = output_type_handler
+        if params is None:
+            cursor.execute(sql)
+        else:
+            cursor.execute(sql, params)
+        yield from iter_record_batches(cursor, batch_size=batch_size, column_types=column_types)
+    finally:
+        cursor.close()
+
+
+# -------------------------------------------------------------
+# STRÖMMANDE EXPORT
+# -------------------------------------------------------------
+class ParquetBatchSink:
+    """
+    Skriver RecordBatches till en Parquet-fil: observatörer, samlade row
+    groups och footer-metadata. Används av stream_query_to_parquet och av
+    async-läget (async_export.py), som hämtar batcharna på annat sätt.
+
+    Parametrarna är desamma som för stream_query_to_parquet, plus
+    null_defer_rows: så många rader hålls högst kvar medan en kolumn bara har
+    NULL. Har kolumnen inte fått något värde då skrivs den som string.
+    """
+
+    def __init__(self, parquet_path, observers=None, writer_options=None, row_group_rows=None, timer=None,
+                 null_defer_rows=DEFAULT_NULL_DEFER_ROWS):
+        self.parquet_path = parquet_path
+        self.observers = observers or []
+        self.writer_options = writer_options
+        self.row_group_rows = row_group_rows
+        self.null_defer_rows = null_defer_rows
+        self.timer = timer or StageTimer()
+        self.n_rows = 0
+        self._writer = None
+        self._schema = None
+        self._nulls = set()  # kolumner som blev string utan att ha haft något värde
+        self._deferred, self._deferred_rows = [], 0
+        self._pending, self._pending_rows = [], 0
+
+    def _open(self, schema):
+        # Kolumner som fortfarande bara har NULL skrivs som string
+        self._nulls = {field.name for field in schema if pa.types.is_null(field.type)}
+        self._schema = pa.schema(
+            [field.with_type(pa.string()) if field.name in self._nulls else field for field in schema],
+            metadata=schema.metadata,
+        )
+        options = self.writer_options(self._schema) if self.writer_options is not None else {}
+        self._writer = pq.ParquetWriter(self.parquet_path, self._schema, **options)
+
+    def _conform(self, batch):
+        # Kolumner som var null i en tidigare batch (eller tvärtom) castas till filens typ
+        if batch.schema.equals(self._schema):
+            return batch
+        arrays = []
+        for field, array in zip(self._schema, batch.columns):
+            if not array.type.equals(field.type):
+                if field.name in self._nulls and not pa.types.is_null(array.type):
+                    raise ValueError(
+                        f"Kolumnen {field.name} hade bara NULL i de första raderna och skrivs som string, "
+                        f"men fick sedan värden av typen {array.type}; ange typen i column_types"
+                    )
+                array = array.cast(field.type)
+            arrays.append(array)
+        return pa.RecordBatch.from_arrays(arrays, schema=self._schema)
+
+    def _resolved_schema(self):
+        # Första typen som inte är null per kolumn, bland batcharna som väntar
+        schema = self._deferred[0].schema
+        fields = []
+        for i, field in enumerate(schema):
+            types = (b.schema.field(i).type for b in self._deferred)
+            fields.append(field.with_type(next((t for t in types if not pa.types.is_null(t)), pa.null())))
+        return pa.schema(fields, metadata=schema.metadata)
+
+    def _write(self, batch):
+        batch = self._conform(batch)
+        if not self.row_group_rows:
+            self._writer.write_batch(batch)
+            return
+        self._pending.append(batch)
+        self._pending_rows += batch.num_rows
+        if self._pending_rows >= self.row_group_rows:
+            # Hela row groups skrivs, resten väntar på nästa batch
+            table = pa.Table.from_batches(self._pending)
+            complete = self._pending_rows - self._pending_rows % self.row_group_rows
+            self._writer.write_table(table.slice(0, complete), row_group_size=self.row_group_rows)
+            self._pending = table.slice(complete).to_batches()
+            self._pending_rows -= complete
+
+    def _flush_deferred(self):
+        self._open(self._resolved_schema())
+        deferred, self._deferred, self._deferred_rows = self._deferred, [], 0
+        for batch in deferred:
+            self._write(batch)
+
+    def write(self, batch):
+        """
+        Skriver (eller samlar ihop till en row group) en batch. Så länge någon
+        kolumn bara har haft NULL hålls batcharna kvar (högst null_defer_rows
+        rader), så att filens schema får kolumnens riktiga typ.
+        """
+        if self.observers:
+            with self.timer.stage("observe", rows=batch.num_rows):
+                for observer in self.observers:
+                    observer.observe(batch)
+        self.n_rows += batch.num_rows
+        with self.timer.stage("write", rows=batch.num_rows):
+            if self._writer is not None:
+                self._write(batch)
+                return
+            self._deferred.append(batch)
+            self._deferred_rows += batch.num_rows
+            unresolved = any(pa.types.is_null(field.type) for field in self._resolved_schema())
+            if not unresolved or self._deferred_rows >= self.null_defer_rows:
+                self._flush_deferred()
+
+    def finish(self, empty_batch):
+        """
+        Skriver sista row groupen och footern och stänger filen.
+
+        Parametrar:
+            empty_batch (callable): Ger en tom batch med rätt kolumner, som skrivs
+                                    om inga rader har kommit (tom tabell).
+
+        Returnerar:
+            int: Antal skrivna rader.
+        """
+        with self.timer.stage("write"):
+            if self._deferred:
+                self._flush_deferred()
+
+            if self._pending_rows:
+                self._writer.write_table(pa.Table.from_batches(self._pending), row_group_size=self.row_group_rows)
+                self._pending, self._pending_rows = [], 0
+
+            if self._writer is None:
+                # Tom tabell – skriv ändå en fil med rätt kolumner
+                empty = empty_batch()
+                self._open(empty.schema)
+                self._writer.write_batch(self._conform(empty))
+
+            for observer in self.observers:
+                metadata = observer.key_value_metadata()
+                if metadata:
+                    self._writer.add_key_value_metadata(metadata)
+            self.close()
+        return self.n_rows
+
+    def close(self):
+        """Stänger filen (även efter ett fel)."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def stream_query_to_parquet(
+    conn,
+    sql,
+    parquet_path,
+    batch_size=DEFAULT_BATCH_SIZE,
+    arraysize=DEFAULT_ARRAYSIZE,
+    prefetchrows=None,
+    schema=None,
+    params=None,
+    column_types=None,
+    output_type_handler=None,
+    observers=None,
+    writer_options=None,
+    row_group_rows=None,
+    timer=None,
+):
+    """
+    Kör en SQL-fråga och skriver resultatet batchvis till en Parquet-fil.
+
+    Parametrar:
+        conn: DB-API-anslutning (t.ex. engine.raw_connection(), sqlite3, duckdb).
+        sql (str): SELECT-sats.
+        parquet_path (str): Sökväg till Parquet-filen som skapas.
+        batch_size (int): Antal rader per batch (och per row group om row_group_rows saknas).
+        arraysize (int): Antal rader per nätverksrundresa.
+        prefetchrows (int | None): Antal rader som förhämtas vid execute (oracledb/cx_Oracle).
+        schema (pa.Schema | None): Explicit Arrow-schema. Om None härleds det från första batchen.
+        params: Eventuella bindvariabler till frågan.
+        column_types (dict[str, pa.DataType] | None): Kända Arrow-typer per kolumn (t.ex. från fetch.build_column_types).
+        output_type_handler (callable | None): Sätts som cursor.outputtypehandler (cx_Oracle/oracledb).
+        observers (list | None): Objekt med observe(batch) och key_value_metadata() som ser varje
+                                 batch och kan lägga till metadata i footern (t.ex. GeoParquet "geo").
+        writer_options (callable | None): schema -> nyckelordsargument till pq.ParquetWriter
+                                          (t.ex. writer.writer_options_for(profil)).
+        row_group_rows (int | None): Rader per row group; batcharna samlas tills så många rader finns.
+        timer (StageTimer | None): Tar emot tiden per steg (instrumentation.py): execute, fetch,
+                                   lob_read, convert, observe och write.
+
+    Returnerar:
+        int: Antal skrivna rader.
+    """
+    timer = timer or StageTimer()
+    cursor = conn.cursor()
+    sink = ParquetBatchSink(
+        parquet_path, observers=observers, writer_options=writer_options, row_group_rows=row_group_rows, timer=timer
+    )
+    try:
+        configure_cursor(cursor, arraysize=arraysize, prefetchrows=prefetchrows)
+        if output_type_handler is not None:
+            cursor.outputtypehandler = output_type_handler
+        with timer.stage("execute"):
+            if params is None:
+                cursor.execute(sql)
+            else:
+                cursor.execute(sql, params)
+        timer.count("round_trips")
+
+        for batch in iter_record_batches(
+            cursor, batch_size=batch_size, schema=schema, column_types=column_types, timer=timer
+        ):
+            sink.write(batch)
+
+        names = [normalize_column_name(d[0]) for d in cursor.description]
+        return sink.finish(lambda: rows_to_record_batch(names, [], schema, column_types))
+    finally:
+        sink.close()
+        cursor.close()
@@ -0,0 +1,212 @@
+## detta är filen dlt_pipeline/giss/writer.py
+
+"""
+Inställningar för Parquet-skrivningen (profiler) och en rådgivare som
+jämför profilerna på ett urval av en exporterad tabell.
+
+En profil är en dict med:
+
+    compression         "snappy" | "lz4" | "zstd" | "gzip" | "none"
+    compression_level   nivå för zstd/gzip (None = codec-standard)
+    row_group_rows      rader per radgrupp (None = en radgrupp per hämtad batch)
+    dictionary          True | False | "auto" (textkolumner utom geometrier) | [kolumner]
+    data_page_size      bytes per datasida (None = pyarrows 1 MB)
+    byte_stream_split   True = BYTE_STREAM_SPLIT för flyttalskolumner (komprimerar bättre)
+    write_statistics    min/max-statistik (standard True, behövs för att DuckDB ska kunna hoppa över radgrupper)
+
+Profilen väljs med PARQUET_PROFILE (alla tabeller) och PARQUET_TABLE_PROFILES
+(t.ex. "GAVD:archive,TDOK:query") i .env. "default" ger pyarrows standard,
+samma filer som tidigare.
+
+Rådgivaren (giss-export advise) skriver ett urval av tabellens senaste
+snapshot med varje profil och mäter storlek, skrivtid och tid för en full
+läsning, så att valet kan göras på mätningar i stället för gissningar.
+"""
+
+import os
+import tempfile
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# -------------------------------------------------------------
+# PROFILER
+# -------------------------------------------------------------
+WRITER_PROFILES = {
+    # pyarrows standard: snappy, ordbok för alla kolumner
+    "default": {},
+    # Snabb läsning för tabeller som frågas ofta
+    "query": {
+        "compression": "lz4",
+        "row_group_rows": 128 * 1024,
+        "dictionary": "auto",
+    },
+    # Bra kompression utan att läsningen blir märkbart långsammare
+    "balanced": {
+        "compression": "zstd",
+        "compression_level": 3,
+        "row_group_rows": 256 * 1024,
+        "dictionary": "auto",
+        "byte_stream_split": True,
+    },
+    # Minsta filerna, för arkiverade snapshots
+    "archive": {
+        "compression": "zstd",
+        "compression_level": 12,
+        "row_group_rows": 1024 * 1024,
+        "dictionary": "auto",
+        "data_page_size": 4 * 1024 * 1024,
+        "byte_stream_split": True,
+    },
+}
+DEFAULT_WRITER_PROFILE = "default"
+DEFAULT_ADVISOR_SAMPLE_ROWS = 200_000
+DEFAULT_ADVISOR_RUNS = 3
+
+_GEOMETRY_SUFFIXES = ("_wkt", "_wkb")
+
+
+# -------------------------------------------------------------
+# HJÄLPFUNKTIONER
+# -------------------------------------------------------------
+def parse_table_profiles(value):
+    """'GAVD:archive,TDOK:query' -> {"GAVD": "archive", "TDOK": "query"}."""
+    profiles = {}
+    for item in (value or "").split(","):
+        if ":" in item:
+            table, name = item.split(":", 1)
+            profiles[table.strip().upper()] = name.strip().lower()
+    return profiles
+
+
+def get_profile(name):
+    """Profilen med namnet name (ValueError om den inte finns)."""
+    if name not in WRITER_PROFILES:
+        raise ValueError(f"Okänd Parquet-profil: {name} (välj bland {', '.join(WRITER_PROFILES)})")
+    return WRITER_PROFILES[name]
+
+
+def table_profile(config, table):
+    """Profil för en tabell: PARQUET_TABLE_PROFILES, annars PARQUET_PROFILE."""
+    name = config.get("parquet_table_profiles", {}).get(table.upper()) or config.get("parquet_profile")
+    return get_profile(name or DEFAULT_WRITER_PROFILE)
+
+
+def parquet_writer_options(profile, schema):
+    """
+    Nyckelordsargument till pq.ParquetWriter / pq.write_table för en profil.
+    Kolumnlistorna (ordbok, byte stream split) räknas fram ur schemat.
+    """
+    options = {}
+    if profile.get("compression"):
+        options["compression"] = profile["compression"]
+    if profile.get("compression_level") is not None:
+        options["compression_level"] = profile["compression_level"]
+    if profile.get("data_page_size"):
+        options["data_page_size"] = profile["data_page_size"]
+    if "write_statistics" in profile:
+        options["write_statistics"] = profile["write_statistics"]
+
+    dictionary = profile.get("dictionary", True)
+    if dictionary == "auto":
+        # Ordbok lönar sig för text med upprepade värden, inte för unika geometrier
+        dictionary = [
+            field.name for field in schema
+            if (pa.types.is_string(field.type) or pa.types.is_large_string(field.type))
+            and not field.name.lower().endswith(_GEOMETRY_SUFFIXES)
+        ]
+    options["use_dictionary"] = dictionary
+
+    if profile.get("byte_stream_split"):
+        floats = [field.name for field in schema if pa.types.is_floating(field.type)]
+        if floats:
+            options["use_byte_stream_split"] = floats
+    return options
+
+
+def writer_options_for(profile):
+    """Funktion schema -> skrivaralternativ, för streaming.stream_query_to_parquet."""
+    return lambda schema: parquet_writer_options(profile, schema)
+
+
+def write_table(table, path, profile, row_group_rows=None):
+    """Skriver en pa.Table med profilens inställningar."""
+    pq.write_table(
+        table,
+        path,
+        row_group_size=row_group_rows or profile.get("row_group_rows"),
+        **parquet_writer_options(profile, table.schema),
+    )
+
+
+# -------------------------------------------------------------
+# RÅDGIVARE
+# -------------------------------------------------------------
+def read_sample(paths, sample_rows=DEFAULT_ADVISOR_SAMPLE_ROWS):
+    """De första sample_rows raderna ur en eller flera Parquet-filer."""
+    batches, n_rows = [], 0
+    for path in paths:
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=min(sample_rows, 64 * 1024)):
+            batches.append(batch.slice(0, sample_rows - n_rows))
+            n_rows += batches[-1].num_rows
+            if n_rows >= sample_rows:
+                return pa.Table.from_batches(batches)
+    if not batches:
+        return pq.read_schema(paths[0]).empty_table()
+    return pa.Table.from_batches(batches)
+
+
+def advise_profiles(sample, profiles=None, runs=DEFAULT_ADVISOR_RUNS):
+    """
+    Skriver urvalet med varje profil och mäter storlek, skrivtid och läsning.
+
+    Parametrar:
+        sample (pa.Table): Urval av tabellen (se read_sample).
+        profiles (list[str] | None): Profilnamn (annars alla i WRITER_PROFILES).
+        runs (int): Antal läsningar per profil; den snabbaste räknas.
+
+    Returnerar:
+        list[dict]: {"profile", "bytes", "ratio", "write_seconds", "scan_seconds", "row_groups"}
+                    per profil, sorterade på storlek. ratio är storleken relativt "default".
+    """
+    results = []
+    with tempfile.TemporaryDirectory(prefix="giss_advise_") as tmp_dir:
+        for name in profiles or list(WRITER_PROFILES):
+            profile = get_profile(name)
+            path = os.path.join(tmp_dir, f"{name}.parquet")
+            start = time.perf_counter()
+            write_table(sample, path, profile)
+            write_seconds = time.perf_counter() - start
+
+            scan_seconds = None
+            for _ in range(max(runs, 1)):
+                start = time.perf_counter()
+                pq.read_table(path, use_threads=True)
+                elapsed = time.perf_counter() - start
+                scan_seconds = elapsed if scan_seconds is None else min(scan_seconds, elapsed)
+
+            results.append({
+                "profile": name,
+                "bytes": os.path.getsize(path),
+                "write_seconds": round(write_seconds, 4),
+                "scan_seconds": round(scan_seconds, 4),
+                "row_groups": pq.read_metadata(path).num_row_groups,
+            })
+
+    baseline = next((r["bytes"] for r in results if r["profile"] == DEFAULT_WRITER_PROFILE), None)
+    for result in results:
+        result["ratio"] = round(result["bytes"] / baseline, 3) if baseline else None
+    return sorted(results, key=lambda r: r["bytes"])
+
+
+def recommend_profile(results, scan_tolerance=1.25):
+    """
+    Minsta profilen vars läsning är högst scan_tolerance gånger långsammare
+    än den snabbaste – filerna arkiveras och läses om och om igen.
+    """
+    if not results:
+        return None
+    fastest = min(r["scan_seconds"] for r in results)
+    candidates = [r for r in results if r["scan_seconds"] <= fastest * scan_tolerance]
+    return min(candidates, key=lambda r: r["bytes"])["profile"]
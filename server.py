@@ -1,11 +1,549 @@
 # server.py
-from fastapi import FastAPI
+"""
+Fråge-API över de exporterade GISS-tabellerna (Parquet i GISS_PARQUET_DIR).
+
+DuckDB läser Parquet-filerna direkt, så bara de kolumner och row groups som
+frågan behöver läses från disk (projektion och filter trycks ned i
+Parquet-läsaren). Svaret strömmas batch för batch som NDJSON eller Arrow IPC,
+så minnet beror på batchstorleken och inte på tabellens storlek.
+
+    GET /tables                         tabeller med senaste snapshot
+    GET /tables/{table}/schema          kolumner och typer
+    GET /tables/{table}                 rader, med parametrarna:
+        columns=ID,NAMN                 projektion
+        filter=KOMMUN:eq:Umeå           filter (upprepningsbar), op: eq ne lt le gt ge like in isnull notnull
+                                        (in tar värden separerade med |)
+        limit=1000&offset=0             sidindelning med offset
+        order_by=ID&after=12345         keyset-sidindelning (nästa sida: after = sista radens ID)
+        bbox=minx,miny,maxx,maxy        rader vars geometri-bbox skär rutan (med en bbox-kolumn från
+                                        spatial klustring, SPATIAL_SORT, läses bara berörda radgrupper)
+        format=ndjson|arrow             NDJSON (standard) eller Arrow IPC-ström
+
+Tabellen läses från senaste klara snapshot ({tabell}_{tidsstämpel}.parquet
+eller katalogen med delfiler), se dlt_pipeline.giss.snapshots.
+
+Cachning (GET /cache/stats visar träffar, missar och evictions):
+    - snapshotlistan läses om bara när katalogens mtime ändras
+    - per tabell hålls schema, geometrikolumn, antal rader och en DuckDB-vy
+      öppna; DuckDB cachar Parquet-footrarna (parquet_metadata_cache)
+    - frågeresultat sparas i en LRU (GISS_CACHE_MAX_BYTES) med nyckeln
+      (tabell, snapshot, frågeparametrar)
+När en ny export av en tabell dyker upp byggs vyn om och tabellens gamla
+resultat tas bort ur cachen.
+"""
+
+import base64
+import itertools
+import json
+import os
+import threading
+from datetime import date, datetime, time
+from decimal import Decimal
+
 import duckdb
-import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from dlt_pipeline.giss.cache import DEFAULT_MAX_BYTES, DEFAULT_MAX_ENTRY_BYTES, ResultCache
+from dlt_pipeline.giss.geometry import wkb_bounds, wkt_bounds
+from dlt_pipeline.giss.snapshots import latest_snapshot, list_snapshots
+from dlt_pipeline.giss.spatial import BBOX_COLUMN
+
+# -------------------------------------------------------------
+# INSTÄLLNINGAR
+# -------------------------------------------------------------
+PARQUET_DIR = os.environ.get("GISS_PARQUET_DIR", "./data/dlt_output/giss_all")
+SAMPLE_PARQUET = "data/sample.parquet"
+DEFAULT_LIMIT = 1000
+BATCH_ROWS = 10_000  # rader per strömmad batch
+CACHE_MAX_BYTES = int(os.environ.get("GISS_CACHE_MAX_BYTES") or DEFAULT_MAX_BYTES)
+CACHE_MAX_ENTRY_BYTES = int(os.environ.get("GISS_CACHE_MAX_ENTRY_BYTES") or DEFAULT_MAX_ENTRY_BYTES)
+
+_COMPARISONS = {"eq": "=", "ne": "<>", "lt": "<", "le": "<=", "gt": ">", "ge": ">=", "like": "LIKE"}
+_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "arrow": "application/vnd.apache.arrow.stream"}
+_ARROW_EOS = b"\xff\xff\xff\xff\x00\x00\x00\x00"
 
 app = FastAPI()
 
+# En DuckDB-databas i minnet för hela processen. Anslutningen delas mellan
+# trådarna och används därför bara för att skapa cursors; allt arbete görs i en cursor.
+_db = duckdb.connect()
+_db.execute("SET parquet_metadata_cache = true")
+_spatial = None
+
+# Cachar (se modulbeskrivningen)
+_results = ResultCache(CACHE_MAX_BYTES, CACHE_MAX_ENTRY_BYTES)
+_tables = {}  # tabell -> metadata för senaste snapshot, se _table_info
+_snapshot_listing = {"mtime": None, "snapshots": {}}
+_metadata_stats = {"hits": 0, "misses": 0, "directory_scans": 0}
+_metadata_lock = threading.Lock()
+
+
+def _has_spatial():
+    # DuckDB:s spatial-tillägg används för bbox-filter om det finns, annars filtreras i Python
+    global _spatial
+    with _metadata_lock:
+        if _spatial is None:
+            cursor = _db.cursor()
+            try:
+                cursor.execute("LOAD spatial")
+                _spatial = True
+            except duckdb.Error:
+                _spatial = False
+            finally:
+                cursor.close()
+    return _spatial
+
+
+# -------------------------------------------------------------
+# TABELLER OCH SCHEMA
+# -------------------------------------------------------------
+def _sql_list(paths):
+    return "[" + ", ".join("'" + p.replace("'", "''") + "'" for p in paths) + "]"
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _read_parquet(files):
+    return f"read_parquet({_sql_list(files)}, union_by_name = true)"
+
+
+def _describe(source):
+    """Kolumner och DuckDB-typer för en vy eller read_parquet(...) (ur Parquet-footern)."""
+    rows = _db.cursor().execute(f"DESCRIBE SELECT * FROM {source}").fetchall()
+    return {name: column_type for name, column_type, *_ in rows}
+
+
+def _snapshots():
+    """Alla snapshots i PARQUET_DIR; katalogen läses om bara när dess mtime ändras."""
+    try:
+        mtime = os.stat(PARQUET_DIR).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    with _metadata_lock:
+        if _snapshot_listing["mtime"] != mtime:
+            _snapshot_listing.update(mtime=mtime, snapshots=list_snapshots(PARQUET_DIR))
+            _metadata_stats["directory_scans"] += 1
+        return _snapshot_listing["snapshots"]
+
+
+def _table_info(table):
+    """
+    Metadata för tabellens senaste snapshot: schema, geometrikolumn, antal rader
+    och namnet på en DuckDB-vy över filerna. Byggs om (och tabellens cachade
+    resultat tas bort) när en ny snapshot dyker upp eller filerna ändras.
+    """
+    table = table.upper()
+    snapshot = latest_snapshot(PARQUET_DIR, table, _snapshots())
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail=f"Ingen export av {table} i {PARQUET_DIR}")
+    version = (snapshot["path"], snapshot["mtime"])
+
+    with _metadata_lock:
+        info = _tables.get(table)
+        if info is not None and info["version"] == version:
+            _metadata_stats["hits"] += 1
+            return info
+        _metadata_stats["misses"] += 1
+
+        view = _quote(f"giss_{table.lower()}")
+        cursor = _db.cursor()
+        try:
+            cursor.execute(f"CREATE OR REPLACE VIEW {view} AS SELECT * FROM {_read_parquet(snapshot['files'])}")
+        finally:
+            cursor.close()
+        columns = _describe(view)
+        geometry = _geometry_column(snapshot["files"], columns)
+        info = {
+            "version": version,
+            "snapshot": snapshot,
+            "view": view,
+            "columns": columns,
+            "geometry": geometry,
+            "covering": _bbox_covering(snapshot["files"], columns, geometry),
+            "rows": sum(pq.read_metadata(f).num_rows for f in snapshot["files"]),
+        }
+        _tables[table] = info
+    # Resultat från äldre snapshots av tabellen kan aldrig träffas igen
+    _results.invalidate(table, keep=lambda key: key[1] == version)
+    return info
+
+
+def _geometry_column(files, columns):
+    """
+    (kolumn, kodning) för tabellens geometri: primärkolumnen i GeoParquet-metadatan,
+    annars första kolumnen som slutar på _wkb/_wkt. None om tabellen saknar geometri.
+    """
+    geo = (pq.read_metadata(files[0]).metadata or {}).get(b"geo")
+    if geo:
+        meta = json.loads(geo)
+        name = meta.get("primary_column")
+        if name in columns:
+            return name, meta["columns"][name].get("encoding", "WKB").lower()
+    for name in columns:
+        if name.lower().endswith("_wkb"):
+            return name, "wkb"
+        if name.lower().endswith("_wkt"):
+            return name, "wkt"
+    return None
+
+
+def _bbox_covering(files, columns, geometry):
+    """
+    Bbox-kolumnen (struct med xmin, ymin, xmax, ymax) för geometrin: "covering" i
+    GeoParquet 1.1-metadatan, annars en sådan kolumn från spatial.cluster_parquet_file
+    (WKT-tabeller). None om filerna inte är spatialt klustrade.
+    """
+    if geometry is None:
+        return None
+    geo = (pq.read_metadata(files[0]).metadata or {}).get(b"geo")
+    if geo:
+        covering = json.loads(geo)["columns"].get(geometry[0], {}).get("covering", {}).get("bbox")
+        if covering and covering["xmin"][0] in columns:
+            return covering["xmin"][0]
+    for name in (BBOX_COLUMN, f"{geometry[0]}_{BBOX_COLUMN}"):
+        if columns.get(name, "").lower().startswith("struct(xmin double, ymin double, xmax double, ymax double"):
+            return name
+    return None
+
+
+def _resolve_column(columns, name):
+    # Kolumnnamn jämförs skiftlägesokänsligt (exporten skriver gemener)
+    for column in columns:
+        if column.lower() == name.lower():
+            return column
+    raise HTTPException(status_code=400, detail=f"Okänd kolumn: {name}")
+
+
+# -------------------------------------------------------------
+# FRÅGEBYGGARE
+# -------------------------------------------------------------
+def _parse_bbox(bbox):
+    try:
+        values = [float(v) for v in bbox.split(",")]
+    except ValueError:
+        values = []
+    if len(values) != 4:
+        raise HTTPException(status_code=400, detail="bbox ska vara minx,miny,maxx,maxy")
+    return values
+
+
+def _filter_clause(columns, spec):
+    """Ett filter 'kolumn:op:värde' som SQL med bindvariabler."""
+    parts = spec.split(":", 2)
+    if len(parts) < 2:
+        raise HTTPException(status_code=400, detail=f"Ogiltigt filter: {spec}")
+    column = _resolve_column(columns, parts[0])
+    op, value = parts[1].lower(), parts[2] if len(parts) == 3 else None
+    quoted, column_type = _quote(column), columns[column]
+
+    if op == "isnull":
+        return f"{quoted} IS NULL", []
+    if op == "notnull":
+        return f"{quoted} IS NOT NULL", []
+    if value is None:
+        raise HTTPException(status_code=400, detail=f"Filter saknar värde: {spec}")
+    if op == "in":
+        values = value.split("|")
+        placeholders = ", ".join(f"CAST(? AS {column_type})" for _ in values)
+        return f"{quoted} IN ({placeholders})", values
+    if op == "like":
+        return f"CAST({quoted} AS VARCHAR) LIKE ?", [value]
+    if op not in _COMPARISONS:
+        raise HTTPException(status_code=400, detail=f"Okänd operator: {op}")
+    return f"{quoted} {_COMPARISONS[op]} CAST(? AS {column_type})", [value]
+
+
+def build_query(source, columns, select=None, filters=None, order_by=None, after=None,
+                limit=DEFAULT_LIMIT, offset=0, bbox=None, geometry=None, covering=None):
+    """
+    Bygger SQL för en tabellfråga. Kolumnnamn kontrolleras mot schemat och
+    värden skickas som bindvariabler.
+
+    Parametrar:
+        source (str): Det som står efter FROM – tabellens vy eller read_parquet(...).
+        covering (str | None): Bbox-kolumn; då filtreras bbox på dess fält, så att
+                               DuckDB kan hoppa över radgrupper med min/max-statistiken.
+
+    Returnerar:
+        tuple: (sql, params, python_bbox) – python_bbox är bbox-rutan om filtret
+               måste göras i Python (spatial-tillägget saknas), annars None.
+    """
+    selected = [_resolve_column(columns, c) for c in select] if select else list(columns)
+    where, params = [], []
+    for spec in filters or []:
+        clause, values = _filter_clause(columns, spec)
+        where.append(clause)
+        params.extend(values)
+
+    python_bbox = None
+    if bbox is not None:
+        if geometry is None:
+            raise HTTPException(status_code=400, detail="Tabellen har ingen geometrikolumn")
+        name, encoding = geometry
+        if covering is not None:
+            minx, miny, maxx, maxy = bbox
+            c = _quote(covering)
+            where.append(f"{c}.xmin <= ? AND {c}.xmax >= ? AND {c}.ymin <= ? AND {c}.ymax >= ?")
+            params.extend([maxx, minx, maxy, miny])
+        elif _has_spatial():
+            if columns[name] == "GEOMETRY":
+                geom = _quote(name)
+            elif encoding == "wkt":
+                geom = f"ST_GeomFromText({_quote(name)})"
+            else:
+                geom = f"ST_GeomFromWKB({_quote(name)})"
+            where.append(f"ST_Intersects(ST_Envelope({geom}), ST_MakeEnvelope(?, ?, ?, ?))")
+            params.extend(bbox)
+        else:
+            # Geometrin behövs för filtret i Python (iter_batches tar bort den igen)
+            python_bbox = bbox
+            if name not in selected:
+                selected.append(name)
+
+    if order_by is not None:
+        order_by = _resolve_column(columns, order_by)
+        if after is not None:
+            where.append(f"{_quote(order_by)} > CAST(? AS {columns[order_by]})")
+            params.append(after)
+
+    sql = f"SELECT {', '.join(_quote(c) for c in selected)} FROM {source}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    if order_by is not None:
+        sql += f" ORDER BY {_quote(order_by)}"
+    # Med bbox-filter i Python måste LIMIT/OFFSET räknas efter filtret
+    if python_bbox is None:
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        if offset:
+            sql += f" OFFSET {int(offset)}"
+    return sql, params, python_bbox
+
+
+# -------------------------------------------------------------
+# STRÖMNING
+# -------------------------------------------------------------
+def _bbox_mask(array, encoding, bbox):
+    bounds = wkt_bounds if encoding == "wkt" else wkb_bounds
+    minx, miny, maxx, maxy = bbox
+    mask = []
+    for value in array.to_pylist():
+        b = bounds(value) if value is not None else None
+        mask.append(b is not None and b[0] <= maxx and b[2] >= minx and b[1] <= maxy and b[3] >= miny)
+    return pa.array(mask, type=pa.bool_())
+
+
+def iter_batches(sql, params, python_bbox=None, geometry=None, limit=DEFAULT_LIMIT, offset=0, select=None):
+    """
+    Kör frågan och ger pyarrow RecordBatches om högst BATCH_ROWS rader.
+    Bbox-filter i Python (och då LIMIT/OFFSET) görs batch för batch; select
+    är de kolumner som ska finnas kvar efter filtret.
+
+    Frågan körs och första batchen hämtas redan här, innan svaret börjar
+    strömmas: ett fel i frågan (t.ex. ett filtervärde som inte går att
+    omvandla till kolumnens typ) ger då 400 i stället för 200 med tom kropp.
+    """
+    cursor = _db.cursor()
+    try:
+        reader = cursor.execute(sql, params).to_arrow_reader(BATCH_ROWS)
+        first = next(iter(reader), None)
+    except duckdb.Error as e:
+        cursor.close()
+        raise HTTPException(status_code=400, detail=f"Ogiltig fråga: {e}")
+    except BaseException:
+        cursor.close()
+        raise
+    return _stream_batches(cursor, reader, first, python_bbox, geometry, limit, offset, select)
+
+
+def _stream_batches(cursor, reader, first, python_bbox, geometry, limit, offset, select):
+    try:
+        remaining_offset, remaining = offset, limit or None
+        empty = True
+        batches = reader if first is None else itertools.chain([first], reader)
+        for batch in batches:
+            if python_bbox is not None:
+                batch = batch.filter(_bbox_mask(batch.column(geometry[0]), geometry[1], python_bbox))
+                if remaining_offset:
+                    skipped = min(remaining_offset, batch.num_rows)
+                    batch, remaining_offset = batch.slice(skipped), remaining_offset - skipped
+                if remaining is not None:
+                    batch = batch.slice(0, remaining)
+                    remaining -= batch.num_rows
+                if select:
+                    batch = batch.select(select)
+            if batch.num_rows:
+                empty = False
+                yield batch
+            if remaining == 0:
+                break
+        if empty:
+            # Inga träffar – en tom batch så att Arrow-strömmen ändå får ett schema
+            schema = reader.schema
+            if python_bbox is not None and select:
+                schema = pa.schema([schema.field(name) for name in select])
+            yield pa.RecordBatch.from_pylist([], schema=schema)
+    finally:
+        cursor.close()
+
+
+def _json_default(value):
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(value)).decode("ascii")
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return str(value)
+
+
+def ndjson_chunks(batches):
+    """En rad JSON per post; binära värden (WKB) som base64."""
+    for batch in batches:
+        yield "".join(json.dumps(row, default=_json_default, ensure_ascii=False) + "\n" for row in batch.to_pylist())
+
+
+def arrow_chunks(batches):
+    """Arrow IPC-ström: schemat, ett meddelande per batch och slutmarkören."""
+    for i, batch in enumerate(batches):
+        if i == 0:
+            yield batch.schema.serialize().to_pybytes()
+        yield batch.serialize().to_pybytes()
+    yield _ARROW_EOS
+
+
+def _respond(batches, fmt, headers=None):
+    if fmt not in _MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format ska vara ndjson eller arrow")
+    chunks = arrow_chunks(batches) if fmt == "arrow" else ndjson_chunks(batches)
+    return StreamingResponse(chunks, media_type=_MEDIA_TYPES[fmt], headers=headers)
+
+
+def _caching(batches, key):
+    """
+    Skickar batcharna vidare och sparar resultatet i cachen när det är
+    färdigläst. Blir det större än max_entry_bytes slutar insamlingen, och
+    avbryter klienten sparas ingenting.
+    """
+    collected, nbytes = [], 0
+    for batch in batches:
+        if collected is not None:
+            nbytes += batch.nbytes
+            if nbytes > _results.max_entry_bytes:
+                collected = None
+                _results.reject()
+            else:
+                collected.append(batch)
+        yield batch
+    if collected is not None:
+        _results.put(key, collected)
+
+
+# -------------------------------------------------------------
+# ENDPOINTS
+# -------------------------------------------------------------
+@app.get("/tables")
+def list_tables():
+    """Tabeller med senaste snapshot, antal rader och filer (ur Parquet-footern)."""
+    snapshots = _snapshots()
+    tables = []
+    for table in sorted(snapshots):
+        if latest_snapshot(PARQUET_DIR, table, snapshots) is None:
+            continue
+        info = _table_info(table)
+        tables.append({
+            "table": table,
+            "snapshot": info["snapshot"]["timestamp"],
+            "files": len(info["snapshot"]["files"]),
+            "rows": info["rows"],
+        })
+    return tables
+
+
+@app.get("/tables/{table}/schema")
+def table_schema(table: str):
+    info = _table_info(table)
+    geometry = info["geometry"]
+    return {
+        "table": table.upper(),
+        "snapshot": info["snapshot"]["timestamp"],
+        "columns": [{"name": name, "type": column_type} for name, column_type in info["columns"].items()],
+        "geometry": {"column": geometry[0], "encoding": geometry[1], "bbox_column": info["covering"]}
+        if geometry else None,
+    }
+
+
+@app.get("/tables/{table}")
+def query_table(
+    table: str,
+    columns: str | None = None,
+    filter: list[str] | None = Query(None),
+    limit: int = Query(DEFAULT_LIMIT, ge=0),
+    offset: int = Query(0, ge=0),
+    order_by: str | None = None,
+    after: str | None = None,
+    bbox: str | None = None,
+    format: str = "ndjson",
+):
+    """Rader ur senaste snapshot, strömmade som NDJSON eller Arrow IPC (limit=0 ger alla rader)."""
+    if after is not None and order_by is None:
+        raise HTTPException(status_code=400, detail="after kräver order_by")
+    if format not in _MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format ska vara ndjson eller arrow")
+    info = _table_info(table)
+    schema = info["columns"]
+    geometry = info["geometry"] if bbox else None
+    select = [_resolve_column(schema, c.strip()) for c in columns.split(",") if c.strip()] if columns else None
+    headers = {"X-Snapshot": info["snapshot"]["timestamp"]}
+
+    key = (table.upper(), info["version"], tuple(select or ()), tuple(filter or ()),
+           limit, offset, order_by, after, bbox)
+    cached = _results.get(key)
+    if cached is not None:
+        return _respond(iter(cached), format, headers={**headers, "X-Cache": "HIT"})
+
+    sql, params, python_bbox = build_query(
+        info["view"],
+        schema,
+        select=select,
+        filters=filter,
+        order_by=order_by,
+        after=after,
+        limit=limit,
+        offset=offset,
+        bbox=_parse_bbox(bbox) if bbox else None,
+        geometry=geometry,
+        covering=info["covering"],
+    )
+    batches = iter_batches(sql, params, python_bbox, geometry, limit=limit, offset=offset, select=select)
+    return _respond(_caching(batches, key), format, headers={**headers, "X-Cache": "MISS"})
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Träffar, missar och storlek för resultatcachen och metadatacachen."""
+    with _metadata_lock:
+        metadata = {**_metadata_stats, "tables": len(_tables)}
+    return {"results": _results.stats(), "metadata": metadata}
+
+
+@app.post("/cache/clear")
+def cache_clear():
+    """Tömmer resultatcachen (metadata och vyer byggs om vid behov ändå)."""
+    _results.clear()
+    return _results.stats()
+
+
 @app.get("/parquet")
-def read_parquet():
-    df = pd.read_parquet("data/sample.parquet")
-    return df.to_dict(orient="records")
+def read_parquet(limit: int = Query(DEFAULT_LIMIT, ge=0), offset: int = Query(0, ge=0), format: str = "ndjson"):
+    """Exempelfilen data/sample.parquet, strömmad på samma sätt som tabellerna."""
+    if not os.path.exists(SAMPLE_PARQUET):
+        raise HTTPException(status_code=404, detail=f"{SAMPLE_PARQUET} saknas")
+    source = _read_parquet([SAMPLE_PARQUET])
+    sql, params, _ = build_query(source, _describe(source), limit=limit, offset=offset)
+    return _respond(iter_batches(sql, params), format)
@@ -0,0 +1,29 @@
+## detta är filen tests/conftest.py
+
+"""Gemensamma hjälpfunktioner för testerna."""
+
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+
+def write_parquet(path, **columns):
+    """Skriver en Parquet-fil med kolumnerna (namn=lista med värden) och returnerar sökvägen."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    pq.write_table(pa.table(columns), path)
+    return str(path)
+
+
+def read_rows(path, sort_by="id"):
+    """Raderna i en Parquet-fil (eller katalog) som dicts, sorterade på sort_by."""
+    return sorted(pq.read_table(path).to_pylist(), key=lambda row: row[sort_by])
+
+
+@pytest.fixture
+def parquet_dir(tmp_path):
+    """Tom PARQUET_DIR för en snapshot-layout."""
+    path = tmp_path / "giss_all"
+    path.mkdir()
+    return str(path)
@@ -0,0 +1,209 @@
+## detta är filen tests/test_compaction.py
+
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from dlt_pipeline.giss.compaction import (
+    apply_compaction,
+    build_snapshot_catalog,
+    compact_snapshots,
+    create_latest_views,
+    load_snapshot_catalog,
+    plan_compaction,
+    plan_retention,
+)
+from dlt_pipeline.giss.manifest import save_manifest
+from dlt_pipeline.giss.snapshots import list_snapshots
+from tests.conftest import read_rows, write_parquet
+
+
+def _full(parquet_dir, timestamp, ids, value="a"):
+    return write_parquet(
+        os.path.join(parquet_dir, f"gavd_{timestamp}.parquet"), id=ids, v=[value] * len(ids)
+    )
+
+
+def _delta(parquet_dir, timestamp, ids, value):
+    return write_parquet(
+        os.path.join(parquet_dir, f"gavd_delta_{timestamp}.parquet"), id=ids, v=[value] * len(ids)
+    )
+
+
+@pytest.fixture
+def with_deltas(parquet_dir):
+    # Full snapshot med 0..9; delta 1 ändrar 5 och lägger till 10; delta 2 ändrar 10 och lägger till 11
+    _full(parquet_dir, "20250101_000000", list(range(10)))
+    _delta(parquet_dir, "20250102_000000", [5, 10], "b")
+    _delta(parquet_dir, "20250103_000000", [10, 11], "c")
+    return parquet_dir
+
+
+def _config(parquet_dir, tmp_path, **overrides):
+    return {
+        "parquet_dir": parquet_dir,
+        "duckdb_path": str(tmp_path / "giss.duckdb"),
+        "catalog_cache": str(tmp_path / "_catalog.json"),
+        "keep_snapshots": 2,
+        "keep_days": 0,
+        "row_group_rows": 4,
+        "small_file_bytes": 64 * 1024 * 1024,
+        "target_file_bytes": 1024 * 1024 * 1024,
+        **overrides,
+    }
+
+
+# -------------------------------------------------------------
+# KOMPAKTERING
+# -------------------------------------------------------------
+def test_fold_keeps_the_newest_row_per_key(with_deltas):
+    action = plan_compaction(list_snapshots(with_deltas)["GAVD"], key=["id"])
+    assert action["action"] == "fold"
+    assert action["name"] == "gavd_20250103_000000"
+
+    outputs = apply_compaction(action, row_group_rows=4)
+
+    expected = {i: "a" for i in range(10)} | {5: "b", 10: "c", 11: "c"}
+    assert read_rows(outputs[0]) == [{"id": i, "v": v} for i, v in sorted(expected.items())]
+    # Den gamla fulla snapshoten sparas för retention, deltan är inbakade
+    snapshots = list_snapshots(with_deltas)["GAVD"]
+    assert [(s["timestamp"], s["kind"]) for s in snapshots] == [
+        ("20250101_000000", "full"), ("20250103_000000", "full"),
+    ]
+
+
+def test_without_key_deltas_are_not_folded_into_a_full_snapshot(with_deltas):
+    action = plan_compaction(list_snapshots(with_deltas)["GAVD"])
+    assert action["action"] == "deltas"
+    assert action["name"] == "gavd_delta_20250103_000000"
+
+    apply_compaction(action, row_group_rows=4)
+
+    snapshots = list_snapshots(with_deltas)["GAVD"]
+    assert [(s["timestamp"], s["kind"]) for s in snapshots] == [
+        ("20250101_000000", "full"), ("20250103_000000", "delta"),
+    ]
+
+
+def test_fold_too_large_merges_deltas_only(with_deltas):
+    action = plan_compaction(list_snapshots(with_deltas)["GAVD"], target_file_bytes=1, key=["id"])
+
+    assert action["action"] == "deltas"
+
+
+def test_small_parts_are_merged(parquet_dir):
+    for i in range(3):
+        write_parquet(os.path.join(parquet_dir, "gavd_20250101_000000", f"part-{i:05d}.parquet"), id=[i], v=["a"])
+
+    action = plan_compaction(list_snapshots(parquet_dir)["GAVD"])
+    assert action["action"] == "parts"
+    outputs = apply_compaction(action, row_group_rows=4)
+
+    assert outputs == [os.path.join(parquet_dir, "gavd_20250101_000000.parquet")]
+    assert [row["id"] for row in read_rows(outputs[0])] == [0, 1, 2]
+
+
+def test_protected_runs_are_left_alone(with_deltas):
+    snapshots = list_snapshots(with_deltas)["GAVD"]
+
+    assert plan_compaction(snapshots, key=["id"], protected={"20250103_000000"}) is None
+
+
+# -------------------------------------------------------------
+# RETENTION
+# -------------------------------------------------------------
+def _snapshots(*entries):
+    return [{"timestamp": timestamp, "kind": kind, "path": f"{kind}_{timestamp}"} for timestamp, kind in entries]
+
+
+def test_retention_keeps_latest_full_snapshots_and_their_deltas():
+    snapshots = _snapshots(
+        ("20250101_000000", "full"),
+        ("20250102_000000", "delta"),
+        ("20250103_000000", "full"),
+        ("20250104_000000", "delta"),
+        ("20250105_000000", "full"),
+        ("20250106_000000", "delta"),
+    )
+
+    removed = plan_retention(snapshots, keep_snapshots=2)
+
+    assert [(s["timestamp"], s["kind"]) for s in removed] == [
+        ("20250101_000000", "full"), ("20250102_000000", "delta"),
+    ]
+
+
+def test_retention_by_age_and_protected_runs():
+    snapshots = _snapshots(("20250101_000000", "full"), ("20250110_000000", "full"), ("20250111_000000", "full"))
+    now = datetime(2025, 1, 12)
+
+    assert plan_retention(snapshots, keep_snapshots=1, keep_days=5, now=now) == snapshots[:1]
+    assert plan_retention(snapshots, keep_snapshots=1, protected={"20250101_000000"}, now=now) == snapshots[1:2]
+    # Senaste fulla snapshot tas aldrig bort
+    assert plan_retention(snapshots, keep_snapshots=0) == snapshots[:2]
+
+
+# -------------------------------------------------------------
+# HELA STEGET
+# -------------------------------------------------------------
+def test_compact_snapshots(with_deltas, tmp_path):
+    _full(with_deltas, "20241231_000000", [0], value="old")
+    with open(tmp_path / "_catalog.json", "w", encoding="utf-8") as f:
+        json.dump({"GAVD": {"primary_key": ["ID"]}}, f)
+
+    catalog = compact_snapshots(_config(with_deltas, tmp_path), views=False)
+
+    latest = catalog["tables"]["GAVD"]["latest"]
+    assert latest["timestamp"] == "20250103_000000"
+    assert latest["rows"] == 12
+    assert [s["timestamp"] for s in catalog["tables"]["GAVD"]["snapshots"]] == ["20250101_000000", "20250103_000000"]
+    assert load_snapshot_catalog(with_deltas)["tables"]["GAVD"]["latest"]["files"] == latest["files"]
+
+
+def _latest_rows(duckdb_path):
+    import duckdb
+
+    con = duckdb.connect(duckdb_path)
+    try:
+        return dict(con.execute('SELECT id, v FROM "latest"."gavd"').fetchall())
+    finally:
+        con.close()
+
+
+def test_latest_view_keeps_newest_row_per_key(with_deltas, tmp_path):
+    duckdb_path = str(tmp_path / "giss.duckdb")
+    catalog = build_snapshot_catalog(with_deltas, keys={"GAVD": ["id"]})
+
+    latest = catalog["tables"]["GAVD"]["latest"]
+    assert (latest["timestamp"], latest["key"], len(latest["sources"])) == ("20250103_000000", ["id"], 3)
+    create_latest_views(duckdb_path, catalog)
+
+    assert _latest_rows(duckdb_path) == {i: "a" for i in range(10)} | {5: "b", 10: "c", 11: "c"}
+
+
+def test_latest_without_key_is_the_full_snapshot(with_deltas, tmp_path):
+    duckdb_path = str(tmp_path / "giss.duckdb")
+    catalog = build_snapshot_catalog(with_deltas)
+
+    latest = catalog["tables"]["GAVD"]["latest"]
+    assert (latest["timestamp"], latest["rows"], latest["key"]) == ("20250101_000000", 10, [])
+    create_latest_views(duckdb_path, catalog)
+
+    assert _latest_rows(duckdb_path) == {i: "a" for i in range(10)}
+
+
+def test_compact_snapshots_skips_unfinished_runs(with_deltas, tmp_path):
+    save_manifest(
+        os.path.join(with_deltas, "_run_manifest.json"),
+        {"run_id": "20250103_000000", "units": {"GAVD": {"table": "GAVD", "status": "error"}}},
+    )
+
+    compact_snapshots(_config(with_deltas, tmp_path), views=False)
+
+    # Den ofärdiga deltan syns inte, den första deltan slås inte ihop utan nyckel
+    assert sorted(os.listdir(with_deltas)) == [
+        "_run_manifest.json", "_snapshots.json",
+        "gavd_20250101_000000.parquet", "gavd_delta_20250102_000000.parquet", "gavd_delta_20250103_000000.parquet",
+    ]
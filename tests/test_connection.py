@@ -0,0 +1,79 @@
+## detta är filen tests/test_connection.py
+
+import pytest
+
+from dlt_pipeline.giss import connection, export
+from dlt_pipeline.giss.connection import acquire_connection, acquire_healthy
+
+
+class FakeConnection:
+    def __init__(self, healthy=True):
+        self.healthy = healthy
+
+    def is_healthy(self):
+        return self.healthy
+
+
+class FakePool:
+    def __init__(self, *connections):
+        self.free = list(connections)
+        self.dropped, self.released = [], []
+
+    def acquire(self):
+        return self.free.pop(0)
+
+    def drop(self, conn):
+        self.dropped.append(conn)
+
+    def release(self, conn):
+        self.released.append(conn)
+
+
+def test_dead_session_is_dropped_and_replaced():
+    dead, alive = FakeConnection(healthy=False), FakeConnection()
+    pool = FakePool(dead, alive)
+
+    assert acquire_healthy(pool) is alive
+    assert pool.dropped == [dead]
+
+
+def test_session_that_dies_during_use_is_not_released(monkeypatch):
+    conn = FakeConnection()
+    pool = FakePool(conn)
+    monkeypatch.setattr(connection, "_pool", pool)
+
+    with pytest.raises(RuntimeError):
+        with acquire_connection():
+            conn.healthy = False
+            raise RuntimeError("ORA-03113")
+
+    assert (pool.dropped, pool.released) == ([conn], [])
+
+
+def test_engine_creator_uses_the_health_check(monkeypatch):
+    sqlalchemy = pytest.importorskip("sqlalchemy")
+    dead, alive = FakeConnection(healthy=False), FakeConnection()
+    pool = FakePool(dead, alive)
+    monkeypatch.setattr(connection, "_pool", pool)
+    monkeypatch.setattr(connection, "_settings", {})
+    monkeypatch.setattr(connection, "_engine", None)
+    created = {}
+    monkeypatch.setattr(sqlalchemy, "create_engine", lambda url, creator, poolclass: created.update(creator=creator))
+
+    connection.get_engine()
+
+    assert created["creator"]() is alive
+    assert pool.dropped == [dead]
+
+
+def test_shared_pool_does_not_change_the_callers_config(monkeypatch):
+    started = []
+    monkeypatch.setattr(export, "close_pool", lambda: None)
+    monkeypatch.setattr(export, "init_export_worker", started.append)
+    config = {"connection": {"max": 2}, "workers": 8}
+
+    shared = export.init_shared_pool(config, 8)
+
+    assert config["connection"]["max"] == 2
+    assert shared["connection"]["max"] == 8
+    assert started == [shared]
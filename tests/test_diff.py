@@ -0,0 +1,112 @@
+## detta är filen tests/test_diff.py
+
+import json
+import os
+
+import pytest
+
+from dlt_pipeline.giss.diff import consecutive_full_snapshots, diff_snapshots, run_snapshot_diff
+from tests.conftest import read_rows, write_parquet
+
+
+def _snapshot(parquet_dir, timestamp, rows, **extra):
+    return write_parquet(
+        os.path.join(parquet_dir, f"gavd_{timestamp}.parquet"),
+        id=[r[0] for r in rows],
+        namn=[r[1] for r in rows],
+        **extra,
+    )
+
+
+@pytest.fixture
+def pair(parquet_dir):
+    # 1 oförändrad, 2 ändrad, 3 borttagen, 4 ny
+    old = _snapshot(parquet_dir, "20250101_000000", [(1, "a"), (2, "b"), (3, "c")])
+    new = _snapshot(parquet_dir, "20250102_000000", [(1, "a"), (2, "B"), (4, "d")])
+    return old, new
+
+
+def test_diff_with_primary_key(pair, tmp_path):
+    output = str(tmp_path / "_changes" / "gavd.parquet")
+
+    result = diff_snapshots([pair[0]], [pair[1]], ["id"], output)
+
+    assert {k: result[k] for k in ("inserted", "updated", "deleted", "unchanged", "schema_changed")} == {
+        "inserted": 1, "updated": 1, "deleted": 1, "unchanged": 1, "schema_changed": False,
+    }
+    assert result["changeset"] == output
+    assert read_rows(output) == [
+        {"_change": "update", "id": 2, "namn": "B"},
+        {"_change": "delete", "id": 3, "namn": None},
+        {"_change": "insert", "id": 4, "namn": "d"},
+    ]
+
+
+def test_diff_without_key_uses_row_hash(pair, tmp_path):
+    output = str(tmp_path / "gavd.parquet")
+
+    result = diff_snapshots([pair[0]], [pair[1]], [], output)
+
+    # Utan nyckel blir en ändrad rad en delete och en insert, med hela raderna
+    assert (result["inserted"], result["updated"], result["deleted"], result["unchanged"]) == (2, 0, 2, 1)
+    assert sorted((r["_change"], r["id"], r["namn"]) for r in read_rows(output)) == [
+        ("delete", 2, "b"), ("delete", 3, "c"), ("insert", 2, "B"), ("insert", 4, "d"),
+    ]
+
+
+def test_identical_snapshots_write_no_changeset(parquet_dir, tmp_path):
+    rows = [(1, "a"), (2, "b")]
+    old = _snapshot(parquet_dir, "20250101_000000", rows)
+    new = _snapshot(parquet_dir, "20250102_000000", rows)
+    output = str(tmp_path / "gavd.parquet")
+
+    result = diff_snapshots([old], [new], ["id"], output)
+
+    assert (result["unchanged"], result["changeset"]) == (2, None)
+    assert not os.path.exists(output)
+
+
+def test_added_column_is_a_schema_change(parquet_dir, tmp_path):
+    old = _snapshot(parquet_dir, "20250101_000000", [(1, "a")])
+    new = _snapshot(parquet_dir, "20250102_000000", [(1, "a")], kommun=["Umeå"])
+
+    result = diff_snapshots([old], [new], ["id"], str(tmp_path / "gavd.parquet"))
+
+    # Bara gemensamma kolumner jämförs
+    assert result["schema_changed"] is True
+    assert result["unchanged"] == 1
+
+
+def test_missing_key_column_is_an_error(pair, tmp_path):
+    with pytest.raises(ValueError):
+        diff_snapshots([pair[0]], [pair[1]], ["gid"], str(tmp_path / "gavd.parquet"))
+
+
+def test_consecutive_full_snapshots_ignores_deltas():
+    snapshots = [
+        {"timestamp": "1", "kind": "full"},
+        {"timestamp": "2", "kind": "delta"},
+        {"timestamp": "3", "kind": "full"},
+    ]
+
+    assert consecutive_full_snapshots(snapshots) == (snapshots[0], snapshots[2])
+    assert consecutive_full_snapshots(snapshots[:2]) is None
+
+
+def test_run_snapshot_diff_skips_pairs_already_compared(pair, parquet_dir, tmp_path):
+    catalog_cache = str(tmp_path / "_catalog.json")
+    with open(catalog_cache, "w", encoding="utf-8") as f:
+        json.dump({"GAVD": {"primary_key": ["ID"]}}, f)
+    config = {
+        "parquet_dir": parquet_dir,
+        "changes_dir": os.path.join(parquet_dir, "_changes"),
+        "catalog_cache": catalog_cache,
+    }
+
+    first = run_snapshot_diff(config)
+    assert first["GAVD"]["key"] == ["id"]
+    assert (first["GAVD"]["previous"], first["GAVD"]["current"]) == ("20250101_000000", "20250102_000000")
+    assert os.path.exists(first["GAVD"]["changeset"])
+
+    assert run_snapshot_diff(config) == {}
+    assert set(run_snapshot_diff(config, force=True)) == {"GAVD"}
@@ -0,0 +1,74 @@
+## detta är filen tests/test_fetch.py
+
+from decimal import Decimal
+
+import pyarrow as pa
+import pytest
+
+from dlt_pipeline.giss.fetch import build_column_types, clean_number, make_number_converter
+from dlt_pipeline.giss.queries import build_select_with_wkt_safe
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("12.5", Decimal("12.5")),
+        (Decimal("-0.0000005"), Decimal(0)),
+        (-1, None),
+        ("NaN", None),
+        ("inte ett tal", None),
+        (None, None),
+    ],
+)
+def test_clean_number(value, expected):
+    assert clean_number(value) == expected
+
+
+def test_integer_columns_are_fetched_as_int():
+    python_type, convert = make_number_converter(pa.int64())
+
+    assert python_type is int
+    assert (convert(2**62), convert(0), convert(-1)) == (2**62, 0, None)
+
+
+def test_float_columns_clamp_micro_negatives():
+    python_type, convert = make_number_converter(pa.float64())
+
+    assert python_type is float
+    assert (convert(2.5), convert(-1e-9), convert(-0.5), convert(float("inf"))) == (2.5, 0.0, None, None)
+
+
+def test_decimal_columns_keep_38_digits():
+    # Standardkontexten har bara 28 siffror; NUMBER(38,2) ska ändå gå att kvantisera
+    python_type, convert = make_number_converter(pa.decimal128(38, 2))
+    value = Decimal("123456789012345678901234567890123456.789")
+
+    assert python_type is Decimal
+    assert convert(value) == Decimal("123456789012345678901234567890123456.79")
+    assert convert(Decimal("-1e-9")) == Decimal("0.00")
+
+
+def test_decimal_outside_precision_becomes_null():
+    _, convert = make_number_converter(pa.decimal128(12, 3))
+
+    assert convert(Decimal("999999999.9994")) == Decimal("999999999.999")
+    assert convert(Decimal("999999999.9996")) is None
+    assert convert(Decimal("1e60")) is None
+
+
+def test_safe_text_columns_are_text_also_with_typed_numbers():
+    columns = [
+        {"name": "ID", "data_type": "NUMBER", "precision": 10, "scale": 0},
+        {"name": "AREA", "data_type": "NUMBER", "precision": 12, "scale": 3},
+    ]
+    rules = {"AREA": "safe_text"}
+
+    sql = build_select_with_wkt_safe(
+        "GAVD", None, convert_numbers_to_text=False, columns=columns, typed_numbers=True, cast_rules=rules
+    )
+    column_types = build_column_types(columns, cast_rules=rules)
+
+    assert sql == (
+        "SELECT ID, TO_CHAR(CASE WHEN AREA < -1e-6 THEN NULL ELSE AREA END) AS AREA FROM giss.GAVD"
+    )
+    assert column_types == {"id": pa.int64(), "area": pa.string()}
@@ -0,0 +1,46 @@
+## detta är filen tests/test_geometry.py
+
+import json
+import struct
+
+import pyarrow as pa
+
+from dlt_pipeline.giss import geometry
+from dlt_pipeline.giss.geometry import GeoParquetCollector, crs_for_srid, epsg_for_srid
+
+
+def _point(x, y):
+    return struct.pack("<BIdd", 1, 1, x, y)
+
+
+def test_sweref99_tm_is_a_projected_projjson():
+    crs = crs_for_srid(3006)
+
+    assert crs["type"] == "ProjectedCRS"
+    assert crs["id"] == {"authority": "EPSG", "code": 3006}
+    assert crs["base_crs"]["datum"]["ellipsoid"]["name"] == "GRS 1980"
+    assert {p["name"]: p["value"] for p in crs["conversion"]["parameters"]}["Longitude of natural origin"] == 15
+
+
+def test_oracle_srid_maps_to_epsg():
+    assert epsg_for_srid(8307) == 4326
+    assert crs_for_srid(8307)["type"] == "GeographicCRS"
+    assert crs_for_srid(None) is None
+
+
+def test_unknown_srid_without_library_is_left_undefined(monkeypatch):
+    # Hellre "crs": null (okänt) än en ofullständig PROJJSON
+    monkeypatch.setattr(geometry, "_projjson_from_library", lambda code: None)
+
+    assert crs_for_srid(3021) is None
+
+
+def test_collector_writes_projjson_and_bbox():
+    collector = GeoParquetCollector({"geometri_wkb": 3006})
+    collector.observe(pa.record_batch([pa.array([_point(1, 2), None, _point(3, -4)])], names=["geometri_wkb"]))
+
+    column = json.loads(collector.key_value_metadata()["geo"])["columns"]["geometri_wkb"]
+
+    assert column["crs"] == crs_for_srid(3006)
+    assert column["geometry_types"] == ["Point"]
+    assert column["bbox"] == [1.0, -4.0, 3.0, 2.0]
@@ -0,0 +1,91 @@
+## detta är filen tests/test_manifest.py
+
+import os
+
+from dlt_pipeline.giss.manifest import (
+    file_checksum,
+    load_manifest,
+    new_manifest,
+    record_result,
+    save_manifest,
+    table_is_complete,
+    units_to_resume,
+)
+from dlt_pipeline.giss.partition import work_item_label
+
+
+def _item(tmp_path, table, part=None, n_parts=1):
+    name = f"{table.lower()}_20250101_000000" + (f"/part-{part:05d}" if part is not None else "")
+    return {
+        "table": table,
+        "part": part,
+        "n_parts": n_parts,
+        "where": None if part is None else f"ID >= {part * 10}",
+        "est_rows": 10,
+        "output_path": str(tmp_path / f"{name}.parquet"),
+        "kind": "full",
+    }
+
+
+def _finish(manifest, item, status="ok", info=10):
+    # Som run_export: filen skrivs och resultatet förs in i manifestet
+    checksum = None
+    if status == "ok":
+        path = item["output_path"]
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(item["table"].encode())
+        checksum = file_checksum(path)
+    details = {"checksum": checksum, "attempts": 1}
+    return record_result(manifest, item, (work_item_label(item), status, info, details), {"start": 0.0, "end": 1.5})
+
+
+def test_resume_runs_failed_pending_and_changed_units(tmp_path):
+    items = [
+        _item(tmp_path, "GAVD"),
+        _item(tmp_path, "TDOK", part=0, n_parts=3),
+        _item(tmp_path, "TDOK", part=1, n_parts=3),
+        _item(tmp_path, "TDOK", part=2, n_parts=3),
+        _item(tmp_path, "BANA"),
+    ]
+    manifest = new_manifest("20250101_000000", "partitioned", items)
+    _finish(manifest, items[0])
+    _finish(manifest, items[1])
+    _finish(manifest, items[2], status="error", info="ORA-03113: end-of-file on communication channel")
+    _finish(manifest, items[4])
+    # BANA:s fil har ändrats efter exporten, TDOK[3/3] blev aldrig klar
+    with open(items[4]["output_path"], "ab") as f:
+        f.write(b"x")
+
+    path = str(tmp_path / "_run_manifest.json")
+    save_manifest(path, manifest)
+    resume = units_to_resume(load_manifest(path))
+
+    # Manifestet sparas med sorterade nycklar, så ordningen följer etiketterna
+    assert [work_item_label(u) for u in resume] == ["BANA", "TDOK[2/3]", "TDOK[3/3]"]
+    assert resume[1] == items[2]
+    assert table_is_complete(manifest, "GAVD")
+    assert not table_is_complete(manifest, "TDOK")
+
+
+def test_resume_when_file_is_missing(tmp_path):
+    item = _item(tmp_path, "GAVD")
+    manifest = new_manifest("20250101_000000", "serial", [item])
+    _finish(manifest, item)
+
+    assert units_to_resume(manifest) == []
+    (tmp_path / "gavd_20250101_000000.parquet").unlink()
+    assert units_to_resume(manifest) == [item]
+
+
+def test_record_result_counts_attempts(tmp_path):
+    item = _item(tmp_path, "GAVD")
+    manifest = new_manifest("20250101_000000", "serial", [item])
+    _finish(manifest, item, status="error", info="ORA-12170")
+    unit = _finish(manifest, item)
+
+    assert unit["status"] == "ok"
+    assert unit["attempts"] == 2
+    assert unit["rows"] == 10
+    assert unit["error"] is None
+    assert unit["seconds"] == 1.5
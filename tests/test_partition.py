@@ -0,0 +1,54 @@
+## detta är filen tests/test_partition.py
+
+import duckdb
+import pytest
+
+from dlt_pipeline.giss.partition import build_work_items, plan_table_partitions, work_item_label
+
+
+def _matches(predicates, lo, hi):
+    # Antal villkor som varje nyckel i [lo, hi] uppfyller, utvärderat i DuckDB
+    con = duckdb.connect()
+    con.execute(f"CREATE TABLE t AS SELECT range AS id FROM range({lo}, {hi + 1})")
+    cases = " + ".join(f"CASE WHEN {p} THEN 1 ELSE 0 END" for p in predicates)
+    return dict(con.execute(f"SELECT id, {cases} FROM t").fetchall())
+
+
+@pytest.mark.parametrize(
+    "n_parts, key_range",
+    [(4, (1, 100)), (3, (1, 10)), (4, (1, 2)), (7, (-5, 1234)), (2, (10, 10))],
+)
+def test_key_ranges_cover_every_key_exactly_once(n_parts, key_range):
+    predicates = plan_table_partitions(n_parts, key="id", key_range=key_range)
+
+    assert len(predicates) == n_parts
+    assert set(_matches(predicates, *key_range).values()) == {1}
+
+
+def test_key_ranges_are_open_at_both_ends():
+    # Rader som tillkommer utanför (min, max) efter planeringen hamnar i första/sista delen
+    predicates = plan_table_partitions(4, key="id", key_range=(100, 200))
+
+    matches = _matches(predicates, 0, 300)
+    assert set(matches.values()) == {1}
+
+
+def test_without_key_uses_ora_hash_buckets():
+    predicates = plan_table_partitions(3)
+
+    assert predicates == [f"ORA_HASH(ROWID, 2) = {i}" for i in range(3)]
+
+
+def test_small_tables_are_not_split(tmp_path):
+    items = build_work_items(
+        None, ["GAVD", "TDOK"], str(tmp_path), "20250101_000000", n_parts=4,
+        min_rows=1000, row_estimates={"GAVD": 10, "TDOK": 999},
+    )
+
+    assert [(i["table"], i["part"], i["where"]) for i in items] == [("GAVD", None, None), ("TDOK", None, None)]
+    assert items[0]["output_path"] == str(tmp_path / "gavd_20250101_000000.parquet")
+    assert work_item_label(items[0]) == "GAVD"
+
+
+def test_work_item_label_for_parts():
+    assert work_item_label({"table": "TDOK", "part": 1, "n_parts": 4}) == "TDOK[2/4]"
@@ -0,0 +1,62 @@
+## detta är filen tests/test_scheduler.py
+
+import pytest
+
+from dlt_pipeline.giss.scheduler import (
+    DEFAULT_SECONDS_PER_ROW,
+    estimate_cost,
+    estimate_rates,
+    order_largest_first,
+    update_sizes_with_timings,
+)
+
+
+def _item(table, part=None, n_parts=1, kind="full", est_rows=0):
+    return {"table": table, "part": part, "n_parts": n_parts, "kind": kind, "est_rows": est_rows}
+
+
+def _finished(item, status="ok", seconds=1.0):
+    return item, (item["table"], status, 0, {}), {"start": 0.0, "end": seconds}
+
+
+def test_sizes_are_converted_to_seconds_with_observed_rates():
+    sizes = {
+        "GAVD": {"bytes": 1000, "num_rows": 100, "seconds": 10.0},
+        "TDOK": {"bytes": 4000},
+        "BANA": {"num_rows": 50},
+    }
+
+    assert estimate_rates(sizes) == {"bytes": 0.01, "rows": 0.1}
+    assert estimate_cost(_item("GAVD"), sizes) == 10.0
+    assert estimate_cost(_item("TDOK"), sizes) == pytest.approx(40.0)
+    assert estimate_cost(_item("BANA"), sizes) == pytest.approx(5.0)
+    assert estimate_cost(_item("TDOK", part=0, n_parts=4), sizes) == pytest.approx(10.0)
+
+
+def test_bytes_and_rows_are_comparable_before_anything_is_timed():
+    # Utan mätningar får en tabell med bara antal rader inte vinna över bytes bara för att talet är större
+    sizes = {"STOR": {"bytes": 500 * 1024 * 1024}, "LITEN": {"num_rows": 1000}}
+
+    ordered = order_largest_first([_item("LITEN"), _item("STOR")], sizes)
+
+    assert [item["table"] for item in ordered] == ["STOR", "LITEN"]
+    assert estimate_cost(_item("LITEN"), sizes) == pytest.approx(1000 * DEFAULT_SECONDS_PER_ROW)
+
+
+def test_delta_cost_follows_its_own_rows():
+    sizes = {"GAVD": {"num_rows": 100, "seconds": 10.0}}
+
+    assert estimate_cost(_item("GAVD", kind="delta", est_rows=5), sizes) == pytest.approx(0.5)
+
+
+def test_only_fully_successful_tables_get_timings():
+    finished = [
+        _finished(_item("GAVD"), seconds=2.0),
+        _finished(_item("TDOK", part=0, n_parts=2), seconds=3.0),
+        _finished(_item("TDOK", part=1, n_parts=2), status="error", seconds=0.1),
+        _finished(_item("BANA", kind="delta"), seconds=1.0),
+    ]
+
+    sizes = update_sizes_with_timings({"TDOK": {"seconds": 30.0}}, finished)
+
+    assert sizes == {"GAVD": {"seconds": 2.0}, "TDOK": {"seconds": 30.0}}
@@ -0,0 +1,119 @@
+## detta är filen tests/test_server.py
+
+import json
+import os
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import server
+from tests.conftest import write_parquet
+
+COLUMNS = {"id": "BIGINT", "namn": "VARCHAR", "andrad": "TIMESTAMP"}
+
+
+@pytest.fixture
+def client(parquet_dir, monkeypatch):
+    write_parquet(
+        os.path.join(parquet_dir, "gavd_20250101_000000.parquet"),
+        id=list(range(25)),
+        namn=[f"namn {i}" for i in range(25)],
+        kommun=["Umeå" if i % 3 == 0 else "Luleå" for i in range(25)],
+    )
+    monkeypatch.setattr(server, "PARQUET_DIR", parquet_dir)
+    server._results.clear()
+    server._tables.clear()
+    return TestClient(server.app)
+
+
+def _rows(response):
+    assert response.status_code == 200, response.text
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+# -------------------------------------------------------------
+# FILTER
+# -------------------------------------------------------------
+@pytest.mark.parametrize(
+    "spec, clause, params",
+    [
+        ("ID:eq:5", '"id" = CAST(? AS BIGINT)', ["5"]),
+        ("id:ge:5", '"id" >= CAST(? AS BIGINT)', ["5"]),
+        ("NAMN:like:a%:b", 'CAST("namn" AS VARCHAR) LIKE ?', ["a%:b"]),
+        ("id:in:1|2|3", '"id" IN (CAST(? AS BIGINT), CAST(? AS BIGINT), CAST(? AS BIGINT))', ["1", "2", "3"]),
+        ("andrad:isnull", '"andrad" IS NULL', []),
+        ("andrad:notnull", '"andrad" IS NOT NULL', []),
+    ],
+)
+def test_filter_clause(spec, clause, params):
+    assert server._filter_clause(COLUMNS, spec) == (clause, params)
+
+
+@pytest.mark.parametrize("spec", ["id", "okand:eq:1", "id:between:1", "id:eq"])
+def test_invalid_filter_is_rejected(spec):
+    with pytest.raises(HTTPException) as error:
+        server._filter_clause(COLUMNS, spec)
+    assert error.value.status_code == 400
+
+
+def test_build_query_with_keyset_paging():
+    sql, params, python_bbox = server.build_query(
+        "giss_gavd", COLUMNS, select=["ID", "namn"], filters=["namn:ne:x"], order_by="ID", after="10", limit=5,
+    )
+
+    assert sql == (
+        'SELECT "id", "namn" FROM giss_gavd WHERE "namn" <> CAST(? AS VARCHAR) '
+        'AND "id" > CAST(? AS BIGINT) ORDER BY "id" LIMIT 5'
+    )
+    assert params == ["x", "10"]
+    assert python_bbox is None
+
+
+# -------------------------------------------------------------
+# ENDPOINTS
+# -------------------------------------------------------------
+def test_keyset_paging_walks_the_whole_table(client):
+    seen, after = [], None
+    while True:
+        params = {"order_by": "id", "limit": 10, "columns": "id"}
+        if after is not None:
+            params["after"] = after
+        page = _rows(client.get("/tables/GAVD", params=params))
+        if not page:
+            break
+        seen.extend(row["id"] for row in page)
+        after = page[-1]["id"]
+
+    assert seen == list(range(25))
+
+
+def test_filters_are_applied(client):
+    rows = _rows(client.get("/tables/gavd", params={"filter": ["kommun:eq:Umeå", "id:lt:10"], "limit": 0}))
+
+    assert [row["id"] for row in rows] == [0, 3, 6, 9]
+
+
+def test_bad_filter_value_returns_400(client):
+    response = client.get("/tables/GAVD", params={"filter": "id:eq:abc"})
+
+    assert response.status_code == 400
+    assert "abc" in response.json()["detail"]
+
+
+def test_bad_keyset_value_returns_400(client):
+    assert client.get("/tables/GAVD", params={"order_by": "id", "after": "x"}).status_code == 400
+    assert client.get("/tables/GAVD", params={"after": "1"}).status_code == 400
+
+
+def test_unknown_table_returns_404(client):
+    assert client.get("/tables/TDOK").status_code == 404
+
+
+def test_results_are_cached(client):
+    params = {"filter": "id:lt:3"}
+    first = client.get("/tables/GAVD", params=params)
+    second = client.get("/tables/GAVD", params=params)
+
+    assert (first.headers["X-Cache"], second.headers["X-Cache"]) == ("MISS", "HIT")
+    assert first.text == second.text
@@ -0,0 +1,168 @@
+## detta är filen tests/test_state.py
+
+from datetime import datetime
+from decimal import Decimal
+
+import duckdb
+import pandas as pd
+import pytest
+
+from dlt_pipeline.giss import state
+from dlt_pipeline.giss.standin import _MACROS
+from dlt_pipeline.giss.state import (
+    _json_value,
+    can_export_delta,
+    checksum_expression,
+    delta_predicate,
+    delta_refusal,
+    is_unchanged,
+    load_state,
+    make_delta_item,
+    save_state,
+)
+
+
+def _probe(mark, rows=10, strategy="column", column="ID"):
+    value, mark_type = _json_value(mark)
+    return {"strategy": strategy, "column": column, "mark": value, "mark_type": mark_type, "rows": rows}
+
+
+@pytest.mark.parametrize(
+    "mark, expected",
+    [
+        (7.0, (7, "number")),
+        (1.5, (1.5, "number")),
+        (None, (None, None)),
+        (float("nan"), (None, None)),
+        ("B-12", ("B-12", "string")),
+    ],
+)
+def test_json_value(mark, expected):
+    assert _json_value(mark) == expected
+
+
+@pytest.mark.parametrize(
+    "mark, expected",
+    [
+        (2**53 + 1, (2**53 + 1, "number")),
+        (Decimal("12345678901234567890123"), (12345678901234567890123, "number")),
+        (Decimal("1.10"), ("1.10", "number")),
+    ],
+)
+def test_json_value_keeps_numbers_exact(mark, expected):
+    assert _json_value(mark) == expected
+
+
+def test_json_value_timestamp():
+    assert _json_value(pd.Timestamp("2025-01-02 03:04:05.123456")) == ("2025-01-02T03:04:05.123456", "timestamp")
+
+
+def test_number_mark_survives_state_file(tmp_path):
+    # Märket skrivs till JSON och läses tillbaka utan att tappa siffror
+    path = str(tmp_path / "_export_state.json")
+    save_state(path, {"GAVD": _probe(Decimal("90071992547409931"))})
+
+    previous = load_state(path)["GAVD"]
+    assert delta_predicate(previous) == "ID > 90071992547409931"
+
+
+def test_number_predicate_selects_only_newer_rows():
+    # Predikatet med ett exakt märke över 2^53 släpper bara igenom raden efter märket
+    con = duckdb.connect()
+    con.execute("CREATE TABLE t AS SELECT (9007199254740993 + range)::DECIMAL(38,0) AS id FROM range(3)")
+    predicate = delta_predicate(_probe(Decimal("9007199254740993")))
+
+    assert con.execute(f"SELECT id FROM t WHERE {predicate}").fetchall() == [
+        (Decimal("9007199254740994"),), (Decimal("9007199254740995"),),
+    ]
+
+
+def test_timestamp_and_string_predicates():
+    timestamp = _probe(datetime(2025, 1, 2, 3, 4, 5), column="ANDRAD")
+    assert delta_predicate(timestamp) == (
+        "ANDRAD > TO_TIMESTAMP('2025-01-02 03:04:05.000000', 'YYYY-MM-DD HH24:MI:SS.FF6')"
+    )
+    assert delta_predicate(_probe("O'Hara", column="NAMN")) == "NAMN > 'O''Hara'"
+
+
+def test_delta_only_when_rows_are_not_removed():
+    previous = _probe(100, rows=10)
+
+    assert can_export_delta(previous, _probe(120, rows=12))
+    assert not can_export_delta(previous, _probe(120, rows=9))
+    assert not can_export_delta(previous, _probe(120, rows=12, strategy="rowscn"))
+    assert not can_export_delta(None, _probe(120, rows=12))
+
+
+def test_unchanged_table_is_skipped():
+    previous = _probe(100, rows=10)
+
+    assert is_unchanged(previous, _probe(100, rows=10))
+    assert not is_unchanged(previous, _probe(100, rows=11))
+    assert not is_unchanged({}, _probe(100, rows=10))
+
+
+def test_delta_item(tmp_path):
+    item = make_delta_item("GAVD", _probe(100, rows=10), _probe(120, rows=15), str(tmp_path), "20250101_000000")
+
+    assert item["where"] == "ID > 100"
+    assert item["est_rows"] == 5
+    assert item["kind"] == "delta"
+    assert item["output_path"] == str(tmp_path / "gavd_delta_20250101_000000.parquet")
+
+
+# -------------------------------------------------------------
+# KONTROLLSUMMA
+# -------------------------------------------------------------
+CHECKSUM_COLUMNS = [
+    {"name": "ID", "data_type": "NUMBER"},
+    {"name": "NAMN", "data_type": "VARCHAR2"},
+    {"name": "SKAPAD", "data_type": "DATE"},
+    {"name": "ANDRAD", "data_type": "TIMESTAMP(6)"},
+]
+
+
+def _checksum(rows):
+    # Uttrycket körs i DuckDB med stand-in-makrona för ORA_HASH/TO_CHAR
+    con = duckdb.connect()
+    for statement in _MACROS:
+        con.execute(statement)
+    con.execute("CREATE TABLE t (id INTEGER, namn VARCHAR, skapad TIMESTAMP, andrad TIMESTAMP)")
+    con.executemany("INSERT INTO t VALUES (?, ?, ?, ?)", rows)
+    return con.execute(f"SELECT {checksum_expression(CHECKSUM_COLUMNS)} FROM t").fetchone()[0]
+
+
+def test_checksum_hashes_each_column_with_explicit_date_formats():
+    expr = checksum_expression(CHECKSUM_COLUMNS)
+
+    assert expr.startswith("SUM(ORA_HASH(COALESCE(ORA_HASH(ID), -1) || '|' || ")
+    assert """TO_CHAR(SKAPAD, 'YYYY-MM-DD"T"HH24:MI:SS')""" in expr
+    assert """TO_CHAR(ANDRAD, 'YYYY-MM-DD"T"HH24:MI:SS.FF')""" in expr
+    assert "TO_CHAR(NAMN" not in expr
+
+
+def test_checksum_changes_when_values_move_between_rows():
+    day = datetime(2025, 1, 2)
+    rows = [(1, "a", day, None), (2, "b", day, day)]
+
+    assert _checksum(rows) == _checksum(list(reversed(rows)))
+    assert _checksum(rows) != _checksum([(1, "b", day, None), (2, "a", day, day)])
+    assert _checksum(rows) != _checksum([(1, "a", day, day), (2, "b", day, None)])
+
+
+def test_wide_tables_are_hashed_in_chunks(monkeypatch):
+    monkeypatch.setattr(state, "CHECKSUM_CHUNK_COLUMNS", 3)
+
+    expr = checksum_expression(CHECKSUM_COLUMNS)
+
+    assert expr.startswith("SUM(ORA_HASH(ORA_HASH(COALESCE(ORA_HASH(ID), -1) || ")
+    assert expr.count("ORA_HASH(") == len(CHECKSUM_COLUMNS) + 3
+
+
+def test_delta_refusal_explains_the_full_export():
+    previous = _probe(100, rows=10)
+
+    assert delta_refusal(previous, _probe(120, rows=12)) is None
+    assert "minskade" in delta_refusal(previous, _probe(120, rows=9))
+    assert "rowscn" in delta_refusal(previous, _probe(120, strategy="rowscn"))
+    assert delta_refusal(None, _probe(120)) == "inget märke från en tidigare export"
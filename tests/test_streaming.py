@@ -0,0 +1,83 @@
+## detta är filen tests/test_streaming.py
+
+import sqlite3
+
+import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from dlt_pipeline.giss.streaming import ParquetBatchSink, rows_to_record_batch, stream_query_to_parquet
+
+
+def _sqlite(rows):
+    con = sqlite3.connect(":memory:")
+    con.execute("CREATE TABLE gavd (id INTEGER, namn TEXT)")
+    con.executemany("INSERT INTO gavd VALUES (?, ?)", rows)
+    return con
+
+
+def test_rows_are_written_batch_by_batch(tmp_path):
+    path = str(tmp_path / "gavd.parquet")
+    rows = [(i, f"namn {i}") for i in range(7)]
+
+    n_rows = stream_query_to_parquet(
+        _sqlite(rows), "SELECT id, namn FROM gavd ORDER BY id", path, batch_size=3, arraysize=2
+    )
+
+    assert n_rows == 7
+    assert [(r["id"], r["namn"]) for r in pq.read_table(path).to_pylist()] == rows
+    # En row group per batch: 3 + 3 + 1 rader
+    assert pq.ParquetFile(path).metadata.num_row_groups == 3
+
+
+def test_empty_table_still_gets_a_file(tmp_path):
+    path = str(tmp_path / "gavd.parquet")
+
+    n_rows = stream_query_to_parquet(_sqlite([]), "SELECT id, namn FROM gavd", path)
+
+    assert n_rows == 0
+    assert pq.read_table(path).column_names == ["id", "namn"]
+
+
+def test_column_that_starts_with_nulls_keeps_its_type(tmp_path):
+    # Kolumnen har bara NULL i första batchen; heltalen efteråt ska inte bli '3', '4'
+    path = str(tmp_path / "gavd.parquet")
+    sql = "SELECT id, CASE WHEN id > 2 THEN id END AS antal FROM gavd ORDER BY id"
+
+    stream_query_to_parquet(_sqlite([(i, "a") for i in range(1, 5)]), sql, path, batch_size=2)
+
+    table = pq.read_table(path)
+    assert table.schema.field("antal").type == pa.int64()
+    assert table.column("antal").to_pylist() == [None, None, 3, 4]
+
+
+def test_column_without_values_becomes_string(tmp_path):
+    path = str(tmp_path / "gavd.parquet")
+
+    stream_query_to_parquet(_sqlite([(1, None), (2, None), (3, None)]), "SELECT id, namn FROM gavd", path, batch_size=2)
+
+    assert pq.read_table(path).schema.field("namn").type == pa.string()
+
+
+def test_values_after_the_defer_limit_are_an_error(tmp_path):
+    sink = ParquetBatchSink(str(tmp_path / "gavd.parquet"), null_defer_rows=2)
+    sink.write(rows_to_record_batch(["id", "antal"], [(1, None), (2, None)]))
+
+    with pytest.raises(ValueError, match="antal"):
+        sink.write(rows_to_record_batch(["id", "antal"], [(3, 3)]))
+    sink.close()
+
+
+def test_duckdb_cursor(tmp_path):
+    # DuckDB:s cursor saknar arraysize
+    path = str(tmp_path / "gavd.parquet")
+    con = duckdb.connect()
+    con.execute("CREATE TABLE gavd AS SELECT range AS id, CASE WHEN range > 4 THEN 'x' END AS namn FROM range(7)")
+
+    n_rows = stream_query_to_parquet(con, "SELECT id, namn FROM gavd ORDER BY id", path, batch_size=3, row_group_rows=4)
+
+    table = pq.read_table(path)
+    assert n_rows == 7
+    assert table.column("namn").to_pylist() == [None] * 5 + ["x", "x"]
+    assert [pq.ParquetFile(path).metadata.row_group(i).num_rows for i in range(2)] == [4, 3]